@@ -0,0 +1,152 @@
+import os
+import copy
+import json
+import time
+import sqlite3
+import threading
+from cachetools import LRUCache
+
+from steam_constants import api_cache_ttls
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache', 'steam_api_cache.sqlite')
+STEAM_API_CACHE_PATH = os.getenv("STEAM_API_CACHE_PATH", DEFAULT_CACHE_PATH)
+STEAM_API_CACHE_ENABLED = os.getenv("STEAM_API_CACHE", "1") != "0" # "0" отключает кэш ответов API
+
+
+def make_cache_key(api_name, request_name, params=None):
+    """Формирует ключ кэша из имени API, имени запроса и нормализованных параметров.
+
+    Параметры сортируются и приводятся к строкам, поэтому {'appids': 10} и {'appids': '10'} дают один ключ.
+    API ключ Steam ('key') в ключ кэша не входит.
+    """
+    normalized_params = {str(name): str(value) for name, value in (params or {}).items() if name != 'key'}
+    return f"{api_name}:{request_name}:{json.dumps(normalized_params, sort_keys=True, ensure_ascii=False)}"
+
+
+def get_cache_ttl(api_name, request_name):
+    """Возвращает TTL ответа запроса в секундах из `api_cache_ttls` или None, если запрос не кэшируется."""
+    return api_cache_ttls.get(api_name, {}).get(request_name)
+
+
+def is_failed_lookup(response):
+    """Определяет, что ответ API означает отсутствие данных (а не временную ошибку).
+
+    Такие ответы кэшируются на `api_negative_cache_ttl`: 404, `success: false` в ответе appdetails
+    Steam Store и `success != 1` в ответах Steam Web API (например, неизвестный vanity URL).
+    """
+    if response.get('status_code') == 404:
+        return True
+    response_json = response.get('response_json')
+    if not isinstance(response_json, dict):
+        return False
+    if any(isinstance(value, dict) and value.get('success') is False for value in response_json.values()):
+        return True
+    inner_response = response_json.get('response')
+    return isinstance(inner_response, dict) and inner_response.get('success') not in (None, 1)
+
+
+class ResponseCache:
+    """
+    Двухуровневый кэш ответов API с TTL.
+
+    Первый уровень - LRU в памяти процесса, второй - таблица SQLite на диске, которая переживает
+    перезапуск сервиса и общая для процессов. Каждая запись хранит собственное время истечения.
+    Возвращаются и сохраняются копии ответов, поэтому изменение ответа вызывающим кодом не портит кэш.
+    Счетчики попаданий и промахов доступны через `stats`. Потокобезопасен.
+
+    Аргументы:
+        path (str, optional): Путь к файлу SQLite. None - только кэш в памяти. По умолчанию None.
+        memory_size (int, optional): Максимальное количество записей в памяти. По умолчанию 2048.
+    """
+    def __init__(self, path=None, memory_size=2048):
+        self.path = path
+        self.memory = LRUCache(maxsize=memory_size)
+        self.lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+        self.connection = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self.connection.commit()
+
+    def get(self, key):
+        """Возвращает копию закэшированного ответа или None, если его нет или срок хранения истек."""
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.counters['memory_hits'] += 1
+                    return copy.deepcopy(entry[1])
+                del self.memory[key]
+            if self.connection is not None:
+                row = self.connection.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self.memory[key] = (row[1], value)
+                    self.counters['disk_hits'] += 1
+                    return copy.deepcopy(value)
+            self.counters['misses'] += 1
+            return None
+
+    def set(self, key, value, ttl):
+        """Сохраняет копию ответа в оба уровня кэша на `ttl` секунд."""
+        expires_at = time.time() + ttl
+        value = copy.deepcopy(value)
+        with self.lock:
+            self.memory[key] = (expires_at, value)
+            if self.connection is not None:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at)
+                )
+                self.connection.commit()
+            self.counters['stores'] += 1
+
+    def purge_expired(self):
+        """Удаляет записи с истекшим сроком хранения из SQLite. Возвращает количество удаленных записей."""
+        if self.connection is None:
+            return 0
+        with self.lock:
+            deleted = self.connection.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+            self.connection.commit()
+        return deleted
+
+    def stats(self):
+        """Возвращает счетчики попаданий, промахов и сохранений, а также долю попаданий."""
+        with self.lock:
+            stats = dict(self.counters)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_ratio'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        """Закрывает соединение с SQLite."""
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Возвращает общий для процесса ResponseCache (`STEAM_API_CACHE_PATH`) или None, если кэш отключен (`STEAM_API_CACHE=0`)."""
+    global _default_cache
+    if not STEAM_API_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                try:
+                    _default_cache = ResponseCache(STEAM_API_CACHE_PATH)
+                except sqlite3.Error as e:
+                    print(f"⚠️ Не удалось открыть кэш ответов API ({e}). Используется кэш только в памяти.")
+                    _default_cache = ResponseCache()
+    return _default_cache
@@ -0,0 +1,306 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+import tracemalloc
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_catalog import generate_raw_games, generate_owned_games
+from dataset_cleaner import DataCleaner
+from vectorizer import CombinedVectorizer
+from catalog_store import normalize_steam_id_index
+from catalog_embeddings import CatalogEmbeddings
+from vector_index import build_vector_index
+from recommendation_ranker import CatalogRanker
+from steam_library_grouper import group_user_games
+from steam_library_analyzer import LibraryAnalyzer, calculate_similarity_and_rank
+from micro_batch_scorer import MicroBatchScorer
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'benchmarks')
+DEFAULT_RESULTS_PATH = os.path.join(BENCHMARKS_DIR, 'results.json')
+DEFAULT_BASELINE_PATH = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000}
+STAGES = ['clean', 'vectorizer_fit', 'vectorizer_transform', 'rank', 'score_concurrent', 'group_user_games']
+RESULTS_FORMAT_VERSION = 1
+
+# Модель бенчмарка: CPU-бэкенд и фиксированный random_state, чтобы результаты не зависели от окружения
+BENCHMARK_MODEL_PARAMS = {
+    'backend': 'cpu',
+    'multilabel_params': {'sparse_output': True},
+    'nmf_params': {'n_components': 20, 'init': 'nndsvda', 'solver': 'mu', 'beta_loss': 'frobenius', 'max_iter': 200, 'random_state': 42},
+    'tfidf_cuml_params': {'max_features': 10000},
+    'tag_weight': 1.0,
+}
+
+
+class BenchmarkAnalyzer:
+    """
+    Минимальное состояние анализатора для `calculate_similarity_and_rank` без Steam API и файлов модели.
+
+    Использует те же методы получения векторов, что и LibraryAnalyzer, точный индекс поиска
+    и CatalogRanker, построенные по синтетическому каталогу.
+
+    Аргументы:
+        model: Обученная модель (CombinedVectorizer).
+        catalog_df (pd.DataFrame): Очищенный каталог с индексом `steam_id`.
+    """
+    calculate_similarity_and_rank = calculate_similarity_and_rank
+    get_game_vectors = LibraryAnalyzer.get_game_vectors
+    vectorize_games = LibraryAnalyzer.vectorize_games
+
+    def __init__(self, model, catalog_df):
+        self.model = model
+        self.catalog_embeddings = CatalogEmbeddings.build(model, catalog_df)
+        self.vector_index = build_vector_index(self.catalog_embeddings, 'exact')
+        self.ranker = CatalogRanker(catalog_df)
+        self.scorer = None
+        self.result_cache = None
+        self._model_lock = threading.Lock()
+
+
+def measure(func, repeats=3, memory=True, verbose=False):
+    """Измеряет время выполнения `func` и пиковый объем памяти, выделенной за время вызова.
+
+    Время измеряется без tracemalloc (`repeats` запусков), пиковая память - отдельным запуском под tracemalloc.
+
+    Аргументы:
+        func (callable): Функция без аргументов.
+        repeats (int, optional): Количество запусков для измерения времени. По умолчанию 3.
+        memory (bool, optional): Измерять ли пиковую память. По умолчанию True.
+        verbose (bool, optional): Не подавлять вывод функции в консоль. По умолчанию False.
+
+    Возвращает:
+        tuple: (результат последнего запуска, словарь с 'seconds_min', 'seconds_median', 'repeats' и 'peak_memory_mb').
+    """
+    timings = []
+    result = None
+    for _ in range(max(1, repeats)):
+        start_time = time.perf_counter()
+        if verbose:
+            result = func()
+        else:
+            with redirect_stdout(io.StringIO()):
+                result = func()
+        timings.append(time.perf_counter() - start_time)
+
+    peak_memory_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            with redirect_stdout(io.StringIO()):
+                func()
+            peak_memory_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        finally:
+            tracemalloc.stop()
+    return result, {
+        'seconds_min': min(timings),
+        'seconds_median': statistics.median(timings),
+        'repeats': len(timings),
+        'peak_memory_mb': peak_memory_mb,
+    }
+
+
+def run_scale(scale_name, n_games, seed=42, repeats=3, memory=True, stages=None, n_queries=20, n_threads=8, verbose=False):
+    """Выполняет бенчмарки всех этапов на синтетическом каталоге одного размера.
+
+    Этапы выполняются по цепочке: очистка сырого каталога, обучение модели на очищенных данных,
+    трансформация каталога, ранжирование `n_queries` групп из 5 игр каталога, расчет схожести `n_queries * 10`
+    запросов из `n_threads` потоков через `MicroBatchScorer` и группировка библиотеки из `n_games` игр. Этапы, не попавшие в `stages`, не измеряются, но их результат вычисляется, если нужен следующим.
+
+    Аргументы:
+        scale_name (str): Имя размера для таблицы результатов ('1k', '10k', '100k').
+        n_games (int): Количество игр синтетического каталога.
+        seed (int, optional): Seed генератора. По умолчанию 42.
+        repeats (int, optional): Количество запусков каждого этапа. По умолчанию 3.
+        memory (bool, optional): Измерять ли пиковую память. По умолчанию True.
+        stages (list, optional): Измеряемые этапы (см. `STAGES`). По умолчанию все.
+        n_queries (int, optional): Количество запросов ранжирования в этапе 'rank'. По умолчанию 20.
+        n_threads (int, optional): Количество потоков, одновременно отправляющих запросы в этапе 'score_concurrent'. По умолчанию 8.
+        verbose (bool, optional): Не подавлять вывод этапов в консоль. По умолчанию False.
+
+    Возвращает:
+        list: Словари результатов этапов.
+    """
+    stages = stages if stages else STAGES
+    results = []
+
+    def run_stage(stage, func, n_items):
+        if stage in stages:
+            result, stats = measure(func, repeats=repeats, memory=memory, verbose=verbose)
+            results.append({'stage': stage, 'scale': scale_name, 'n_items': int(n_items), **stats})
+            print(f"⏱️ {scale_name:>5} {stage:<22} {stats['seconds_median']:9.3f} с"
+                  + (f", пик памяти {stats['peak_memory_mb']:.1f} МБ" if stats['peak_memory_mb'] is not None else ''))
+            return result
+        with redirect_stdout(io.StringIO()):
+            return func()
+
+    start_time = time.perf_counter()
+    raw_df = generate_raw_games(n_games, seed=seed)
+    print(f"🎲 Синтетический каталог {scale_name}: {len(raw_df)} игр за {time.perf_counter() - start_time:.2f} секунд")
+
+    data_cleaner = DataCleaner(lemma_cache_path=None)
+    cleaned_df = run_stage('clean', lambda: data_cleaner.clean_data(raw_df), len(raw_df))
+    catalog_df = normalize_steam_id_index(cleaned_df.copy())
+    if catalog_df.empty:
+        raise ValueError("❌ После очистки синтетического каталога не осталось игр.")
+
+    model = run_stage('vectorizer_fit', lambda: CombinedVectorizer(**BENCHMARK_MODEL_PARAMS).fit(catalog_df), len(catalog_df))
+    run_stage('vectorizer_transform', lambda: model.transform(catalog_df), len(catalog_df))
+
+    if 'rank' in stages or 'score_concurrent' in stages:
+        with redirect_stdout(io.StringIO()):
+            analyzer = BenchmarkAnalyzer(model, catalog_df)
+        rng = np.random.default_rng(seed)
+        queries = [
+            [{'steam_id': int(steam_id), 'name': catalog_df.at[steam_id, 'name']} for steam_id in rng.choice(catalog_df.index.values, 5, replace=False)]
+            for _ in range(n_queries)
+        ]
+        run_stage('rank', lambda: [analyzer.calculate_similarity_and_rank(games_data) for games_data in queries], n_queries)
+
+        query_vectors = analyzer.catalog_embeddings.vectors[rng.integers(0, len(catalog_df), n_queries * 10)]
+        scorer = MicroBatchScorer(analyzer.vector_index)
+
+        def score_concurrent():
+            with ThreadPoolExecutor(max_workers=n_threads) as executor:
+                return list(executor.map(scorer.similarities, query_vectors))
+
+        run_stage('score_concurrent', score_concurrent, len(query_vectors))
+        scorer.close()
+
+    owned_games = generate_owned_games(n_games, raw_df.index.values, seed=seed)
+    run_stage('group_user_games', lambda: group_user_games(owned_games), len(owned_games))
+    return results
+
+
+def environment_info():
+    """Возвращает версии Python и библиотек, влияющие на сравнимость результатов."""
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def save_results(results, path):
+    """Сохраняет результаты бенчмарков в JSON (атомарно)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    print(f"💾 Результаты бенчмарков сохранены в: {path}")
+
+
+def compare_with_baseline(results, baseline, tolerance=0.2, metric='seconds_median'):
+    """Сравнивает результаты с базовыми и выводит таблицу изменений.
+
+    Аргументы:
+        results (dict): Текущие результаты (формат `run_benchmarks`).
+        baseline (dict): Базовые результаты того же формата.
+        tolerance (float, optional): Допустимое относительное замедление, например 0.2 = +20%. По умолчанию 0.2.
+        metric (str, optional): Сравниваемая метрика времени. По умолчанию 'seconds_median'.
+
+    Возвращает:
+        list: Словари сравнения этапов ('stage', 'scale', 'baseline', 'current', 'ratio', 'memory_ratio', 'regression').
+    """
+    baseline_rows = {(row['stage'], row['scale']): row for row in baseline.get('results', [])}
+    comparison = []
+    print(f"\n📊 Сравнение с базовыми результатами ({metric}, допуск +{tolerance:.0%}):")
+    for row in results['results']:
+        base = baseline_rows.get((row['stage'], row['scale']))
+        if base is None or not base.get(metric):
+            print(f"   {row['scale']:>5} {row['stage']:<22} нет базового результата")
+            continue
+        ratio = row[metric] / base[metric]
+        memory_ratio = None
+        if row.get('peak_memory_mb') and base.get('peak_memory_mb'):
+            memory_ratio = row['peak_memory_mb'] / base['peak_memory_mb']
+        regression = ratio > 1 + tolerance
+        comparison.append({
+            'stage': row['stage'], 'scale': row['scale'], 'baseline': base[metric], 'current': row[metric],
+            'ratio': ratio, 'memory_ratio': memory_ratio, 'regression': regression,
+        })
+        memory_text = f", память x{memory_ratio:.2f}" if memory_ratio is not None else ''
+        print(f"   {'❌' if regression else '✅'} {row['scale']:>5} {row['stage']:<22} {base[metric]:9.3f} -> {row[metric]:9.3f} с (x{ratio:.2f}{memory_text})")
+    if baseline.get('environment') != results.get('environment'):
+        print("⚠️ Базовые результаты получены в другом окружении (версии библиотек или процессор), сравнение приблизительное.")
+    return comparison
+
+
+def run_benchmarks(scales=('1k', '10k'), seed=42, repeats=3, memory=True, stages=None, verbose=False):
+    """Выполняет бенчмарки на синтетических каталогах указанных размеров.
+
+    Аргументы:
+        scales (iterable, optional): Размеры из `SCALES` или числа игр. По умолчанию ('1k', '10k').
+        seed (int, optional): Seed генератора каталога. По умолчанию 42.
+        repeats (int, optional): Количество запусков каждого этапа. По умолчанию 3.
+        memory (bool, optional): Измерять ли пиковую память. По умолчанию True.
+        stages (list, optional): Измеряемые этапы (см. `STAGES`). По умолчанию все.
+        verbose (bool, optional): Не подавлять вывод этапов в консоль. По умолчанию False.
+
+    Возвращает:
+        dict: Результаты с ключами 'format_version', 'created_at', 'environment', 'config' и 'results'.
+    """
+    rows = []
+    for scale in scales:
+        n_games = SCALES[scale] if scale in SCALES else int(scale)
+        rows.extend(run_scale(str(scale), n_games, seed=seed, repeats=repeats, memory=memory, stages=stages, verbose=verbose))
+    return {
+        'format_version': RESULTS_FORMAT_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment_info(),
+        'config': {'scales': list(scales), 'seed': seed, 'repeats': repeats, 'model_params': BENCHMARK_MODEL_PARAMS},
+        'results': rows,
+    }
+
+
+def main():
+    """Запускает бенчмарки из командной строки, сохраняет результаты и сравнивает их с базовыми."""
+    parser = argparse.ArgumentParser(description="Бенчмарки очистки, векторизации и ранжирования на синтетическом каталоге (офлайн, CPU).")
+    parser.add_argument('--scales', type=str, nargs='+', default=['1k', '10k'], help="Размеры каталога: 1k, 10k, 100k или число игр.")
+    parser.add_argument('--stages', type=str, nargs='+', default=None, choices=STAGES, help='Измеряемые этапы (по умолчанию все).')
+    parser.add_argument('--repeats', type=int, default=3, help='Количество запусков каждого этапа.')
+    parser.add_argument('--seed', type=int, default=42, help='Seed генератора каталога.')
+    parser.add_argument('--no-memory', action='store_true', help='Не измерять пиковую память (без дополнительного запуска под tracemalloc).')
+    parser.add_argument('--output', type=str, default=DEFAULT_RESULTS_PATH, help='JSON файл результатов.')
+    parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE_PATH, help='JSON файл базовых результатов для сравнения.')
+    parser.add_argument('--save-baseline', action='store_true', help='Сохранить результаты как базовые.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Допустимое относительное замедление этапа (0.2 = +20%%).')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Завершиться с кодом 1 при замедлении сверх допуска.')
+    parser.add_argument('--verbose', action='store_true', help='Показывать вывод этапов.')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scales, seed=args.seed, repeats=args.repeats, memory=not args.no_memory, stages=args.stages, verbose=args.verbose)
+    save_results(results, args.output)
+    if args.save_baseline:
+        save_results(results, args.baseline)
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        comparison = compare_with_baseline(results, baseline, tolerance=args.tolerance)
+        if args.fail_on_regression and any(row['regression'] for row in comparison):
+            sys.exit(1)
+    else:
+        print(f"ℹ️ Базовые результаты не найдены ({args.baseline}). Сохраните их флагом --save-baseline.")
+
+
+if __name__ == '__main__':
+    main()
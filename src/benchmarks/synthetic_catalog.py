@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Словари генератора: структура записей повторяет сырой датасет Steam (Kaggle) - словарь тегов с голосами,
+# списки категорий, жанров и языков, диапазоны владельцев строками
+TAGS = [
+    'Action', 'Adventure', 'Indie', 'RPG', 'Strategy', 'Simulation', 'Casual', 'Puzzle', 'Platformer', 'Shooter',
+    'FPS', 'Survival', 'Open World', 'Sandbox', 'Horror', 'Multiplayer', 'Co-op', 'Singleplayer', 'Story Rich', 'Atmospheric',
+    'Pixel Graphics', 'Retro', '2D', '3D', 'Anime', 'Fantasy', 'Sci-fi', 'Space', 'Roguelike', 'Roguelite',
+    'Turn-Based', 'Real-Time', 'Tactical', 'Card Game', 'Deckbuilding', 'Racing', 'Sports', 'Management', 'City Builder', 'Crafting',
+    'Exploration', 'Stealth', 'Hack and Slash', 'Metroidvania', 'Souls-like', 'Visual Novel', 'Dating Sim', 'Point & Click', 'Hidden Object', 'Physics',
+    'Building', 'Base Building', 'Colony Sim', 'Tower Defense', 'Military', 'War', 'Historical', 'Medieval', 'Post-apocalyptic', 'Zombies',
+    'Cyberpunk', 'Steampunk', 'Funny', 'Cute', 'Relaxing', 'Difficult', 'Great Soundtrack', 'Female Protagonist', 'Character Customization', 'Choices Matter',
+    'Multiple Endings', 'Procedural Generation', 'Inventory Management', 'Local Co-Op', 'PvP', 'PvE', 'MMORPG', 'Early Access', 'Free to Play', 'VR',
+]
+CATEGORIES = [
+    'Single-player', 'Multi-player', 'Co-op', 'Online Co-op', 'PvP', 'Online PvP', 'Steam Achievements', 'Steam Cloud',
+    'Full controller support', 'Partial Controller Support', 'Steam Trading Cards', 'Steam Workshop', 'Steam Leaderboards',
+    'Remote Play Together', 'In-App Purchases', 'Family Sharing',
+]
+GENRES = [
+    'Action', 'Adventure', 'Indie', 'RPG', 'Strategy', 'Simulation', 'Casual', 'Racing', 'Sports', 'Massively Multiplayer',
+    'Free to Play', 'Early Access',
+]
+LANGUAGES = ['English', 'Russian', 'German', 'French', 'Spanish - Spain', 'Japanese', 'Simplified Chinese', 'Portuguese - Brazil', 'Italian', 'Polish']
+OWNER_RANGES = [
+    (0, 20000), (20000, 50000), (50000, 100000), (100000, 200000), (200000, 500000), (500000, 1000000),
+    (1000000, 2000000), (2000000, 5000000), (5000000, 10000000), (10000000, 20000000), (20000000, 50000000),
+]
+DESCRIPTION_WORDS = {
+    'en': [
+        'explore', 'build', 'fight', 'survive', 'craft', 'discover', 'command', 'defend', 'conquer', 'escape', 'collect', 'upgrade',
+        'ancient', 'mysterious', 'vast', 'dark', 'colorful', 'procedural', 'dangerous', 'peaceful', 'epic', 'tiny', 'forgotten', 'endless',
+        'kingdom', 'dungeon', 'galaxy', 'island', 'city', 'planet', 'forest', 'castle', 'station', 'village', 'empire', 'ocean',
+        'heroes', 'monsters', 'robots', 'pirates', 'knights', 'aliens', 'zombies', 'wizards', 'soldiers', 'friends', 'enemies', 'dragons',
+        'weapons', 'spells', 'skills', 'resources', 'secrets', 'quests', 'puzzles', 'levels', 'bosses', 'cards', 'ships', 'cars',
+        'story', 'adventure', 'strategy', 'battle', 'journey', 'mission', 'campaign', 'multiplayer', 'online', 'cooperative', 'tactical', 'unique',
+        'with', 'your', 'and', 'the', 'in', 'of', 'to', 'a', 'through', 'across', 'against', 'for',
+    ],
+    'ru': [
+        'исследуйте', 'стройте', 'сражайтесь', 'выживайте', 'создавайте', 'откройте', 'командуйте', 'защищайте', 'покорите', 'соберите',
+        'древний', 'загадочный', 'огромный', 'темный', 'яркий', 'опасный', 'мирный', 'эпический', 'забытый', 'бесконечный',
+        'королевство', 'подземелье', 'галактика', 'остров', 'город', 'планета', 'лес', 'замок', 'станция', 'деревня', 'империя', 'океан',
+        'герои', 'монстры', 'роботы', 'пираты', 'рыцари', 'пришельцы', 'зомби', 'волшебники', 'солдаты', 'друзья', 'враги', 'драконы',
+        'оружие', 'заклинания', 'навыки', 'ресурсы', 'секреты', 'задания', 'головоломки', 'уровни', 'история', 'приключение', 'стратегия', 'битва',
+        'и', 'в', 'с', 'на', 'для', 'против', 'через', 'ваш',
+    ],
+    'de': [
+        'erkunde', 'baue', 'kämpfe', 'überlebe', 'entdecke', 'verteidige', 'erobere', 'sammle', 'geheimnisvolle', 'große', 'dunkle', 'gefährliche',
+        'Königreich', 'Verlies', 'Galaxie', 'Insel', 'Stadt', 'Planet', 'Wald', 'Schloss', 'Helden', 'Monster', 'Rätsel', 'Abenteuer',
+        'mit', 'und', 'der', 'die', 'das', 'gegen', 'für', 'deine',
+    ],
+    'es': [
+        'explora', 'construye', 'lucha', 'sobrevive', 'descubre', 'defiende', 'conquista', 'reúne', 'misteriosa', 'enorme', 'oscura', 'peligrosa',
+        'reino', 'mazmorra', 'galaxia', 'isla', 'ciudad', 'planeta', 'bosque', 'castillo', 'héroes', 'monstruos', 'acertijos', 'aventura', 'compañía',
+        'con', 'y', 'el', 'la', 'los', 'contra', 'para', 'tu',
+    ],
+    'fr': [
+        'explorez', 'construisez', 'combattez', 'survivez', 'découvrez', 'défendez', 'conquérez', 'rassemblez', 'mystérieux', 'immense', 'sombre', 'dangereux',
+        'royaume', 'donjon', 'galaxie', 'île', 'ville', 'planète', 'forêt', 'château', 'héros', 'monstres', 'énigmes', 'aventure', 'épique',
+        'avec', 'et', 'le', 'la', 'les', 'contre', 'pour', 'votre',
+    ],
+}
+DESCRIPTION_LANGUAGE_WEIGHTS = {'en': 0.8, 'ru': 0.1, 'de': 0.04, 'es': 0.03, 'fr': 0.03}
+NAME_WORDS = [
+    'Galactic', 'Shadow', 'Pixel', 'Iron', 'Crystal', 'Eternal', 'Lost', 'Broken', 'Hidden', 'Silent', 'Crimson', 'Frozen', 'Wild', 'Last',
+    'Legends', 'Kingdoms', 'Tactics', 'Frontier', 'Odyssey', 'Chronicles', 'Rising', 'Empire', 'Dungeon', 'Station', 'Valley', 'Arena',
+    'Ruler', 'Hunter', 'Knight', 'Pilot', 'Farm', 'Tower', 'Quest', 'Racer', 'Survivor', 'Colony', 'Defense', 'Heroes', 'Realm', 'Storm',
+]
+NON_LATIN_NAMES = ['東方の冒険', '星のカービィ', '龙之谷', 'Тестовая игра', '모험의 섬']
+# Доли заведомо некорректных записей, которые отбрасывают фильтры DataCleaner
+INVALID_RECORD_RATES = {'playtest': 0.03, 'empty_description': 0.02, 'non_latin_name': 0.02, 'no_categories': 0.02, 'few_tags': 0.03}
+
+
+def _sentence(rng, words, n_words):
+    """Собирает предложение из случайных слов словаря."""
+    sentence = ' '.join(words[i] for i in rng.integers(0, len(words), n_words))
+    return sentence[0].upper() + sentence[1:] + '.'
+
+
+def _description(rng, lang, n_sentences, words_range=(6, 14)):
+    """Собирает описание из `n_sentences` предложений на языке `lang`."""
+    words = DESCRIPTION_WORDS[lang]
+    return ' '.join(_sentence(rng, words, int(rng.integers(*words_range))) for _ in range(n_sentences))
+
+
+def format_owner_range(low, high, thousands_separator=False):
+    """Форматирует диапазон владельцев как в датасете Steam: '20000 - 50000' или '20,000 - 50,000'."""
+    if thousands_separator:
+        return f"{low:,} - {high:,}"
+    return f"{low} - {high}"
+
+
+def generate_raw_games(n_games, seed=42, start_app_id=10):
+    """Генерирует воспроизводимый синтетический каталог игр в формате сырого датасета Steam.
+
+    Записи содержат словарь тегов с количеством голосов, списки категорий, жанров, языков, разработчиков
+    и издателей, даты выпуска, платформы, отзывы и диапазоны владельцев ('20000 - 50000' и '20,000 - 50,000').
+    Описания генерируются на английском, русском, немецком, испанском и французском языках, а часть записей
+    намеренно некорректна (playtest, пустые описания, нелатинские названия, без категорий, мало тегов),
+    чтобы фильтры DataCleaner выполняли реальную работу.
+
+    Аргументы:
+        n_games (int): Количество игр.
+        seed (int, optional): Seed генератора; одинаковый seed дает одинаковый каталог. По умолчанию 42.
+        start_app_id (int, optional): Первый app id. По умолчанию 10.
+
+    Возвращает:
+        pd.DataFrame: Каталог с индексом app id (строки, как ключи JSON датасета).
+    """
+    rng = np.random.default_rng(seed)
+    owner_levels = np.minimum(rng.geometric(0.45, n_games) - 1, len(OWNER_RANGES) - 1)
+    languages = list(DESCRIPTION_LANGUAGE_WEIGHTS)
+    description_languages = rng.choice(languages, n_games, p=list(DESCRIPTION_LANGUAGE_WEIGHTS.values()))
+    invalid = {kind: rng.random(n_games) < rate for kind, rate in INVALID_RECORD_RATES.items()}
+    release_days = rng.integers(0, 365 * 20, n_games)
+    tag_popularity = 1.0 / np.arange(1, len(TAGS) + 1)
+    tag_popularity /= tag_popularity.sum()
+
+    records = []
+    for i in range(n_games):
+        low, high = OWNER_RANGES[owner_levels[i]]
+        owners_mid = (low + high) // 2
+        n_reviews = int(rng.integers(1, 50)) + owners_mid // int(rng.integers(30, 120))
+        positive = int(n_reviews * rng.beta(6, 2))
+
+        if invalid['non_latin_name'][i]:
+            name = str(rng.choice(NON_LATIN_NAMES))
+        else:
+            name = ' '.join(rng.choice(NAME_WORDS, int(rng.integers(1, 4)), replace=False))
+            if rng.random() < 0.2:
+                name += f" {int(rng.integers(2, 5))}"
+            if rng.random() < 0.05:
+                name += '™'
+        if invalid['playtest'][i]:
+            name += ' Playtest'
+
+        n_tags = 2 if invalid['few_tags'][i] else int(rng.integers(5, 20))
+        tag_names = rng.choice(TAGS, n_tags, replace=False, p=tag_popularity)
+        tags = {str(tag): int(votes) for tag, votes in zip(tag_names, np.sort(rng.integers(1, 5000, n_tags))[::-1])}
+        categories = [] if invalid['no_categories'][i] or invalid['few_tags'][i] else rng.choice(CATEGORIES, int(rng.integers(1, 6)), replace=False).tolist()
+        genres = [] if invalid['few_tags'][i] else rng.choice(GENRES, int(rng.integers(1, 4)), replace=False).tolist()
+
+        lang = str(description_languages[i])
+        short_description = '' if invalid['empty_description'][i] else _description(rng, lang, int(rng.integers(2, 4)), (5, 9))
+        detailed_description = _description(rng, lang, int(rng.integers(4, 12)))
+        if rng.random() < 0.3:
+            detailed_description = '<p>' + detailed_description.replace('. ', '.<br /> ', 2) + '</p>'
+
+        records.append({
+            'app_id': str(start_app_id + i * 10),
+            'name': name,
+            'release_date': (pd.Timestamp('2005-01-01') + pd.Timedelta(days=int(release_days[i]))).strftime('%b %d, %Y'),
+            'required_age': 0,
+            'price': float(rng.choice([0.0, 4.99, 9.99, 14.99, 19.99, 29.99, 59.99])),
+            'dlc_count': int(rng.poisson(0.5)),
+            'detailed_description': detailed_description,
+            'about_the_game': detailed_description,
+            'short_description': short_description,
+            'reviews': '',
+            'header_image': f"https://cdn.akamai.steamstatic.com/steam/apps/{start_app_id + i * 10}/header.jpg",
+            'website': '',
+            'support_url': '',
+            'support_email': '',
+            'windows': True,
+            'mac': bool(rng.random() < 0.25),
+            'linux': bool(rng.random() < 0.2),
+            'metacritic_score': 0,
+            'metacritic_url': '',
+            'achievements': int(rng.integers(0, 100)),
+            'recommendations': 0,
+            'notes': '',
+            'supported_languages': ['English'] + rng.choice(LANGUAGES[1:], int(rng.integers(0, 6)), replace=False).tolist(),
+            'full_audio_languages': [],
+            'packages': [],
+            'developers': [f"{rng.choice(NAME_WORDS)} Studio"] if rng.random() > 0.02 else [],
+            'publishers': [f"{rng.choice(NAME_WORDS)} Games"] if rng.random() > 0.05 else [],
+            'categories': categories,
+            'genres': genres,
+            'screenshots': [],
+            'movies': [],
+            'user_score': 0,
+            'score_rank': '',
+            'positive': positive,
+            'negative': n_reviews - positive,
+            'estimated_owners': format_owner_range(low, high, thousands_separator=bool(rng.random() < 0.5)),
+            'average_playtime_forever': int(rng.integers(0, 3000)),
+            'average_playtime_2weeks': 0,
+            'median_playtime_forever': 0,
+            'median_playtime_2weeks': 0,
+            'peak_ccu': int(rng.integers(0, 1000)),
+            'tags': tags,
+        })
+    return pd.DataFrame.from_records(records, index='app_id')
+
+
+def generate_owned_games(n_games, app_ids, seed=42):
+    """Генерирует библиотеку пользователя в формате ответа GetOwnedGames для `group_user_games`.
+
+    Аргументы:
+        n_games (int): Количество игр в библиотеке.
+        app_ids (array-like): App id каталога, из которых выбираются игры.
+        seed (int, optional): Seed генератора. По умолчанию 42.
+
+    Возвращает:
+        list: Словари с ключами 'appid', 'playtime_forever' и, для недавно запущенных игр, 'playtime_2weeks'.
+    """
+    rng = np.random.default_rng(seed)
+    app_ids = np.asarray(app_ids)
+    chosen = rng.choice(app_ids, min(n_games, len(app_ids)), replace=False)
+    owned_games = []
+    for app_id in chosen:
+        game = {'appid': int(app_id), 'playtime_forever': int(rng.pareto(1.2) * 60)}
+        if rng.random() < 0.1:
+            game['playtime_2weeks'] = int(rng.integers(1, 1200))
+        owned_games.append(game)
+    return owned_games
+
+
+def main():
+    """Сохраняет синтетический каталог в JSON в формате сырого датасета Steam."""
+    parser = argparse.ArgumentParser(description="Генерация синтетического каталога игр Steam для бенчмарков.")
+    parser.add_argument('--games', type=int, default=1000, help='Количество игр.')
+    parser.add_argument('--seed', type=int, default=42, help='Seed генератора.')
+    parser.add_argument('--output', type=str, required=True, help='Путь к JSON файлу.')
+    args = parser.parse_args()
+
+    df = generate_raw_games(args.games, seed=args.seed)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(json.loads(df.to_json(orient='index', force_ascii=False)), f, ensure_ascii=False)
+    print(f"💾 Синтетический каталог ({len(df)} игр) сохранен в: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,366 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+
+CATALOG_FORMAT_VERSION = 1
+VECTORS_FILE = 'vectors.npy'
+STEAM_IDS_FILE = 'steam_ids.npy'
+META_FILE = 'meta.json'
+BLOCK_NORMS_FILE = 'block_norms.npy'
+
+
+def get_catalog_dir(model_path):
+    """Возвращает путь к директории артефактов каталога, расположенной рядом с файлом модели.
+
+    Для модели `models/latest_model_approved.pkl` это `models/latest_model_approved_catalog`.
+    """
+    return os.path.splitext(model_path)[0] + '_catalog'
+
+
+def model_fingerprint(model_path, chunk_size=1 << 20):
+    """Вычисляет SHA-256 отпечаток файла модели.
+
+    Отпечаток сохраняется в метаданных каталога и позволяет определить, что векторы
+    каталога были построены другой моделью и должны быть пересчитаны.
+
+    Аргументы:
+        model_path (str): Путь к файлу модели.
+        chunk_size (int, optional): Размер блока чтения в байтах. По умолчанию 1 МБ.
+
+    Возвращает:
+        str: Шестнадцатеричная строка SHA-256.
+    """
+    sha256 = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def catalog_file_fingerprint(catalog_path):
+    """Возвращает отпечаток файла каталога [размер в байтах, время изменения] или None, если файла нет.
+
+    Отпечаток сохраняется в метаданных каталога: обновленный датасет с теми же `steam_id`
+    (другие теги, владельцы или описания) меняет файл, и векторы пересчитываются.
+    """
+    if not catalog_path or not os.path.exists(catalog_path):
+        return None
+    stat = os.stat(catalog_path)
+    return [stat.st_size, int(stat.st_mtime)]
+
+
+def prepare_catalog_frame(df):
+    """Добавляет в DataFrame каталога столбец 'short_description_clean', ожидаемый моделью.
+
+    Использует ту же предобработку `clean_text`, что и векторизация входных игр, поэтому столбец
+    DataCleaner (лемматизированный текст) в обработанном JSON заменяется. Каталог Parquet, загруженный
+    без исходных описаний, уже содержит столбец в этом виде (`convert_json_to_parquet`) и не меняется.
+    """
+    from vectorizer import clean_text
+
+    if 'short_description' not in df.columns and 'short_description_clean' in df.columns:
+        return df
+    df['short_description_clean'] = df['short_description'].apply(clean_text)
+    return df
+
+
+def compute_block_norms(vectors, blocks, batch_size=20000):
+    """Вычисляет евклидовы нормы каждого блока признаков для всех строк матрицы.
+
+    Аргументы:
+        vectors (np.ndarray): Матрица векторов (количество игр x размерность), в т.ч. отображенная в память.
+        blocks (list): Блоки признаков [имя, начало, конец] (см. `CombinedVectorizer.feature_blocks`).
+        batch_size (int, optional): Количество строк, обрабатываемых за раз. По умолчанию 20000.
+
+    Возвращает:
+        np.ndarray: float32 матрица норм (количество игр x количество блоков).
+    """
+    norms = np.empty((vectors.shape[0], len(blocks)), dtype=np.float32)
+    for start in range(0, vectors.shape[0], batch_size):
+        batch = np.asarray(vectors[start:start + batch_size], dtype=np.float32)
+        for column, (_, block_start, block_end) in enumerate(blocks):
+            norms[start:start + batch.shape[0], column] = np.linalg.norm(batch[:, block_start:block_end], axis=1)
+    return norms
+
+
+class CatalogEmbeddings:
+    """
+    Предвычисленная матрица векторов каталога игр.
+
+    Хранит float32 матрицу векторов всех игр каталога, построенную `CombinedVectorizer`,
+    вместе с массивом `steam_id`, определяющим порядок строк, и метаданными версии.
+    Матрица сохраняется в формате `.npy` и загружается через `np.load(mmap_mode='r')`,
+    поэтому сервису не требуется заново трансформировать каталог при каждом запросе.
+
+    Если в метаданных указаны блоки признаков ('blocks': владельцы, теги, описание), каталог также
+    хранит нормы каждого блока для каждой игры. Это позволяет `weighted_similarities` считать
+    косинусное сходство с весами блоков, заданными в запросе, без пересчета векторов каталога.
+
+    Аргументы:
+        vectors (np.ndarray): Матрица векторов (количество игр x размерность).
+        steam_ids (np.ndarray): Массив `steam_id`, соответствующий строкам матрицы.
+        meta (dict, optional): Метаданные каталога (версия формата, отпечаток модели, блоки признаков и т.д.).
+        block_norms (np.ndarray, optional): Нормы блоков (количество игр x количество блоков).
+                                            По умолчанию вычисляются, если в метаданных указаны блоки.
+    """
+    def __init__(self, vectors, steam_ids, meta=None, block_norms=None):
+        if vectors.shape[0] != len(steam_ids):
+            raise ValueError(f"❌ Несовпадение количества векторов и steam_id: {vectors.shape[0]} vs {len(steam_ids)}")
+        self.vectors = vectors
+        self.steam_ids = np.asarray(steam_ids, dtype=np.int64)
+        self.meta = meta if meta else {}
+        self._id_index = pd.Index(self.steam_ids)
+        self.block_norms = None
+        if self.blocks:
+            if block_norms is None:
+                block_norms = compute_block_norms(vectors, self.blocks)
+            if block_norms.shape != (vectors.shape[0], len(self.blocks)):
+                raise ValueError(f"❌ Несовпадение формы норм блоков: {block_norms.shape} vs {(vectors.shape[0], len(self.blocks))}")
+            self.block_norms = block_norms
+
+    @property
+    def blocks(self):
+        """Блоки признаков [имя, начало, конец] из метаданных или None, если они неизвестны."""
+        return self.meta.get('blocks')
+
+    def set_blocks(self, blocks):
+        """Задает блоки признаков каталога и вычисляет их нормы (например, для каталога, построенного до появления блоков)."""
+        self.meta = dict(self.meta, blocks=[list(block) for block in blocks])
+        self.block_norms = compute_block_norms(self.vectors, self.blocks)
+
+    @classmethod
+    def build(cls, model, df, fingerprint=None, batch_size=20000, catalog_path=None):
+        """Строит матрицу векторов каталога, трансформируя DataFrame моделью по частям.
+
+        Аргументы:
+            model: Обученная модель (Pipeline с CombinedVectorizer).
+            df (pd.DataFrame): DataFrame каталога с индексом `steam_id`.
+            fingerprint (str, optional): Отпечаток файла модели для метаданных. По умолчанию None.
+            batch_size (int, optional): Количество игр, трансформируемых за один вызов. По умолчанию 20000.
+            catalog_path (str, optional): Файл каталога, отпечаток которого сохраняется в метаданных. По умолчанию None.
+
+        Возвращает:
+            CatalogEmbeddings: Построенный каталог.
+        """
+        from vectorizer import as_dense_vectors, get_feature_blocks
+
+        print(f"🔄 Построение векторов каталога для {len(df)} игр...")
+        start_time = time.time()
+        vectors = None
+        for start in range(0, len(df), batch_size):
+            batch_vectors = as_dense_vectors(model.transform(df.iloc[start:start + batch_size]))
+            if vectors is None:
+                vectors = np.empty((len(df), batch_vectors.shape[1]), dtype=np.float32)
+            vectors[start:start + batch_vectors.shape[0]] = batch_vectors
+        if vectors is None:
+            vectors = np.empty((0, 0), dtype=np.float32)
+
+        meta = {
+            'format_version': CATALOG_FORMAT_VERSION,
+            'model_fingerprint': fingerprint,
+            'n_items': int(vectors.shape[0]),
+            'dim': int(vectors.shape[1]),
+            'dtype': str(vectors.dtype),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'catalog_file': catalog_file_fingerprint(catalog_path),
+        }
+        blocks = get_feature_blocks(model)
+        if blocks and blocks[-1][2] == vectors.shape[1]:
+            meta['blocks'] = blocks
+        print(f"✅ Векторы каталога построены за {time.time() - start_time:.2f} секунд, форма: {vectors.shape}")
+        return cls(vectors, df.index.values, meta)
+
+    def save(self, directory):
+        """Сохраняет матрицу, `steam_id`, нормы блоков (если есть) и метаданные в директорию.
+
+        Файлы сначала пишутся во временные пути и затем атомарно заменяют существующие,
+        чтобы работающий сервис не прочитал частично записанный каталог.
+
+        Аргументы:
+            directory (str): Директория для сохранения артефактов каталога.
+        """
+        os.makedirs(directory, exist_ok=True)
+        arrays = [(VECTORS_FILE, self.vectors), (STEAM_IDS_FILE, self.steam_ids)]
+        if self.block_norms is not None:
+            arrays.append((BLOCK_NORMS_FILE, self.block_norms))
+        for file_name, array in arrays:
+            tmp_path = os.path.join(directory, file_name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(tmp_path, os.path.join(directory, file_name))
+        tmp_path = os.path.join(directory, META_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(directory, META_FILE))
+        print(f"💾 Векторы каталога сохранены в: {directory}")
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Загружает каталог из директории.
+
+        Аргументы:
+            directory (str): Директория с артефактами каталога.
+            mmap (bool, optional): Отображать матрицу в память вместо чтения целиком. По умолчанию True.
+
+        Возвращает:
+            CatalogEmbeddings: Загруженный каталог.
+
+        Вызывает:
+            FileNotFoundError: Если какой-либо из файлов каталога отсутствует.
+            ValueError: Если версия формата каталога не поддерживается.
+        """
+        with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != CATALOG_FORMAT_VERSION:
+            raise ValueError(f"❌ Неподдерживаемая версия формата каталога: {meta.get('format_version')}")
+        vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode='r' if mmap else None)
+        steam_ids = np.load(os.path.join(directory, STEAM_IDS_FILE))
+        block_norms = None
+        block_norms_path = os.path.join(directory, BLOCK_NORMS_FILE)
+        if meta.get('blocks') and os.path.exists(block_norms_path):
+            block_norms = np.load(block_norms_path)
+        return cls(vectors, steam_ids, meta, block_norms=block_norms)
+
+    def matches(self, fingerprint, steam_ids, catalog_path=None):
+        """Проверяет, что каталог построен указанной моделью для тех же игр в том же порядке и по тому же файлу датасета.
+
+        Аргументы:
+            fingerprint (str): Отпечаток текущего файла модели.
+            steam_ids (array-like): Ожидаемый порядок `steam_id` (индекс DataFrame каталога).
+            catalog_path (str, optional): Файл каталога; его размер и время изменения сравниваются с сохраненными.
+                                          По умолчанию None (файл не проверяется).
+
+        Возвращает:
+            bool: True, если каталог можно использовать без пересчета.
+        """
+        if self.meta.get('model_fingerprint') != fingerprint:
+            return False
+        if catalog_path and self.meta.get('catalog_file') != catalog_file_fingerprint(catalog_path):
+            return False
+        return np.array_equal(self.steam_ids, np.asarray(steam_ids, dtype=np.int64))
+
+    def positions_of(self, steam_ids):
+        """Возвращает позиции строк для списка `steam_id` (-1 для отсутствующих в каталоге)."""
+        ids = pd.to_numeric(pd.Series(list(steam_ids), dtype=object), errors='coerce')
+        positions = np.full(len(ids), -1, dtype=np.int64)
+        valid = ids.notna().to_numpy()
+        if valid.any():
+            positions[valid] = self._id_index.get_indexer(ids[valid].astype(np.int64))
+        return positions
+
+    def weighted_similarities(self, query_vector, block_weights):
+        """Вычисляет косинусное сходство запроса со всеми играми каталога с весами блоков признаков.
+
+        Сходство равно косинусу между векторами, в которых каждый блок умножен на свой вес:
+        числитель - сумма скалярных произведений блоков с весами w², знаменатель собирается из
+        предвычисленных норм блоков каталога и норм блоков запроса. Векторы каталога не пересчитываются
+        и не копируются, выполняется одно умножение матрицы на вектор (точный перебор, без индекса ivf).
+        При всех весах, равных 1, результат совпадает с обычным косинусным сходством.
+
+        Аргументы:
+            query_vector (np.ndarray): Вектор запроса (размерность каталога).
+            block_weights (dict): Веса блоков {имя блока: вес >= 0}. Не указанные блоки имеют вес 1.
+
+        Возвращает:
+            np.ndarray: float32 массив сходств для всех игр каталога (0 для игр с нулевым взвешенным вектором).
+
+        Вызывает:
+            ValueError: Если блоки признаков каталога неизвестны, имя блока неизвестно или вес отрицателен.
+        """
+        if not self.blocks or self.block_norms is None:
+            raise ValueError("❌ Блоки признаков каталога неизвестны. Перестройте векторы каталога.")
+        names = [name for name, _, _ in self.blocks]
+        unknown = set(block_weights) - set(names)
+        if unknown:
+            raise ValueError(f"❌ Неизвестные блоки признаков: {sorted(unknown)}. Доступны: {names}")
+        weights = np.array([float(block_weights.get(name, 1.0)) for name in names], dtype=np.float32)
+        if not np.all(np.isfinite(weights)) or (weights < 0).any():
+            raise ValueError(f"❌ Веса блоков должны быть неотрицательными числами: {dict(zip(names, weights.tolist()))}")
+
+        query = np.asarray(query_vector, dtype=np.float32).ravel()
+        squared_weights = weights ** 2
+        scaled_query = np.empty_like(query)
+        query_norm_sq = 0.0
+        for weight_sq, (_, start, end) in zip(squared_weights, self.blocks):
+            scaled_query[start:end] = weight_sq * query[start:end]
+            query_norm_sq += weight_sq * float(query[start:end] @ query[start:end])
+
+        dots = self.vectors @ scaled_query
+        norms = np.sqrt((self.block_norms ** 2) @ squared_weights) * np.float32(np.sqrt(query_norm_sq))
+        similarities = np.zeros(len(dots), dtype=np.float32)
+        np.divide(dots, norms, out=similarities, where=norms > 0)
+        return similarities
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+
+def load_or_build_catalog_embeddings(model, df, model_path, catalog_dir=None, catalog_path=None):
+    """Загружает векторы каталога рядом с моделью или строит их заново, если они устарели.
+
+    Аргументы:
+        model: Обученная модель (Pipeline с CombinedVectorizer).
+        df (pd.DataFrame): DataFrame каталога с индексом `steam_id`.
+        model_path (str): Путь к файлу модели.
+        catalog_dir (str, optional): Директория артефактов каталога. По умолчанию рядом с моделью.
+        catalog_path (str, optional): Файл, из которого загружен `df`. Векторы пересчитываются, если он изменился.
+                                      По умолчанию None (сравниваются только модель и `steam_id`).
+
+    Возвращает:
+        CatalogEmbeddings: Каталог, согласованный с моделью и DataFrame.
+    """
+    catalog_dir = catalog_dir if catalog_dir else get_catalog_dir(model_path)
+    fingerprint = model_fingerprint(model_path)
+    try:
+        catalog = CatalogEmbeddings.load(catalog_dir)
+        if catalog.matches(fingerprint, df.index.values, catalog_path):
+            print(f"✅ Векторы каталога загружены из: {catalog_dir}, форма: {catalog.vectors.shape}")
+            if catalog.block_norms is None:
+                from vectorizer import get_feature_blocks
+                blocks = get_feature_blocks(model)
+                if blocks and blocks[-1][2] == catalog.vectors.shape[1]:
+                    catalog.set_blocks(blocks)
+                    catalog.save(catalog_dir)
+            return catalog
+        print("⚠️ Векторы каталога устарели (другая модель или датасет). Выполняется пересчет...")
+    except (FileNotFoundError, ValueError) as e:
+        print(f"⚠️ Векторы каталога недоступны ({e}). Выполняется построение...")
+
+    # Поверхностная копия: столбец заменяется только для построения векторов, `df` вызывающего кода не меняется
+    catalog = CatalogEmbeddings.build(model, prepare_catalog_frame(df.copy(deep=False)), fingerprint=fingerprint, catalog_path=catalog_path)
+    catalog.save(catalog_dir)
+    return catalog
+
+
+def main():
+    """Строит и сохраняет векторы каталога для указанной модели и датасета."""
+    from steam_library_analyzer import MODEL_PATH, DF_PROCESSED_JSON_PATH, load_model, load_dataframe
+    from catalog_store import resolve_catalog_path
+
+    parser = argparse.ArgumentParser(description="Построение предвычисленных векторов каталога игр для модели.")
+    parser.add_argument('--model', type=str, default=MODEL_PATH, help='Путь к файлу модели (.pkl).')
+    parser.add_argument('--data', type=str, default=resolve_catalog_path(DF_PROCESSED_JSON_PATH), help='Путь к обработанному датасету (.parquet или .json).')
+    parser.add_argument('--output', type=str, default=None, help='Директория для сохранения векторов каталога.')
+    parser.add_argument('--index', type=str, nargs='*', default=['exact'], choices=['exact', 'ivf'], help='Типы индексов поиска, которые нужно построить вместе с каталогом.')
+    parser.add_argument('--n-lists', type=int, default=None, help='Количество кластеров для индекса ivf.')
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    df = load_dataframe(args.data)
+    prepare_catalog_frame(df)
+    catalog = CatalogEmbeddings.build(model, df, fingerprint=model_fingerprint(args.model), catalog_path=args.data)
+    catalog_dir = args.output if args.output else get_catalog_dir(args.model)
+    catalog.save(catalog_dir)
+
+    from vector_index import build_vector_index, get_index_dir
+    for kind in args.index:
+        params = {'n_lists': args.n_lists} if kind == 'ivf' else {}
+        build_vector_index(catalog, kind, **params).save(get_index_dir(catalog_dir, kind))
+
+
+if __name__ == '__main__':
+    main()
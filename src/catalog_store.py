@@ -0,0 +1,179 @@
+import os
+import time
+import argparse
+import pandas as pd
+
+from dataset_cleaner import FileHandler
+
+# Столбцы каталога, необходимые сервису: ранжирование, фильтры и векторизация новых данных
+SERVING_COLUMNS = ['name', 'estimated_owners', 'positive', 'negative', 'all_tags', 'short_description_clean']
+
+
+def get_parquet_path(json_path):
+    """Возвращает путь к колоночной копии датасета рядом с JSON файлом (`steam_games_data.parquet`)."""
+    return os.path.splitext(json_path)[0] + '.parquet'
+
+
+def resolve_catalog_path(json_path):
+    """Выбирает файл каталога для загрузки.
+
+    Предпочитает Parquet копию датасета, если она существует и не старше JSON файла,
+    иначе возвращает путь к JSON.
+    """
+    parquet_path = get_parquet_path(json_path)
+    if os.path.exists(parquet_path):
+        if not os.path.exists(json_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(json_path):
+            return parquet_path
+        print(f"⚠️ Parquet каталог старше JSON, используется JSON: {json_path}")
+    return json_path
+
+
+def normalize_steam_id_index(df):
+    """Приводит индекс DataFrame каталога к целочисленному `steam_id`."""
+    if 'steam_id' in df.index.names:
+        df['steam_id'] = df.index
+        df = df.reset_index(drop=True)
+        df = df.set_index('steam_id')
+    else:
+        if pd.api.types.is_numeric_dtype(df.index) or pd.to_numeric(df.index, errors='coerce').notna().all():
+            df['steam_id'] = df.index.astype(int)
+            df = df.reset_index(drop=True)
+            df = df.set_index('steam_id')
+    return df
+
+
+def load_catalog_frame(path, columns=None):
+    """Загружает DataFrame каталога из Parquet или JSON и обрабатывает индекс.
+
+    Аргументы:
+        path (str): Путь к файлу каталога (.parquet или .json).
+        columns (list, optional): Столбцы для загрузки. Из Parquet читаются только они (отсутствующие в файле пропускаются),
+                                  JSON всегда читается целиком. По умолчанию None (все столбцы).
+
+    Возвращает:
+        pd.DataFrame: DataFrame каталога с индексом `steam_id`.
+    """
+    if path.lower().endswith('.parquet'):
+        if columns is not None:
+            available = set(parquet_columns(path))
+            columns = [column for column in columns if column in available]
+        return normalize_steam_id_index(FileHandler().load_data(path, columns=columns))
+    return normalize_steam_id_index(pd.read_json(path))
+
+
+def parquet_columns(path):
+    """Возвращает имена столбцов Parquet файла, не читая данные."""
+    import pyarrow.parquet as pq
+
+    schema = pq.read_schema(path)
+    index_columns = set()
+    pandas_metadata = schema.pandas_metadata or {}
+    for index_column in pandas_metadata.get('index_columns', []):
+        if isinstance(index_column, str):
+            index_columns.add(index_column)
+    return [name for name in schema.names if name not in index_columns]
+
+
+class CatalogStore:
+    """
+    Каталог игр с загрузкой только нужных сервису столбцов.
+
+    Из Parquet файла при создании читаются только `columns` (по умолчанию `SERVING_COLUMNS`),
+    а тяжелые столбцы (например, 'detailed_description') подгружаются по требованию через `column`
+    и кэшируются. Для JSON файла колоночное чтение невозможно, поэтому он загружается целиком.
+
+    Аргументы:
+        path (str): Путь к файлу каталога (.parquet или .json).
+        columns (list, optional): Столбцы, загружаемые сразу. По умолчанию `SERVING_COLUMNS`.
+    """
+    def __init__(self, path, columns=SERVING_COLUMNS):
+        self.path = path
+        self.is_columnar = path.lower().endswith('.parquet')
+        start_time = time.time()
+        self.frame = load_catalog_frame(path, columns=list(columns) if self.is_columnar else None)
+        self._lazy_columns = {}
+        print(f"✅ Каталог загружен из {path} за {time.time() - start_time:.2f} секунд, форма: {self.frame.shape}")
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def available_columns(self):
+        """Все столбцы каталога, включая еще не загруженные."""
+        if self.is_columnar:
+            return parquet_columns(self.path)
+        return list(self.frame.columns)
+
+    def column(self, name):
+        """Возвращает столбец каталога, подгружая его из файла при первом обращении.
+
+        Аргументы:
+            name (str): Имя столбца.
+
+        Возвращает:
+            pd.Series: Столбец, выровненный по индексу `steam_id` каталога.
+
+        Вызывает:
+            KeyError: Если столбца нет в каталоге.
+        """
+        if name in self.frame.columns:
+            return self.frame[name]
+        if name not in self._lazy_columns:
+            if not self.is_columnar or name not in self.available_columns:
+                raise KeyError(f"❌ Столбец отсутствует в каталоге: {name}")
+            loaded = load_catalog_frame(self.path, columns=[name])
+            self._lazy_columns[name] = loaded[name].reindex(self.frame.index)
+        return self._lazy_columns[name]
+
+    def record(self, steam_id, columns=None):
+        """Возвращает данные игры каталога в виде словаря.
+
+        Аргументы:
+            steam_id (int): `steam_id` игры.
+            columns (list, optional): Дополнительные (в т.ч. тяжелые) столбцы для включения. По умолчанию None.
+
+        Возвращает:
+            dict: Значения загруженных столбцов и запрошенных дополнительных столбцов.
+        """
+        record = self.frame.loc[steam_id].to_dict()
+        for name in columns if columns else []:
+            record[name] = self.column(name).loc[steam_id]
+        return record
+
+
+def convert_json_to_parquet(json_path, parquet_path=None):
+    """Конвертирует JSON датасет в Parquet для быстрой загрузки сервисом.
+
+    Добавляет столбец 'short_description_clean' в том виде, в котором его ожидает модель,
+    чтобы сервису не требовалось читать исходные описания при старте.
+
+    Аргументы:
+        json_path (str): Путь к обработанному JSON датасету.
+        parquet_path (str, optional): Путь для сохранения. По умолчанию рядом с JSON.
+
+    Возвращает:
+        str: Путь к сохраненному Parquet файлу.
+    """
+    from catalog_embeddings import prepare_catalog_frame
+
+    parquet_path = parquet_path if parquet_path else get_parquet_path(json_path)
+    df = prepare_catalog_frame(load_catalog_frame(json_path))
+    tmp_path = parquet_path + '.tmp.parquet'
+    FileHandler().save_data(df, tmp_path)
+    os.replace(tmp_path, parquet_path)
+    return parquet_path
+
+
+def main():
+    """Конвертирует обработанный JSON датасет в Parquet."""
+    from steam_library_analyzer import DF_PROCESSED_JSON_PATH
+
+    parser = argparse.ArgumentParser(description="Конвертация обработанного датасета игр из JSON в Parquet.")
+    parser.add_argument('--input', type=str, default=DF_PROCESSED_JSON_PATH, help='Путь к обработанному JSON датасету.')
+    parser.add_argument('--output', type=str, default=None, help='Путь для сохранения Parquet файла.')
+    args = parser.parse_args()
+    convert_json_to_parquet(args.input, args.output)
+
+
+if __name__ == '__main__':
+    main()
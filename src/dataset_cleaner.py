@@ -1,22 +1,359 @@
 import os
+import sys
+import time
+import sqlite3
+import threading
+import numpy as np
 import pandas as pd
+from collections import deque
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
 import json
 import re
 import nltk
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 import pymorphy2
-from langdetect import detect, LangDetectException
+from langdetect import DetectorFactory, detect, LangDetectException
 from cachetools import cached, LRUCache
 
+from instrumentation import get_logger, record_span, configure_logging
+from metrics import CLEANER_REJECTIONS
+
+# Пиковая память процесса для отчета о шагах очистки доступна только в POSIX системах
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Parquet - необязательный формат: нужен pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
 _data_cleaner_cache = LRUCache(maxsize=1)
 
+logger = get_logger('dataset_cleaner')
+
+# Без фиксированного seed langdetect может определять язык одного и того же текста по-разному
+DetectorFactory.seed = 0
+
+# Таблица {слово: лемма}, переиспользуемая между запусками очистки. Пустая строка отключает сохранение на диск
+LEMMA_CACHE_PATH = os.getenv(
+    "LEMMA_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache', 'lemma_cache.sqlite')
+)
+
+# Языки описаний, которые остаются в наборе данных; для 'ru' используется pymorphy2, для 'en' - WordNet
+SUPPORTED_LANGUAGES = ('en', 'ru')
+
+# Формат дат выпуска датасета Kaggle ('Oct 21, 2008'). Без явного формата pandas выводит его по первой строке,
+# и результат очистки зависит от разбиения на пакеты (clean_data_parallel, clean_data_streaming)
+RELEASE_DATE_FORMAT = '%b %d, %Y'
+
+# langdetect строит n-граммы по всему тексту, а для определения языка хватает его начала
+LANGUAGE_DETECTION_MAX_CHARS = 2000
+
+_NON_ASCII_LETTER_PATTERN = re.compile(r'[^\W\d_a-zA-Z]')
+_ASCII_LETTER_PATTERN = re.compile(r'[a-zA-Z]')
+_PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+_DIGITS_PATTERN = re.compile(r'\d+')
+# Класс символов вне [a-zA-Z0-9\s]. Пробельные символы (все, для которых str.isspace()) перечислены явно,
+# чтобы шаблон одинаково работал в `re` и в RE2 строк pyarrow, где \s означает только ASCII пробелы
+_WHITESPACE_CHARS = '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000'
+_NOT_LATIN_ALNUM_SPACE_CLASS = '[^a-zA-Z0-9' + _WHITESPACE_CHARS + ']'
+_NOT_LATIN_ALNUM_SPACE_PATTERN = re.compile(_NOT_LATIN_ALNUM_SPACE_CLASS)
+
+# Шаги DataCleaner, у которых есть векторизованная реализация (`vectorized=True`)
+VECTORIZED_STEPS = [
+    '_filter_name_chars',
+    '_convert_bool_columns',
+    '_extract_owners',
+    '_combine_tags',
+    '_replace_empty_values',
+    '_clean_and_lowercase_tags',
+]
+
+
+def _peak_memory_mb():
+    """Возвращает пиковый объем памяти процесса (RSS) в МБ или None, если он недоступен (Windows)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss в Linux измеряется в КБ, в macOS - в байтах
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _type_mask(values, value_type):
+    """Возвращает булев массив: является ли значение экземпляром `value_type`."""
+    return np.fromiter((isinstance(value, value_type) for value in values), dtype=bool, count=len(values))
+
+
+def _map_unique(values, func):
+    """
+    Применяет `func` к каждому уникальному значению один раз и раскладывает результаты по исходным позициям.
+
+    В столбцах Steam (диапазоны владельцев, теги, флаги платформ) уникальных значений на порядки меньше, чем строк,
+    поэтому построчная функция вызывается сотни раз вместо сотен тысяч. Пропуски (None/NaN) передаются в `func` как None.
+
+    Аргументы:
+        values (array-like): Хешируемые значения.
+        func (callable): Функция от одного значения.
+
+    Возвращает:
+        numpy.ndarray: Массив (dtype=object) результатов той же длины, что и `values`.
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=True)
+    mapped = np.empty(len(uniques) + 1, dtype=object)
+    mapped[:-1] = [func(value) for value in uniques]
+    if (codes == -1).any():
+        mapped[-1] = func(None)
+    return mapped[codes]
+
+
+def extract_first_number(owner_range):
+    """Возвращает нижнюю границу диапазона владельцев ('20,000 - 50,000' -> 20000) или None."""
+    if isinstance(owner_range, str):
+        parts = owner_range.split(' ', 1)
+        first_part = parts[0].replace(',', '')
+        try:
+           return int(first_part)
+        except ValueError:
+            return None
+    return None
+
+
+def _clean_tag(tag):
+    """Удаляет из тега символы, кроме латиницы, цифр и пробелов, и приводит его к нижнему регистру."""
+    return _NOT_LATIN_ALNUM_SPACE_PATTERN.sub('', tag).lower().strip()
+
+# Описания шагов очистки, отбрасывающих строки (для отчета clean_data_with_report)
+REJECTION_REASONS = {
+    '_filter_rows': 'нет описания, изображения, языков или категорий, либо это playtest',
+    '_filter_name_chars': 'название содержит символы, кроме латиницы, цифр и пробелов',
+    '_filter_by_language': 'описание не на английском или русском языке',
+    '_filter_description_length': 'длина очищенного описания вне допустимого диапазона',
+    '_filter_tags_count': 'слишком мало тегов',
+}
+
+# План очистки для DataCleaner._run_steps: (шаг, читаемые столбцы, изменяемые столбцы).
+# Шаги упорядочены по стоимости: дешевые фильтры по исходным столбцам, затем фильтр тегов (число тегов
+# при их очистке не меняется), затем определение языка и лемматизация только для оставшихся строк,
+# и в конце дешевые преобразования итоговых строк. Все фильтры построчные, поэтому порядок не влияет
+# на итоговый набор строк, а только на шаг, которому приписывается отброшенная строка.
+# None вместо столбцов - шаг меняет только набор столбцов (выполняется над пустым DataFrame).
+# _combine_tags выполняется до удаления столбцов: `columns_to_drop` может содержать исходные столбцы тегов.
+CLEANING_PLAN = [
+    ('_filter_rows', ['short_description', 'detailed_description', 'name', 'header_image', 'supported_languages', 'categories'], []),
+    ('_filter_name_chars', ['name'], ['name']),
+    ('_combine_tags', ['categories', 'genres', 'tags'], ['all_tags']),
+    ('_drop_unnecessary_columns', None, None),
+    ('_filter_tags_count', ['all_tags'], []),
+    ('_filter_by_language', ['short_description', 'detailed_description'], ['description_language']),
+    ('_clean_and_lemmatize_descriptions', ['detailed_description', 'short_description', 'description_language'],
+     ['detailed_description_clean', 'short_description_clean', 'description_language']),
+    ('_remove_specific_words_from_descriptions', ['short_description_clean', 'detailed_description_clean'],
+     ['short_description_clean', 'detailed_description_clean']),
+    ('_filter_description_length', ['short_description_clean'], []),
+    ('_convert_release_date', ['release_date'], ['release_date']),
+    ('_convert_bool_columns', ['windows', 'mac', 'linux'], ['windows', 'mac', 'linux']),
+    ('_extract_owners', ['estimated_owners'], ['estimated_owners']),
+    ('_replace_empty_values', ['developers', 'publishers'], ['developers', 'publishers']),
+    ('_clean_and_lowercase_tags', ['all_tags'], ['all_tags']),
+]
+
+# Ключ метаданных Parquet со списком столбцов, сохраненных как JSON-строки
+PARQUET_JSON_COLUMNS_KEY = b'steam_recommender.json_columns'
+
+
+def iter_json_object_items(path, buffer_size=1 << 20):
+    """
+    Потоково читает JSON файл верхнего уровня вида {ключ: значение} и возвращает пары по одной.
+
+    Файл читается блоками по `buffer_size` символов, а каждое значение разбирается
+    `json.JSONDecoder.raw_decode` сразу после того, как оно целиком попало в буфер.
+    В памяти одновременно находятся только текущий блок и одна запись, поэтому
+    потребление памяти не зависит от размера файла.
+
+    Аргументы:
+        path (str): Путь к JSON файлу.
+        buffer_size (int, optional): Размер блока чтения в символах. По умолчанию 1M.
+
+    Возвращает:
+        generator: Генератор пар (ключ, значение) в порядке следования в файле.
+
+    Вызывает:
+        ValueError: Если верхний уровень файла не является JSON объектом или файл поврежден.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer, pos, eof = '', 0, False
+
+        def read_more():
+            nonlocal buffer, pos, eof
+            chunk = f.read(buffer_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+        def next_char():
+            # Возвращает следующий непробельный символ, не сдвигая позицию (None в конце файла)
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if eof:
+                    return None
+                read_more()
+
+        def decode_value():
+            # Значение, заканчивающееся ровно на конце буфера (например, число), может быть обрезано: дочитываем
+            nonlocal pos
+            next_char()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    if end < len(buffer) or eof:
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise ValueError(f"❌ Некорректный JSON в файле {path}")
+                read_more()
+
+        def expect(char):
+            nonlocal pos
+            if next_char() != char:
+                raise ValueError(f"❌ Некорректный JSON в файле {path}: ожидался символ '{char}'")
+            pos += 1
+
+        expect('{')
+        if next_char() == '}':
+            return
+        while True:
+            key = decode_value()
+            if not isinstance(key, str):
+                raise ValueError(f"❌ Некорректный JSON в файле {path}: ключ должен быть строкой")
+            expect(':')
+            yield key, decode_value()
+            char = next_char()
+            pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"❌ Некорректный JSON в файле {path}: ожидался символ ',' или '}}'")
+
+def detect_description_language(*texts):
+    """
+    Определяет язык описаний игры одним вызовом на строку набора данных.
+
+    Описания объединяются и проверяются вместе. Если в них нет букв, кроме латиницы,
+    язык считается английским без вызова `langdetect`; иначе `langdetect` (с фиксированным seed)
+    определяет язык по первым `LANGUAGE_DETECTION_MAX_CHARS` символам объединенного текста.
+
+    Аргументы:
+        *texts (str): Описания игры (например, короткое и подробное).
+
+    Возвращает:
+        str: Код языка ('en', 'ru', ...) или None, если описание отсутствует или язык не определен.
+    """
+    if not texts or not all(isinstance(text, str) for text in texts):
+        return None
+    text = ' '.join(texts)
+    if not _NON_ASCII_LETTER_PATTERN.search(text):
+        return 'en' if _ASCII_LETTER_PATTERN.search(text) else None
+    try:
+        return detect(text[:LANGUAGE_DETECTION_MAX_CHARS])
+    except LangDetectException:
+        return None
+
+
+class LemmaCache:
+    """
+    Ограниченный кэш лемм слов с сохранением таблицы {слово: лемма} в SQLite.
+
+    Лемма слова зависит только от слова и языка, поэтому каждое слово лемматизируется один раз
+    для всех описаний и столбцов. В памяти хранится не более `maxsize` слов (LRU), при создании
+    кэш заполняется из SQLite, а новые леммы дописываются туда методом `flush`, так что следующие
+    запуски очистки (и процессы clean_data_parallel) переиспользуют словарь. Потокобезопасен.
+
+    Аргументы:
+        path (str, optional): Путь к файлу SQLite. None - только кэш в памяти. По умолчанию None.
+        maxsize (int, optional): Максимальное количество слов в памяти. По умолчанию 200000.
+    """
+    def __init__(self, path=None, maxsize=200000):
+        self.path = path
+        self.memory = LRUCache(maxsize=maxsize)
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.connection = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+                self.connection.execute("PRAGMA journal_mode=WAL")
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS lemmas (lang TEXT NOT NULL, word TEXT NOT NULL, lemma TEXT NOT NULL, PRIMARY KEY (lang, word))"
+                )
+                self.connection.commit()
+                for lang, word, lemma in self.connection.execute("SELECT lang, word, lemma FROM lemmas LIMIT ?", (maxsize,)):
+                    self.memory[(lang, word)] = lemma
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Не удалось открыть кэш лемм (%s). Используется кэш только в памяти.", e)
+                self.connection = None
+
+    def __len__(self):
+        return len(self.memory)
+
+    def lemmatize(self, word, lang, lemmatize_word):
+        """Возвращает лемму слова из кэша, вычисляя ее `lemmatize_word(word)` при промахе."""
+        key = (lang, word)
+        with self.lock:
+            lemma = self.memory.get(key)
+        if lemma is None:
+            lemma = lemmatize_word(word)
+            with self.lock:
+                self.memory[key] = lemma
+                if self.connection is not None:
+                    self.pending[key] = lemma
+        return lemma
+
+    def flush(self):
+        """Сохраняет новые леммы в SQLite. Возвращает количество сохраненных слов."""
+        with self.lock:
+            if self.connection is None or not self.pending:
+                return 0
+            rows = [(lang, word, lemma) for (lang, word), lemma in self.pending.items()]
+            self.pending = {}
+            try:
+                self.connection.executemany("INSERT OR REPLACE INTO lemmas (lang, word, lemma) VALUES (?, ?, ?)", rows)
+                self.connection.commit()
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Не удалось сохранить кэш лемм: %s", e)
+                return 0
+        return len(rows)
+
+    def close(self):
+        """Сохраняет новые леммы и закрывает соединение с SQLite."""
+        self.flush()
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
 class FileHandler:
     """
-    Класс для обработки операций загрузки и сохранения данных из файлов JSON и CSV.
+    Класс для обработки операций загрузки и сохранения данных из файлов JSON, CSV и Parquet.
 
     Предоставляет методы для чтения данных из файлов различных форматов, таких как JSON и CSV,
     в pandas DataFrame, а также для сохранения DataFrame обратно в файлы JSON или CSV.
+    Колоночный формат Parquet (требует pyarrow) позволяет читать только нужные столбцы.
     """
     def __init__(self):
         """
@@ -26,15 +363,18 @@ class FileHandler:
         """
         print("✅ FileHandler инициализирован.")
 
-    def load_data(self, path):
+    def load_data(self, path, columns=None):
         """
-        Загружает данные из файла JSON или CSV в pandas DataFrame.
+        Загружает данные из файла JSON, CSV или Parquet в pandas DataFrame.
 
         Определяет тип файла по расширению и использует соответствующий метод pandas для загрузки данных.
-        Поддерживает файлы с расширениями .json, .csv и .txt.
+        Поддерживает файлы с расширениями .json, .csv, .txt и .parquet.
 
         Аргументы:
             path (str): Путь к файлу, из которого необходимо загрузить данные.
+            columns (list, optional): Столбцы, которые необходимо загрузить. Для Parquet читаются только они,
+                                      для остальных форматов файл читается целиком и затем отбираются столбцы.
+                                      По умолчанию None (все столбцы).
 
         Возвращает:
             pandas.DataFrame: DataFrame, содержащий загруженные данные.
@@ -51,14 +391,20 @@ class FileHandler:
             print(f"❌ Файл не найден: {path}")
             raise FileNotFoundError(f"Файл не найден: {path}")
         try:
-            if path.lower().endswith(".json"):
+            if path.lower().endswith(".parquet"):
+                df = self._read_parquet(path, columns)
+                print(f"✅ Данные успешно загружены из Parquet, форма: {df.shape}")
+                return df
+            elif path.lower().endswith(".json"):
                 with open(path, 'r', encoding='utf-8') as f:
                    data = json.load(f)
                 df = pd.DataFrame(data).T
+                if columns is not None:
+                    df = df[columns]
                 print(f"✅ Данные успешно загружены из JSON, форма: {df.shape}")
                 return df
             elif path.lower().endswith((".csv", ".txt")):
-                df = pd.read_csv(path)
+                df = pd.read_csv(path, usecols=columns)
                 print(f"✅ Данные успешно загружены из CSV, форма: {df.shape}")
                 return df
             else:
@@ -70,10 +416,10 @@ class FileHandler:
 
     def save_data(self, df, path):
         """
-        Сохраняет pandas DataFrame в файл JSON или CSV.
+        Сохраняет pandas DataFrame в файл JSON, CSV или Parquet.
 
         Определяет формат файла по расширению и использует соответствующий метод pandas для сохранения DataFrame.
-        Поддерживает файлы с расширениями .json, .csv и .txt.
+        Поддерживает файлы с расширениями .json, .csv, .txt и .parquet.
 
         Аргументы:
             df (pandas.DataFrame): DataFrame, который необходимо сохранить.
@@ -87,7 +433,10 @@ class FileHandler:
         """
         print(f"💾 Сохранение данных в файл: {path}")
         try:
-            if path.lower().endswith(".json"):
+            if path.lower().endswith(".parquet"):
+                self._write_parquet(df, path)
+                print(f"✅ Данные успешно сохранены в Parquet, форма: {df.shape}")
+            elif path.lower().endswith(".json"):
                 df.to_json(path)
                 print(f"✅ Данные успешно сохранены в JSON, форма: {df.shape}")
             elif path.lower().endswith((".csv", ".txt")):
@@ -100,6 +449,98 @@ class FileHandler:
             print(f"❌ Ошибка сохранения данных в {path}: {e}")
             raise
 
+    def iter_batches(self, path, batch_size=5000):
+        """
+        Загружает данные из файла частями фиксированного размера.
+
+        JSON вида {app_id: запись} (формат набора данных Kaggle) читается потоково через `iter_json_object_items`,
+        CSV - через `pd.read_csv(chunksize=...)`, Parquet - по группам строк через pyarrow.
+        Каждая часть JSON строится так же, как в load_data (`pd.DataFrame(data).T`).
+
+        Аргументы:
+            path (str): Путь к файлу.
+            batch_size (int, optional): Количество записей в одной части. По умолчанию 5000.
+
+        Возвращает:
+            generator: Генератор pandas.DataFrame.
+
+        Вызывает:
+            FileNotFoundError: Если файл по указанному пути не существует.
+            ValueError: Если расширение файла не поддерживается.
+        """
+        if not os.path.exists(path):
+            print(f"❌ Файл не найден: {path}")
+            raise FileNotFoundError(f"Файл не найден: {path}")
+        print(f"🔄 Потоковая загрузка данных из файла: {path}")
+        if path.lower().endswith(".json"):
+            batch = {}
+            for key, record in iter_json_object_items(path):
+                batch[key] = record
+                if len(batch) >= batch_size:
+                    yield pd.DataFrame(batch).T
+                    batch = {}
+            if batch:
+                yield pd.DataFrame(batch).T
+        elif path.lower().endswith((".csv", ".txt")):
+            for df in pd.read_csv(path, chunksize=batch_size):
+                yield df
+        elif path.lower().endswith(".parquet"):
+            self._require_pyarrow()
+            for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+                yield record_batch.to_pandas()
+        else:
+            print(f"❌ Неподдерживаемый формат файла: {path}")
+            raise ValueError(f"Неподдерживаемый формат файла: {path}")
+
+    @staticmethod
+    def _require_pyarrow():
+        """Проверяет, что установлен pyarrow, необходимый для работы с Parquet."""
+        if pa is None:
+            raise ImportError("Для работы с Parquet необходимо установить pyarrow: pip install pyarrow")
+
+    @staticmethod
+    def _needs_json_encoding(series):
+        """Определяет, нужно ли сохранять столбец object как JSON-строки.
+
+        Parquet требует единый тип столбца, поэтому словари (разные наборы ключей в строках)
+        и столбцы со значениями разных типов (например, числа и 'placeholder') кодируются в JSON.
+        Столбцы строк и списков сохраняются нативно.
+        """
+        if series.dtype != object:
+            return False
+        value_types = set(type(value) for value in series.dropna())
+        if any(issubclass(value_type, dict) for value_type in value_types):
+            return True
+        return len(value_types) > 1
+
+    def _write_parquet(self, df, path):
+        """Сохраняет DataFrame в Parquet, записывая имена JSON-столбцов в метаданные файла."""
+        self._require_pyarrow()
+        df = df.copy()
+        json_columns = [column for column in df.columns if self._needs_json_encoding(df[column])]
+        for column in json_columns:
+            df[column] = df[column].map(lambda value: None if value is None else json.dumps(value, ensure_ascii=False, default=str))
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        metadata = dict(table.schema.metadata or {})
+        metadata[PARQUET_JSON_COLUMNS_KEY] = json.dumps(json_columns).encode('utf-8')
+        pq.write_table(table.replace_schema_metadata(metadata), path, compression='zstd')
+
+    def _read_parquet(self, path, columns=None):
+        """Читает Parquet (только указанные столбцы и индекс), восстанавливает списки и декодирует JSON-столбцы."""
+        self._require_pyarrow()
+        table = pq.read_table(path, columns=columns, use_pandas_metadata=True)
+        metadata = pq.read_schema(path).metadata or {}
+        json_columns = json.loads(metadata.get(PARQUET_JSON_COLUMNS_KEY, b'[]').decode('utf-8'))
+        list_columns = [field.name for field in table.schema if pa.types.is_list(field.type) or pa.types.is_large_list(field.type)]
+        df = table.to_pandas()
+        for column in list_columns:
+            if column in df.columns:
+                df[column] = df[column].map(lambda value: None if value is None else list(value))
+        for column in json_columns:
+            if column in df.columns:
+                df[column] = df[column].map(lambda value: None if value is None else json.loads(value))
+        return df
+
 # @cached(cache=_data_cleaner_cache)
 class DataCleaner:
     """
@@ -109,7 +550,8 @@ class DataCleaner:
     фильтрацию строк по различным критериям, преобразование типов данных,
     объединение и очистку текстовых данных, таких как описания и теги.
     """
-    def __init__(self, columns_to_drop=None, min_description_length=30, max_description_length=240, min_tags=3, words_to_remove = ['game', 'world']):
+    def __init__(self, columns_to_drop=None, min_description_length=30, max_description_length=240, min_tags=3, words_to_remove = ['game', 'world'],
+                 lemma_cache_path=LEMMA_CACHE_PATH, lemma_cache_size=200000, vectorized=True):
         """
          Инициализация DataCleaner.
 
@@ -128,6 +570,11 @@ class DataCleaner:
                                       Игры с меньшим количеством тегов будут отфильтрованы. По умолчанию 3.
             words_to_remove (list, optional): Список слов, которые будут удалены из описаний игр.
                                              Используется для удаления общих и неинформативных слов. По умолчанию ['game', 'world'].
+            lemma_cache_path (str, optional): Путь к SQLite таблице лемм, переиспользуемой между запусками.
+                                              None или пустая строка - кэш только в памяти. По умолчанию `LEMMA_CACHE_PATH`.
+            lemma_cache_size (int, optional): Максимальное количество слов в кэше лемм в памяти. По умолчанию 200000.
+            vectorized (bool, optional): Использовать векторизованные реализации шагов из `VECTORIZED_STEPS`
+                                         (операции pandas `.str` и numpy вместо построчных функций). По умолчанию True.
 
         Выводит сообщение в консоль об успешной инициализации DataCleaner.
         Загружает необходимые ресурсы NLTK (stopwords, wordnet) при первом запуске.
@@ -148,6 +595,19 @@ class DataCleaner:
         self.max_description_length = max_description_length
         self.min_tags = min_tags
         self.words_to_remove = words_to_remove
+        self.vectorized = vectorized
+        self.last_step_report = []
+        # Параметры нужны для создания таких же DataCleaner в процессах clean_data_parallel
+        self._init_params = {
+            'columns_to_drop': columns_to_drop,
+            'min_description_length': min_description_length,
+            'max_description_length': max_description_length,
+            'min_tags': min_tags,
+            'words_to_remove': words_to_remove,
+            'lemma_cache_path': lemma_cache_path,
+            'lemma_cache_size': lemma_cache_size,
+            'vectorized': vectorized,
+        }
         print("✅ DataCleaner инициализирован.")
 
         try:
@@ -167,6 +627,8 @@ class DataCleaner:
         self.morph = pymorphy2.MorphAnalyzer()
         self.stop_words_ru = set(stopwords.words('russian'))
 
+        self.lemma_cache = LemmaCache(lemma_cache_path or None, maxsize=lemma_cache_size)
+
 
     def _drop_unnecessary_columns(self, df):
         """Удаляет заданные столбцы из DataFrame.
@@ -222,7 +684,8 @@ class DataCleaner:
         Возвращает:
             pandas.DataFrame: Отфильтрованный DataFrame.
         """
-
+        if self.vectorized:
+            return self._filter_name_chars_vectorized(df)
 
         def clean_name(text):
              if isinstance(text, str):
@@ -240,6 +703,29 @@ class DataCleaner:
         df_filtered = df[~mask_to_remove].copy()
         return df_filtered
 
+    def _filter_name_chars_vectorized(self, df):
+        """
+        Векторизованная версия `_filter_name_chars`.
+
+        Лишние символы удаляются одним регулярным выражением для всего столбца (с pyarrow - RE2 строк Arrow),
+        после чего допустимо любое непустое имя, поэтому вторая проверка `fullmatch` не нужна.
+        Нестроковые значения, как и в построчной версии, остаются в столбце до фильтрации.
+        """
+        values = df['name'].to_numpy(dtype=object)
+        is_str = _type_mask(values, str)
+        is_valid = np.zeros(len(values), dtype=bool)
+        cleaned_values = values.copy()
+        if is_str.any():
+            names = pd.Series(values[is_str], dtype=object)
+            if pa is not None:
+                cleaned = names.astype('string[pyarrow]').str.replace(_NOT_LATIN_ALNUM_SPACE_CLASS, '', regex=True)
+            else:
+                cleaned = names.str.replace(_NOT_LATIN_ALNUM_SPACE_PATTERN, '', regex=True)
+            cleaned_values[is_str] = cleaned.to_numpy(dtype=object)
+            is_valid[is_str] = cleaned.str.len().to_numpy(dtype=np.int64) > 0
+        # Тип столбца выводится конструктором Series по всему столбцу так же, как в построчной версии (apply)
+        df['name'] = pd.Series(cleaned_values, index=df.index)
+        return df[is_valid].copy()
 
     def _convert_release_date(self, df):
         """
@@ -247,6 +733,8 @@ class DataCleaner:
 
         Использует pandas `to_datetime` для преобразования дат выпуска игр в стандартный формат datetime,
         обрабатывая ошибки преобразования и устанавливая некорректные даты в NaT (Not a Time).
+        Даты сначала разбираются в формате `RELEASE_DATE_FORMAT`, остальные (например, '21 Oct, 2008' из Steam API) -
+        поэлементно (`format='mixed'`), поэтому результат не зависит от первой строки пакета.
 
         Аргументы:
             df (pandas.DataFrame): DataFrame, содержащий столбец 'release_date'.
@@ -254,13 +742,17 @@ class DataCleaner:
         Возвращает:
             pandas.DataFrame: DataFrame с преобразованным столбцом 'release_date'.
         """
-        def _convert_release_date(self, df):
-            if 'release_date' in df.columns:
-                df['release_date'] = pd.to_datetime(df['release_date'], errors='coerce')
-            else:
-                print("⚠️ Столбец 'release_date' отсутствует в данных. Создан пустой столбец.")
-                df['release_date'] = pd.NaT
-            return df
+        if 'release_date' in df.columns:
+            # Единица времени зависит от разбираемых строк, поэтому приводится к наносекундам
+            release_dates = pd.to_datetime(df['release_date'], format=RELEASE_DATE_FORMAT, errors='coerce').astype('datetime64[ns]')
+            unparsed = release_dates.isna() & df['release_date'].notna()
+            if unparsed.any():
+                release_dates[unparsed] = pd.to_datetime(df.loc[unparsed, 'release_date'].astype(str), format='mixed', errors='coerce')
+            df['release_date'] = release_dates
+        else:
+            logger.debug("⚠️ Столбец 'release_date' отсутствует в данных. Создан пустой столбец.")
+            df['release_date'] = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+        return df
 
     def _convert_bool_columns(self, df):
          """
@@ -276,9 +768,12 @@ class DataCleaner:
             pandas.DataFrame: DataFrame с преобразованными булевыми столбцами.
         """
          if df is None or df.empty:  # Проверка на пустой DF
-             print("⚠️ DataFrame пуст. Пропуск преобразования булевых столбцов.")
+             logger.debug("⚠️ DataFrame пуст. Пропуск преобразования булевых столбцов.")
              return df
         
+         if self.vectorized:
+             return self._convert_bool_columns_vectorized(df)
+
          initial_shape = df.shape
          bool_mapping = {'true': True, 'false': False}
         
@@ -289,9 +784,28 @@ class DataCleaner:
                      df[col] = df[col].map(bool_mapping).fillna(False).astype(bool)
              return df
          except Exception as e:
-             print(f"⚠️ Ошибка в преобразовании столбца {col}: {e}")
+             logger.warning("⚠️ Ошибка в преобразовании столбца %s: %s", col, e)
              return df  # Возвращаем исходный DF вместо прерывания
 
+    def _convert_bool_columns_vectorized(self, df):
+        """
+        Векторизованная версия `_convert_bool_columns`.
+
+        Булевы столбцы остаются без изменений, а для остальных строковое представление
+        сравнивается с 'true' один раз на уникальное значение.
+        """
+        for col in ['windows', 'mac', 'linux']:
+            if col not in df.columns:
+                continue
+            values = df[col]
+            if pd.api.types.is_bool_dtype(values):
+                df[col] = values.astype(bool)
+            else:
+                # Уникальные значения ищутся по строковому представлению: pd.factorize не различает True и 1
+                is_true = _map_unique(values.astype(str).to_numpy(dtype=object), lambda value: isinstance(value, str) and value.lower() == 'true')
+                df[col] = is_true.astype(bool)
+        return df
+
     def _extract_owners(self, df):
          """
         Извлекает численное значение из столбца 'estimated_owners'.
@@ -305,19 +819,19 @@ class DataCleaner:
         Возвращает:
             pandas.DataFrame: DataFrame с преобразованным столбцом 'estimated_owners', содержащим целочисленные значения.
         """
-         def extract_first_number(owner_range):
-            if isinstance(owner_range, str):
-                parts = owner_range.split(' ', 1)
-                first_part = parts[0].replace(',', '')
-                try:
-                   return int(first_part)
-                except ValueError:
-                    return None
-            return None
+         if self.vectorized:
+             return self._extract_owners_vectorized(df)
 
          df['estimated_owners'] = df['estimated_owners'].apply(extract_first_number)
          return df
 
+    def _extract_owners_vectorized(self, df):
+        """Векторизованная версия `_extract_owners`: каждый уникальный диапазон владельцев разбирается один раз."""
+        owners = _map_unique(df['estimated_owners'].values, extract_first_number)
+        # Конструктор Series выводит тип так же, как apply: int64, float64 при пропусках или object, если чисел нет
+        df['estimated_owners'] = pd.Series(owners.tolist(), index=df.index)
+        return df
+
     def _combine_tags(self, df):
          """
         Объединяет теги из столбцов 'categories', 'genres' и 'tags' в один столбец 'all_tags'.
@@ -343,11 +857,29 @@ class DataCleaner:
             if 'tags' in row and isinstance(row['tags'], dict):
                 all_tags_list.extend(row['tags'].keys())
 
-            return list(set(all_tags_list))
+            return sorted(set(all_tags_list))
+
+         if self.vectorized:
+             return self._combine_tags_vectorized(df)
 
          df['all_tags'] = df.apply(combine_tags, axis=1)
          return df
 
+    def _combine_tags_vectorized(self, df):
+        """Версия `_combine_tags` без `df.apply(axis=1)`: столбцы обходятся параллельно, без создания Series на каждую строку."""
+        categories = df['categories'].values
+        genres = df['genres'].values
+        tags = df['tags'].values if 'tags' in df.columns else [None] * len(df)
+        df['all_tags'] = [
+            sorted(set(chain(
+                category_list if isinstance(category_list, list) else (),
+                genre_list if isinstance(genre_list, list) else (),
+                tag_dict.keys() if isinstance(tag_dict, dict) else ()
+            )))
+            for category_list, genre_list, tag_dict in zip(categories, genres, tags)
+        ]
+        return df
+
     def _replace_empty_values(self, df):
         """
         Заменяет пустые списки и строки в столбцах 'developers' и 'publishers' на None.
@@ -369,18 +901,37 @@ class DataCleaner:
 
             return series.apply(replace_item)
 
+        if self.vectorized:
+            return self._replace_empty_values_vectorized(df)
+
         if 'developers' in df.columns:
             df['developers'] = replace_empty_with_none(df['developers'])
         if 'publishers' in df.columns:
             df['publishers'] = replace_empty_with_none(df['publishers'])
         return df
 
+    def _replace_empty_values_vectorized(self, df):
+        """Векторизованная версия `_replace_empty_values`: маска пустых значений строится одним проходом и применяется через `mask`."""
+        for col in ['developers', 'publishers']:
+            if col not in df.columns:
+                continue
+            values = df[col]
+            is_empty = np.fromiter(
+                ((type(value) is list or type(value) is str) and (len(value) == 0 or value == ['']) for value in values.values),
+                dtype=bool, count=len(values)
+            )
+            if is_empty.any():
+                df[col] = values.astype(object).mask(is_empty, None)
+        return df
+
     def _filter_by_language(self, df):
         """
         Фильтрует DataFrame, оставляя только описания на английском или русском языках.
 
-        Использует `langdetect` для определения языка описаний игр и оставляет только те строки,
-        где и короткое, и подробное описания определены как английские ('en') или русские ('ru').
+        Определяет язык описаний игры один раз на строку (`detect_description_language`): описания
+        только из латиницы считаются английскими без вызова `langdetect`. Оставляет строки с языком
+        из `SUPPORTED_LANGUAGES` и сохраняет его в служебном столбце 'description_language',
+        по которому `_clean_and_lemmatize_descriptions` выбирает лемматизатор.
 
         Аргументы:
             df (pandas.DataFrame): DataFrame, содержащий столбцы 'detailed_description' и 'short_description'.
@@ -388,29 +939,30 @@ class DataCleaner:
         Возвращает:
             pandas.DataFrame: Отфильтрованный DataFrame, содержащий только описания на английском или русском языках.
         """
+        languages = pd.Series(
+            [detect_description_language(short, detailed) for short, detailed in zip(df['short_description'], df['detailed_description'])],
+            index=df.index, dtype=object
+        )
+        is_supported = languages.isin(SUPPORTED_LANGUAGES)
 
-        def is_english_or_russian(text):
-           if not isinstance(text, str):
-                return False
-           try:
-                lang = detect(text)
-                return lang == 'en' or lang == 'ru'
-           except LangDetectException:
-               return False
-
-        df['detailed_is_en_ru'] = df['detailed_description'].apply(is_english_or_russian)
-        df['short_is_en_ru'] = df['short_description'].apply(is_english_or_russian)
-
-        df_filtered = df[df['detailed_is_en_ru'] & df['short_is_en_ru']].copy()
-        df_filtered = df_filtered.drop(columns=['detailed_is_en_ru', 'short_is_en_ru'], errors='ignore')
+        df_filtered = df[is_supported].copy()
+        df_filtered['description_language'] = languages[is_supported]
         return df_filtered
 
+    def _lemmatize_word(self, word, lang):
+        """Возвращает лемму слова через кэш лемм: pymorphy2 для 'ru', WordNet для остальных языков."""
+        if lang == 'ru':
+            return self.lemma_cache.lemmatize(word, lang, lambda w: self.morph.parse(w)[0].normal_form)
+        return self.lemma_cache.lemmatize(word, 'en', self.lemmatizer_en.lemmatize)
+
     def _clean_and_lemmatize_descriptions(self, df):
         """
         Очищает и лемматизирует текстовые описания игр.
 
         Применяет очистку текста, включая приведение к нижнему регистру, удаление знаков пунктуации и цифр,
         а также лемматизацию слов для английского и русского языков с использованием NLTK и pymorphy2.
+        Язык берется из столбца 'description_language' (см. `_filter_by_language`, по умолчанию 'en'),
+        леммы слов запоминаются в общем для обоих столбцов кэше `self.lemma_cache`.
 
         Аргументы:
             df (pandas.DataFrame): DataFrame, содержащий столбцы 'detailed_description' и 'short_description'.
@@ -424,20 +976,20 @@ class DataCleaner:
                 return ""
 
             text = text.lower()
-            text = re.sub(r'[^\w\s]', '', text)
-            text = re.sub(r'\d+', '', text)
+            text = _PUNCTUATION_PATTERN.sub('', text)
+            text = _DIGITS_PATTERN.sub('', text)
 
-            words = text.split()
-
-            if lang == 'ru':
-                lemmatized_words = [self.morph.parse(word)[0].normal_form for word in words if word not in self.stop_words_ru]
-            else:
-                lemmatized_words = [self.lemmatizer_en.lemmatize(word) for word in words if word not in self.stop_words_en]
+            stop_words = self.stop_words_ru if lang == 'ru' else self.stop_words_en
+            return " ".join(self._lemmatize_word(word, lang) for word in text.split() if word not in stop_words)
 
-            return " ".join(lemmatized_words)
+        if 'description_language' in df.columns:
+            languages = df.pop('description_language').fillna('en')
+        else:
+            languages = pd.Series('en', index=df.index)
 
-        df['detailed_description_clean'] = df['detailed_description'].apply(lambda x: clean_and_lemmatize(x))
-        df['short_description_clean'] = df['short_description'].apply(lambda x: clean_and_lemmatize(x))
+        df['detailed_description_clean'] = [clean_and_lemmatize(text, lang) for text, lang in zip(df['detailed_description'], languages)]
+        df['short_description_clean'] = [clean_and_lemmatize(text, lang) for text, lang in zip(df['short_description'], languages)]
+        self.lemma_cache.flush()
         return df
 
     def _remove_specific_words_from_descriptions(self, df):
@@ -478,11 +1030,7 @@ class DataCleaner:
         Возвращает:
             pandas.DataFrame: Отфильтрованный DataFrame, соответствующий заданным ограничениям по длине описаний.
         """
-
-        if isinstance(data, str):
-            df_filtered = df[(df['short_description_clean'].str.len() >= self.min_description_length) & (df['short_description_clean'].str.len() <= self.max_description_length)].copy()
-        else:
-            df_filtered = df.copy()
+        df_filtered = df[(df['short_description_clean'].str.len() >= self.min_description_length) & (df['short_description_clean'].str.len() <= self.max_description_length)].copy()
         return df_filtered
 
     def _clean_and_lowercase_tags(self, df):
@@ -505,9 +1053,35 @@ class DataCleaner:
                 return cleaned_tags
             return tags
 
+        if self.vectorized:
+            return self._clean_and_lowercase_tags_vectorized(df)
+
         df['all_tags'] = df['all_tags'].apply(clean_tags)
         return df
 
+    def _clean_and_lowercase_tags_vectorized(self, df):
+        """
+        Векторизованная версия `_clean_and_lowercase_tags`.
+
+        Теги всех строк объединяются в один массив, каждый уникальный тег очищается один раз (`_map_unique`),
+        и результат снова разбивается на списки по длинам исходных списков.
+        """
+        tags = df['all_tags']
+        is_list = _type_mask(tags.values, list)
+        if not is_list.any():
+            return df
+        tag_lists = tags.values[is_list]
+        lengths = [len(tag_list) for tag_list in tag_lists]
+        flat_tags = list(chain.from_iterable(tag_lists))
+        cleaned_tags = _map_unique(flat_tags, _clean_tag).tolist() if flat_tags else []
+        cleaned_values = tags.values.copy()
+        end = 0
+        for position, length in zip(np.flatnonzero(is_list), lengths):
+            cleaned_values[position] = cleaned_tags[end:end + length]
+            end += length
+        df['all_tags'] = pd.Series(cleaned_values, index=tags.index, dtype=object)
+        return df
+
     def _filter_tags_count(self, df):
         """
         Фильтрует DataFrame по минимальному количеству тегов в столбце 'all_tags'.
@@ -525,6 +1099,145 @@ class DataCleaner:
         df_filtered = df[df['all_tags'].apply(lambda x: isinstance(x, list) and len(x) >= self.min_tags)].copy()
         return df_filtered
 
+    def _load_input(self, data):
+        """
+        Приводит входные данные clean_data к DataFrame.
+
+        Аргументы:
+            data (pandas.DataFrame или str): DataFrame или путь к файлу (JSON, CSV, Parquet).
+
+        Возвращает:
+            tuple: Кортеж (DataFrame, применять ли фильтр длины описаний). Фильтр длины применяется только к данным из файла.
+
+        Вызывает:
+            ValueError: Если входные данные не являются DataFrame и не строкой (путем к файлу).
+        """
+        if isinstance(data, str):
+            file_handler = FileHandler()
+            return file_handler.load_data(data), True
+        elif isinstance(data, pd.DataFrame):
+            # Шаги очистки не изменяют исходный DataFrame (см. _run_steps), поэтому копия не нужна
+            return data, False
+        raise ValueError("❌ Входные данные должны быть pandas DataFrame или путем к файлу.")
+
+    def _processing_steps(self, apply_description_length_filter):
+        """Возвращает цепочку шагов очистки в порядке выполнения."""
+        def _filter_description_length(x):
+            return self._filter_description_length(x) if apply_description_length_filter else x
+
+        return [
+            self._filter_rows,
+            self._combine_tags,
+            self._drop_unnecessary_columns,
+            self._filter_name_chars,
+            self._convert_release_date,
+            self._convert_bool_columns,
+            self._extract_owners,
+            self._replace_empty_values,
+            self._filter_by_language,
+            self._clean_and_lemmatize_descriptions,
+            self._remove_specific_words_from_descriptions,
+            _filter_description_length,
+            self._clean_and_lowercase_tags,
+            self._filter_tags_count
+        ]
+
+    def _run_steps(self, df, apply_description_length_filter, rejections=None):
+        """
+        Применяет шаги очистки к DataFrame по плану `CLEANING_PLAN`, не копируя промежуточные DataFrame.
+
+        Фильтры не создают отфильтрованные копии всего DataFrame: выполнение хранит позиции оставшихся строк
+        (накопленную маску), а каждый шаг получает DataFrame только из нужных ему столбцов и оставшихся строк.
+        Измененные и новые столбцы запоминаются отдельно, а итоговый DataFrame собирается один раз в конце.
+        Исходный DataFrame не изменяется. Время, количество отброшенных строк и пиковая память каждого шага
+        сохраняются в `self.last_step_report` и в интервалы трассировки запроса ('clean.<шаг>', см. `instrumentation.span`).
+
+        Ошибка на отдельном шаге пишется в лог и не прерывает обработку, отсутствие строк прекращает ее.
+
+        Аргументы:
+            df (pandas.DataFrame): DataFrame для очистки.
+            apply_description_length_filter (bool): Применять ли фильтр длины описаний.
+            rejections (dict, optional): Словарь, в который записываются отброшенные строки в виде
+                                         {индекс строки: имя шага}. По умолчанию None (не записываются).
+
+        Возвращает:
+            pandas.DataFrame: Очищенный DataFrame (пустой, если строк не осталось).
+        """
+        if df is None:
+            return pd.DataFrame()
+        steps = {step.__name__: step for step in self._processing_steps(apply_description_length_filter)}
+        step_order = list(steps)
+        positions = np.arange(len(df))
+        columns = list(df.columns)
+        updated = {}  # столбец -> Series, индексированный позициями строк на момент шага, изменившего столбец
+        created_by = {}  # новый столбец -> имя создавшего его шага
+        self.last_step_report = []
+
+        def get_column(column, rows):
+            if column in updated:
+                return updated[column].loc[rows]
+            return df[column].iloc[rows].set_axis(pd.Index(rows))
+
+        for step_name, reads, writes in CLEANING_PLAN:
+            if len(positions) == 0:
+                logger.debug("⚠️ DataFrame пуст. Прекращение обработки.")
+                break
+            step = steps[step_name]
+            rows_before = len(positions)
+            start_time = time.perf_counter()
+            try:
+                if reads is None:
+                    result = step(pd.DataFrame(columns=columns))
+                    columns = [column for column in columns if column in result.columns]
+                else:
+                    sub_df = pd.DataFrame({column: get_column(column, positions) for column in reads if column in columns},
+                                          index=pd.Index(positions))
+                    result = step(sub_df)
+                    if result is None:
+                        raise ValueError("шаг не вернул DataFrame")
+                    kept_positions = result.index.to_numpy(dtype=np.int64)
+                    if rejections is not None and len(kept_positions) < len(positions):
+                        removed_positions = np.setdiff1d(positions, kept_positions, assume_unique=True)
+                        for label in df.index[removed_positions]:
+                            rejections[label] = step_name
+                    positions = kept_positions
+                    for column in writes:
+                        if column in result.columns:
+                            updated[column] = result[column]
+                            if column not in columns:
+                                columns.append(column)
+                                created_by[column] = step_name
+                        elif column in columns:
+                            updated.pop(column, None)
+                            columns.remove(column)
+            except Exception as e:
+                logger.warning("⚠️ Ошибка на шаге %s: %s", step_name, e)
+            entry = {
+                'step': step_name,
+                'seconds': time.perf_counter() - start_time,
+                'rows_in': rows_before,
+                'rows_removed': rows_before - len(positions),
+                'peak_memory_mb': _peak_memory_mb(),
+            }
+            self.last_step_report.append(entry)
+            if entry['rows_removed']:
+                CLEANER_REJECTIONS.inc(entry['rows_removed'], step=step_name)
+            record_span(f"clean.{step_name}", entry['seconds'], rows_in=rows_before, rows_removed=entry['rows_removed'])
+
+        # Новые столбцы располагаются в порядке шагов _processing_steps, как при последовательной очистке
+        new_columns = sorted((column for column in columns if column in created_by), key=lambda column: step_order.index(created_by[column]))
+        columns = [column for column in columns if column not in created_by] + new_columns
+        cleaned_df = pd.DataFrame({column: get_column(column, positions).array for column in columns}, index=pd.Index(positions))
+        cleaned_df.index = df.index[positions]
+        return cleaned_df
+
+    def print_step_report(self):
+        """Выводит время, количество отброшенных строк и пиковую память каждого шага последней очистки."""
+        for entry in self.last_step_report:
+            peak_memory = f"{entry['peak_memory_mb']:.0f} МБ" if entry['peak_memory_mb'] is not None else "н/д"
+            print(f"⏱️ {entry['step']}: {entry['seconds']:.3f} с, строк на входе: {entry['rows_in']}, "
+                  f"отброшено: {entry['rows_removed']}, пик памяти: {peak_memory}")
+
     def clean_data(self, data):
          """
         Координирует процесс очистки данных DataFrame.
@@ -542,56 +1255,208 @@ class DataCleaner:
         Вызывает:
             ValueError: Если входные данные не являются DataFrame и не строкой (путем к файлу).
 
-        Выводит в консоль сообщения о начале и завершении процесса очистки, а также начальную и конечную форму DataFrame.
+        Пишет в лог (`steam_recommender.dataset_cleaner`) начальную и конечную форму DataFrame, а на уровне DEBUG -
+        список столбцов и отчет о шагах (`print_step_report` выводит его в консоль явно).
         """
-         print("🧹 Начинается процесс очистки данных...")
-        
+         logger.info("🧹 Начинается процесс очистки данных...")
+
          # Загрузка данных
-         if isinstance(data, str):
-             file_handler = FileHandler()
-             df = file_handler.load_data(data)
-             apply_description_length_filter = True
-         elif isinstance(data, pd.DataFrame):
-             df = data.copy()
-             apply_description_length_filter = False
-         else:
-             raise ValueError("❌ Входные данные должны быть pandas DataFrame или путем к файлу.")
+         df, apply_description_length_filter = self._load_input(data)
 
          # Отладочная информация
-         print(f"📊 Исходная форма: {df.shape}")
-         print("Столбцы перед обработкой:", df.columns.tolist())
-
-         # Цепочка обработки с проверками
-         processing_steps = [
-             self._filter_rows,
-             self._combine_tags,
-             self._drop_unnecessary_columns,
-             self._filter_name_chars,
-             self._convert_release_date,
-             self._convert_bool_columns,
-             self._extract_owners,
-             self._replace_empty_values,
-             self._filter_by_language,
-             self._clean_and_lemmatize_descriptions,
-             self._remove_specific_words_from_descriptions,
-             lambda x: self._filter_description_length(x) if apply_description_length_filter else x,
-             self._clean_and_lowercase_tags,
-             self._filter_tags_count
-         ]
-
-         for step in processing_steps:
-             try:
-                 if df is None or df.empty:  # Прекращаем обработку если DF стал пустым
-                     print("⚠️ DataFrame пуст. Прекращение обработки.")
-                     break
-                 df = step(df)
-             except Exception as e:
-                 print(f"⚠️ Ошибка на шаге {step.__name__}: {e}")
-                 continue
-
-         print(f"✅ Процесс очистки завершен. Итоговая форма: {df.shape if df is not None else 0}")
-         return df if df is not None else pd.DataFrame()
+         logger.info("📊 Исходная форма: %s", df.shape)
+         logger.debug("Столбцы перед обработкой: %s", df.columns.tolist())
+
+         df = self._run_steps(df, apply_description_length_filter)
+
+         logger.info("✅ Процесс очистки завершен. Итоговая форма: %s", df.shape)
+         return df
+
+    def clean_data_with_report(self, data):
+        """
+        Очищает данные и сообщает, на каком шаге была отброшена каждая исключенная строка.
 
+        Аргументы:
+            data (pandas.DataFrame или str): DataFrame для очистки или путь к файлу. Индекс DataFrame должен быть уникальным.
+
+        Возвращает:
+            tuple: Кортеж, содержащий:
+                - pandas.DataFrame: Очищенный DataFrame.
+                - dict: Отброшенные строки в виде {индекс строки: имя шага}. Описание шага - `REJECTION_REASONS`.
+
+        Вызывает:
+            ValueError: Если входные данные некорректны или индекс DataFrame не уникален.
+        """
+        df, apply_description_length_filter = self._load_input(data)
+        if not df.index.is_unique:
+            raise ValueError("❌ Для отчета об отброшенных строках индекс DataFrame должен быть уникальным.")
+        rejections = {}
+        cleaned_df = self._run_steps(df, apply_description_length_filter, rejections)
+        logger.debug("✅ Очистка завершена. Осталось строк: %d, отброшено: %d", len(cleaned_df), len(rejections))
+        return cleaned_df, rejections
+
+    def clean_data_parallel(self, data, chunk_size=5000, n_workers=None):
+        """
+        Очищает данные по частям в пуле процессов.
+
+        Делит DataFrame на части по `chunk_size` строк и выполняет цепочку шагов очистки для каждой части
+        в отдельном процессе. Каждый процесс создает собственный DataCleaner с теми же параметрами
+        (свои лемматизаторы и стоп-слова). Все шаги очистки построчные, поэтому результат совпадает
+        с clean_data; части объединяются в исходном порядке строк.
+
+        Аргументы:
+            data (pandas.DataFrame или str): DataFrame для очистки или путь к файлу (JSON, CSV, Parquet).
+            chunk_size (int, optional): Количество строк в одной части. По умолчанию 5000.
+            n_workers (int, optional): Количество процессов. По умолчанию None (число ядер процессора).
+
+        Возвращает:
+            pandas.DataFrame: Очищенный DataFrame.
+
+        Вызывает:
+            ValueError: Если входные данные некорректны или chunk_size не положителен.
+        """
+        if chunk_size <= 0:
+            raise ValueError("❌ chunk_size должен быть положительным.")
+        logger.info("🧹 Начинается параллельная очистка данных...")
+        df, apply_description_length_filter = self._load_input(data)
+        chunks = [df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size)]
+        n_workers = n_workers if n_workers else os.cpu_count()
+        n_workers = max(1, min(n_workers, len(chunks)))
+        logger.info("📊 Исходная форма: %s, частей: %d, процессов: %d", df.shape, len(chunks), n_workers)
+        del df
+
+        if n_workers == 1:
+            cleaned_chunks = [self._run_steps(chunk, apply_description_length_filter) for chunk in chunks]
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker_cleaner, initargs=(self._init_params,)) as executor:
+                cleaned_chunks = list(executor.map(_clean_chunk_in_worker, chunks, [apply_description_length_filter] * len(chunks)))
+
+        cleaned_chunks = [chunk for chunk in cleaned_chunks if not chunk.empty]
+        cleaned_df = pd.concat(cleaned_chunks) if cleaned_chunks else pd.DataFrame()
+        logger.info("✅ Параллельная очистка завершена. Итоговая форма: %s", cleaned_df.shape)
+        return cleaned_df
+
+    def clean_data_streaming(self, raw_path, output_path, batch_size=5000, n_workers=1):
+        """
+        Очищает набор данных потоково, не загружая его в память целиком.
+
+        Читает исходный файл частями по `batch_size` записей (`FileHandler.iter_batches`), очищает каждую часть
+        той же цепочкой шагов, что и clean_data для файла, и сразу дописывает результат в выходной JSON
+        вида {app_id: запись}. При `n_workers > 1` части обрабатываются в пуле процессов, причем в обработке
+        одновременно находится не более 2 * n_workers частей, так что пиковая память ограничена
+        размером нескольких частей независимо от размера набора данных.
+
+        Аргументы:
+            raw_path (str): Путь к исходному файлу (JSON набора данных Kaggle, CSV или Parquet).
+            output_path (str): Путь к выходному JSON файлу.
+            batch_size (int, optional): Количество записей в одной части. По умолчанию 5000.
+            n_workers (int, optional): Количество процессов. По умолчанию 1 (обработка в текущем процессе).
+
+        Возвращает:
+            tuple: Кортеж (количество прочитанных записей, количество записанных записей).
+
+        Вызывает:
+            ValueError: Если batch_size не положителен.
+        """
+        if batch_size <= 0:
+            raise ValueError("❌ batch_size должен быть положительным.")
+        logger.info("🧹 Начинается потоковая очистка данных...")
+        file_handler = FileHandler()
+        n_read, n_written = 0, 0
+        tmp_path = output_path + '.tmp'
+
+        with open(tmp_path, 'w', encoding='utf-8') as out:
+            out.write('{')
+
+            def write_batch(cleaned_df):
+                nonlocal n_written
+                if cleaned_df is None or cleaned_df.empty:
+                    return
+                records_json = cleaned_df.to_json(orient='index', force_ascii=False)
+                out.write((',' if n_written else '') + records_json[1:-1])
+                n_written += len(cleaned_df)
+
+            if n_workers > 1:
+                with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker_cleaner, initargs=(self._init_params,)) as executor:
+                    pending = deque()
+                    for batch in file_handler.iter_batches(raw_path, batch_size):
+                        n_read += len(batch)
+                        pending.append(executor.submit(_clean_chunk_in_worker, batch, True))
+                        if len(pending) >= 2 * n_workers:
+                            write_batch(pending.popleft().result())
+                    while pending:
+                        write_batch(pending.popleft().result())
+            else:
+                for batch in file_handler.iter_batches(raw_path, batch_size):
+                    n_read += len(batch)
+                    write_batch(self._run_steps(batch, True))
+                    logger.info("📊 Обработано записей: %d, сохранено: %d", n_read, n_written)
+
+            out.write('}')
+        os.replace(tmp_path, output_path)
+        logger.info("✅ Потоковая очистка завершена. Прочитано: %d, сохранено: %d в %s", n_read, n_written, output_path)
+        return n_read, n_written
+
+
+_worker_cleaner = None
+
+
+def _init_worker_cleaner(init_params):
+    """Создает DataCleaner процесса пула clean_data_parallel."""
+    global _worker_cleaner
+    _worker_cleaner = DataCleaner(**init_params)
+
+
+def _clean_chunk_in_worker(chunk, apply_description_length_filter):
+    """Очищает часть данных DataCleaner-ом текущего процесса пула."""
+    return _worker_cleaner._run_steps(chunk, apply_description_length_filter)
+
+
+def check_vectorized_equivalence(data_cleaner, df):
+    """
+    Проверяет, что векторизованные шаги DataCleaner дают тот же результат, что и построчные.
+
+    Прогоняет цепочку шагов очистки на `df` построчными реализациями, а перед каждым шагом
+    из `VECTORIZED_STEPS` выполняет обе реализации на копиях одного и того же входа
+    и сравнивает результаты `pandas.testing.assert_frame_equal` (значения, типы столбцов и индекс).
+
+    Аргументы:
+        data_cleaner (DataCleaner): Проверяемый DataCleaner (его режим `vectorized` восстанавливается после проверки).
+        df (pandas.DataFrame): Исходные (сырые) данные.
+
+    Возвращает:
+        dict: Словарь {имя шага: (время построчной версии, время векторизованной версии)} в секундах.
+
+    Вызывает:
+        AssertionError: Если результаты реализаций шага различаются.
+    """
+    vectorized = data_cleaner.vectorized
+    timings = {}
+    df = df.copy()
+    try:
+        for step in data_cleaner._processing_steps(False):
+            if df.empty:
+                break
+            if step.__name__ not in VECTORIZED_STEPS:
+                data_cleaner.vectorized = False
+                df = step(df)
+                continue
+            results, durations = {}, {}
+            for mode in (False, True):
+                data_cleaner.vectorized = mode
+                start_time = time.perf_counter()
+                results[mode] = step(df.copy())
+                durations[mode] = time.perf_counter() - start_time
+            try:
+                pd.testing.assert_frame_equal(results[True], results[False])
+            except AssertionError as e:
+                raise AssertionError(f"❌ Векторизованная версия шага {step.__name__} дает другой результат: {e}") from e
+            timings[step.__name__] = (durations[False], durations[True])
+            print(f"✅ {step.__name__}: построчно {durations[False]:.4f} с, векторизованно {durations[True]:.4f} с")
+            df = results[False]
+    finally:
+        data_cleaner.vectorized = vectorized
+    return timings
 
 if __name__ == '__main__':
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -724,22 +1589,53 @@ if __name__ == '__main__':
     }
     test_df = pd.DataFrame(data)
 
+    configure_logging()
     data_cleaner = DataCleaner()
 
     print("---------------------")
     print("🧪 Тестирование с DataFrame:")
     try:
         cleaned_df = data_cleaner.clean_data(test_df)
+        data_cleaner.print_step_report()
         print("✅ Очищенный DataFrame:")
         print(cleaned_df.head())
     except Exception as e:
           print(f"❌ Ошибка при обработке DataFrame: {e}")
 
+    print("---------------------")
+    print("🧪 Тестирование параллельной очистки DataFrame:")
+    try:
+        cleaned_df_parallel = data_cleaner.clean_data_parallel(test_df, chunk_size=10, n_workers=2)
+        print(f"✅ Результат совпадает с последовательной очисткой: {cleaned_df_parallel.equals(cleaned_df)}")
+        # Граница пакетов приходится на строку с датой в другом формате: без явного формата
+        # pandas выводит его по первой строке пакета, и пакеты разбирают даты по-разному
+        mixed_dates_df = test_df.copy()
+        mixed_dates_df['release_date'] = [
+            pd.Timestamp(date).strftime('%Y-%m-%d' if 10 <= i < 20 else RELEASE_DATE_FORMAT)
+            for i, date in enumerate(test_df['release_date'])
+        ]
+        mixed_dates_sequential = data_cleaner.clean_data(mixed_dates_df)
+        mixed_dates_parallel = data_cleaner.clean_data_parallel(mixed_dates_df, chunk_size=10, n_workers=2)
+        print(f"✅ Даты в разных форматах на границе пакетов: совпадает с последовательной очисткой: {mixed_dates_parallel.equals(mixed_dates_sequential)}, "
+              f"нераспознанных дат: {int(mixed_dates_sequential['release_date'].isna().sum())}")
+    except Exception as e:
+          print(f"❌ Ошибка при параллельной обработке DataFrame: {e}")
+
+    print("---------------------")
+    print("🧪 Проверка векторизованных шагов очистки:")
+    try:
+        check_vectorized_equivalence(data_cleaner, test_df)
+        if os.path.exists(raw_data_path):
+            check_vectorized_equivalence(data_cleaner, FileHandler().load_data(raw_data_path))
+    except AssertionError as e:
+          print(e)
+
     print("---------------------")
 
     print("📄 Тестирование с JSON файлом:")
     try:
         cleaned_df_from_file = data_cleaner.clean_data(raw_data_path)
+        data_cleaner.print_step_report()
         print("✅ Очищенный DataFrame из JSON файла:")
         print(cleaned_df_from_file.head())
 
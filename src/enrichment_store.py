@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+
+ENRICHMENT_STORE_PATH = os.getenv(
+    "ENRICHMENT_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'processed', 'steam_games_delta.sqlite')
+)
+
+
+class EnrichmentStore:
+    """
+    Дельта-каталог игр, полученных через API и отсутствующих в основном каталоге.
+
+    Каждая успешно очищенная игра сохраняется в SQLite по `steam_id` вместе с данными (JSON)
+    и float32 вектором модели. Вектор хранится с отпечатком модели, которой он построен:
+    при смене модели данные игры остаются пригодными, а вектор пересчитывается.
+    Команда `compact` переносит дельта-каталог в основной каталог и очищает его. Потокобезопасен.
+
+    Аргументы:
+        path (str): Путь к файлу SQLite.
+    """
+    def __init__(self, path=ENRICHMENT_STORE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS games ("
+            "steam_id INTEGER PRIMARY KEY, record TEXT NOT NULL, vector BLOB, model_fingerprint TEXT, created_at REAL NOT NULL)"
+        )
+        self.connection.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+    def add_many(self, games, model_fingerprint=None):
+        """Сохраняет (или заменяет) игры в дельта-каталоге.
+
+        Аргументы:
+            games (list): Словари с данными игр в формате датасета с ключом 'steam_id' и, при наличии, 'vector'.
+            model_fingerprint (str, optional): Отпечаток модели, построившей векторы. По умолчанию None.
+        """
+        rows = []
+        for game in games:
+            steam_id = pd.to_numeric(game.get('steam_id'), errors='coerce')
+            if pd.isna(steam_id):
+                continue
+            record = {key: value for key, value in game.items() if key not in ('vector', 'steam_id')}
+            vector = game.get('vector')
+            vector_blob = np.asarray(vector, dtype=np.float32).tobytes() if vector is not None else None
+            rows.append((int(steam_id), json.dumps(record, ensure_ascii=False, default=str), vector_blob, model_fingerprint, time.time()))
+        if not rows:
+            return
+        with self.lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO games (steam_id, record, vector, model_fingerprint, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self.connection.commit()
+
+    def get_many(self, steam_ids, model_fingerprint=None):
+        """Возвращает игры дельта-каталога по списку `steam_id`.
+
+        Аргументы:
+            steam_ids (iterable): Список `steam_id` (числа или строки).
+            model_fingerprint (str, optional): Отпечаток текущей модели. Вектор возвращается только
+                                               для игр, векторизованных этой моделью. По умолчанию None.
+
+        Возвращает:
+            dict: Словарь {steam_id (int): данные игры}, данные содержат 'steam_id' и, при совпадении модели, 'vector'.
+        """
+        ids = pd.to_numeric(pd.Series(list(steam_ids), dtype=object), errors='coerce').dropna().astype(np.int64).unique().tolist()
+        if not ids:
+            return {}
+        games = {}
+        with self.lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                rows = self.connection.execute(
+                    f"SELECT steam_id, record, vector, model_fingerprint FROM games WHERE steam_id IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for steam_id, record, vector, fingerprint in rows:
+                    game = json.loads(record)
+                    game['steam_id'] = steam_id
+                    if vector is not None and model_fingerprint is not None and fingerprint == model_fingerprint:
+                        game['vector'] = np.frombuffer(vector, dtype=np.float32)
+                    games[steam_id] = game
+        return games
+
+    def load_all(self, model_fingerprint=None):
+        """Возвращает все игры дельта-каталога в виде {steam_id: данные игры} (см. `get_many`)."""
+        with self.lock:
+            ids = [row[0] for row in self.connection.execute("SELECT steam_id FROM games ORDER BY steam_id")]
+        return self.get_many(ids, model_fingerprint)
+
+    def remove_many(self, steam_ids):
+        """Удаляет игры из дельта-каталога."""
+        ids = [int(steam_id) for steam_id in steam_ids]
+        with self.lock:
+            self.connection.executemany("DELETE FROM games WHERE steam_id = ?", [(steam_id,) for steam_id in ids])
+            self.connection.commit()
+
+    def close(self):
+        """Закрывает соединение с SQLite."""
+        with self.lock:
+            self.connection.close()
+
+
+def compact_enrichment_store(store, model, model_path, catalog_path, index_kinds=None):
+    """Переносит игры дельта-каталога в основной каталог и очищает дельта-каталог.
+
+    Добавляет игры, отсутствующие в каталоге, в файл датасета (столбцы приводятся к столбцам каталога),
+    дописывает их векторы в матрицу каталога (векторы другой модели пересчитываются), перестраивает
+    индексы поиска и удаляет перенесенные игры из дельта-каталога.
+
+    Аргументы:
+        store (EnrichmentStore): Дельта-каталог.
+        model: Обученная модель (Pipeline с CombinedVectorizer).
+        model_path (str): Путь к файлу модели.
+        catalog_path (str): Путь к файлу каталога (.parquet или .json), который будет перезаписан.
+        index_kinds (list, optional): Типы индексов для перестроения. По умолчанию уже существующие индексы (или 'exact').
+
+    Возвращает:
+        int: Количество перенесенных игр.
+    """
+    from vectorizer import clean_text, as_dense_vectors
+    from dataset_cleaner import FileHandler
+    from catalog_store import load_catalog_frame
+    from catalog_embeddings import CatalogEmbeddings, get_catalog_dir, model_fingerprint, load_or_build_catalog_embeddings, catalog_file_fingerprint
+    from vector_index import INDEX_TYPES, build_vector_index, get_index_dir, load_index
+
+    fingerprint = model_fingerprint(model_path)
+    delta_games = store.load_all(fingerprint)
+    if not delta_games:
+        print("ℹ️ Дельта-каталог пуст. Переносить нечего.")
+        return 0
+
+    catalog_df = load_catalog_frame(catalog_path)
+    catalog_dir = get_catalog_dir(model_path)
+    catalog = load_or_build_catalog_embeddings(model, catalog_df, model_path, catalog_dir, catalog_path=catalog_path)
+
+    new_ids = [steam_id for steam_id in delta_games if steam_id not in catalog_df.index]
+    duplicate_ids = [steam_id for steam_id in delta_games if steam_id in catalog_df.index]
+    print(f"🔄 Перенос дельта-каталога: новых игр {len(new_ids)}, уже в каталоге {len(duplicate_ids)}")
+
+    if new_ids:
+        new_games = [delta_games[steam_id] for steam_id in new_ids]
+        new_df = pd.DataFrame([{key: value for key, value in game.items() if key != 'vector'} for game in new_games])
+        new_df['short_description_clean'] = new_df['short_description'].apply(clean_text)
+        new_df = new_df.set_index('steam_id').reindex(columns=catalog_df.columns)
+
+        new_vectors = np.empty((len(new_games), catalog.vectors.shape[1]), dtype=np.float32)
+        has_vector = np.array([game.get('vector') is not None for game in new_games], dtype=bool)
+        for i in np.flatnonzero(has_vector):
+            new_vectors[i] = new_games[i]['vector']
+        if not has_vector.all():
+            new_vectors[~has_vector] = as_dense_vectors(model.transform(new_df[~has_vector]))
+
+        merged_df = pd.concat([catalog_df, new_df])
+        merged_df.index.name = 'steam_id'
+        tmp_path = catalog_path + '.tmp' + os.path.splitext(catalog_path)[1]
+        FileHandler().save_data(merged_df, tmp_path)
+        os.replace(tmp_path, catalog_path)
+
+        meta = dict(catalog.meta)
+        meta.update({
+            'model_fingerprint': fingerprint,
+            'n_items': int(len(merged_df)),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'catalog_file': catalog_file_fingerprint(catalog_path),
+        })
+        merged_catalog = CatalogEmbeddings(np.vstack([np.asarray(catalog.vectors), new_vectors]), merged_df.index.values, meta)
+        merged_catalog.save(catalog_dir)
+
+        if index_kinds is None:
+            index_kinds = [kind for kind in INDEX_TYPES if os.path.isdir(get_index_dir(catalog_dir, kind))] or ['exact']
+        for kind in index_kinds:
+            params = {}
+            if kind == 'ivf' and os.path.isdir(get_index_dir(catalog_dir, kind)):
+                params['n_probe'] = load_index(get_index_dir(catalog_dir, kind)).n_probe
+            build_vector_index(merged_catalog, kind, **params).save(get_index_dir(catalog_dir, kind))
+
+    store.remove_many(new_ids + duplicate_ids)
+    print(f"✅ Дельта-каталог перенесен в каталог: {catalog_path}, добавлено игр: {len(new_ids)}")
+    return len(new_ids)
+
+
+def main():
+    """Команды обслуживания дельта-каталога: статистика и перенос в основной каталог."""
+    from steam_library_analyzer import MODEL_PATH, DF_PROCESSED_JSON_PATH, load_model
+    from catalog_store import resolve_catalog_path
+
+    parser = argparse.ArgumentParser(description="Обслуживание дельта-каталога игр, полученных через API.")
+    parser.add_argument('command', choices=['stats', 'compact'], help="'stats' - количество игр, 'compact' - перенос в основной каталог.")
+    parser.add_argument('--store', type=str, default=ENRICHMENT_STORE_PATH, help='Путь к файлу дельта-каталога (SQLite).')
+    parser.add_argument('--model', type=str, default=MODEL_PATH, help='Путь к файлу модели (.pkl).')
+    parser.add_argument('--data', type=str, default=resolve_catalog_path(DF_PROCESSED_JSON_PATH), help='Путь к файлу каталога (.parquet или .json).')
+    parser.add_argument('--index', type=str, nargs='*', default=None, choices=['exact', 'ivf'], help='Индексы для перестроения (по умолчанию существующие).')
+    args = parser.parse_args()
+
+    store = EnrichmentStore(args.store)
+    if args.command == 'stats':
+        print(f"📊 Игр в дельта-каталоге: {len(store)}")
+    else:
+        compact_enrichment_store(store, load_model(args.model), args.model, args.data, index_kinds=args.index)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+import io
+import os
+import time
+import uuid
+import pstats
+import logging
+import cProfile
+import functools
+import threading
+import contextvars
+import tracemalloc
+from contextlib import contextmanager
+
+from metrics import STAGE_LATENCY
+
+LOGGER_NAME = 'steam_recommender'
+# Уровень логов сервиса (DEBUG, INFO, WARNING...). Пустое значение - логи не выводятся
+LOG_LEVEL = os.getenv("STEAM_RECOMMENDER_LOG_LEVEL", "")
+# Количество ближайших запросов, которые будут профилированы cProfile (0 - профилирование выключено)
+PROFILE_REQUESTS = int(os.getenv("STEAM_RECOMMENDER_PROFILE_REQUESTS", "0"))
+PROFILE_MEMORY = os.getenv("STEAM_RECOMMENDER_PROFILE_MEMORY", "0") == "1" # "1" добавляет к профилю снимок tracemalloc
+PROFILE_DIR = os.getenv(
+    "STEAM_RECOMMENDER_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'profiles')
+)
+PROFILE_TOP_N = 25
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(trace_id)s] %(name)s: %(message)s'
+
+# Без настроенного обработчика логи библиотеки не выводятся (и не попадают в обработчик последней надежды logging)
+logger = logging.getLogger(LOGGER_NAME)
+logger.addHandler(logging.NullHandler())
+
+_trace_id = contextvars.ContextVar('trace_id', default=None)
+_trace_spans = contextvars.ContextVar('trace_spans', default=None)
+_profile_lock = threading.Lock()
+_profile_requests_left = PROFILE_REQUESTS
+_profile_memory = PROFILE_MEMORY
+
+
+def get_logger(name):
+    """Возвращает логгер модуля проекта (дочерний для `steam_recommender`)."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+class TraceIdFilter(logging.Filter):
+    """Добавляет в запись лога идентификатор трассировки текущего запроса (атрибут `trace_id`)."""
+    def filter(self, record):
+        record.trace_id = _trace_id.get() or '-'
+        return True
+
+
+def configure_logging(level=None, stream=None, fmt=LOG_FORMAT):
+    """Включает вывод логов проекта в консоль (или `stream`) с идентификатором трассировки запроса.
+
+    Повторный вызов меняет только уровень логов, обработчик не дублируется.
+
+    Аргументы:
+        level (str или int, optional): Уровень логов. По умолчанию `STEAM_RECOMMENDER_LOG_LEVEL` или 'INFO'.
+        stream (file-like, optional): Поток вывода. По умолчанию sys.stderr.
+        fmt (str, optional): Формат записей. По умолчанию `LOG_FORMAT`.
+
+    Возвращает:
+        logging.Logger: Корневой логгер проекта.
+    """
+    level = level or LOG_LEVEL or 'INFO'
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    if not any(getattr(handler, '_steam_recommender_handler', False) for handler in logger.handlers):
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(fmt))
+        handler.addFilter(TraceIdFilter())
+        handler._steam_recommender_handler = True
+        logger.addHandler(handler)
+    return logger
+
+
+def new_trace_id():
+    """Создает новый идентификатор трассировки (16 шестнадцатеричных символов)."""
+    return uuid.uuid4().hex[:16]
+
+
+def get_trace_id():
+    """Возвращает идентификатор трассировки текущего запроса или None вне `request_context`."""
+    return _trace_id.get()
+
+
+def record_span(name, seconds, **fields):
+    """Сохраняет уже измеренный интервал в трассировку текущего запроса и пишет его в лог (уровень DEBUG).
+
+    Длительность также добавляется в гистограмму `steam_recommender_stage_duration_seconds` с меткой `stage=name`,
+    поэтому имена интервалов должны быть из фиксированного набора (без идентификаторов игр и пользователей).
+
+    Аргументы:
+        name (str): Имя интервала, например 'rank.similarity'.
+        seconds (float): Длительность в секундах.
+        **fields: Дополнительные поля интервала (размеры входных данных, статус ответа и т.п.).
+    """
+    STAGE_LATENCY.observe(seconds, stage=name)
+    spans = _trace_spans.get()
+    if spans is not None:
+        spans.append({'name': name, 'ms': seconds * 1000, **fields})
+    if logger.isEnabledFor(logging.DEBUG):
+        details = ' '.join(f"{key}={value}" for key, value in fields.items())
+        get_logger('span').debug("⏱️ %s %.2f мс %s", name, seconds * 1000, details)
+
+
+@contextmanager
+def span(name, **fields):
+    """Измеряет время выполнения блока и сохраняет его как интервал трассировки (см. `record_span`).
+
+    Возвращаемый словарь полей можно дополнить внутри блока, например размером результата.
+
+    Пример:
+        with span('rank.similarity', n_items=len(catalog)) as fields:
+            scores = index.similarities(vector)
+            fields['top_k'] = top_k
+    """
+    start_time = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        record_span(name, time.perf_counter() - start_time, **fields)
+
+
+def traced(name=None):
+    """Декоратор, выполняющий функцию внутри `span` (по умолчанию с именем функции)."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate_context(func):
+    """Возвращает функцию, выполняющую `func` в копии текущего контекста (идентификатор трассировки и интервалы запроса).
+
+    Нужна для задач пулов потоков: `ThreadPoolExecutor` не передает contextvars в рабочие потоки.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+
+def profile_next_requests(n=1, memory=False):
+    """Включает профилирование ближайших `n` запросов (`request_context`), например для поимки одного медленного запроса.
+
+    Аргументы:
+        n (int, optional): Количество запросов. По умолчанию 1.
+        memory (bool, optional): Добавлять ли снимок распределения памяти tracemalloc. По умолчанию False.
+    """
+    global _profile_requests_left, _profile_memory
+    with _profile_lock:
+        _profile_requests_left = n
+        _profile_memory = memory
+
+
+def _take_profile_slot():
+    """Забирает одно разрешение на профилирование запроса, если оно есть."""
+    global _profile_requests_left
+    with _profile_lock:
+        if _profile_requests_left > 0:
+            _profile_requests_left -= 1
+            return True
+        return False
+
+
+def _save_profile(profiler, trace, memory_snapshot, profile_dir):
+    """Сохраняет профиль cProfile (и снимок tracemalloc) запроса и пишет в лог самые затратные функции."""
+    os.makedirs(profile_dir, exist_ok=True)
+    base_path = os.path.join(profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{trace['name']}_{trace['trace_id']}")
+    profile_path = base_path + '.prof'
+    profiler.dump_stats(profile_path)
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+    get_logger('profile').info("📈 Профиль запроса %s сохранен в %s\n%s", trace['name'], profile_path, summary.getvalue())
+    trace['profile_path'] = profile_path
+    if memory_snapshot is not None:
+        memory_path = base_path + '.tracemalloc.txt'
+        with open(memory_path, 'w', encoding='utf-8') as f:
+            for stat in memory_snapshot.statistics('lineno')[:PROFILE_TOP_N]:
+                f.write(f"{stat}\n")
+        trace['memory_profile_path'] = memory_path
+
+
+@contextmanager
+def request_context(name, trace_id=None, profile=None, profile_memory=None, profile_dir=None):
+    """Обрабатывает блок как один запрос: задает идентификатор трассировки, собирает интервалы и пишет итог в лог.
+
+    Идентификатор доступен всем логам и интервалам внутри блока (в том числе в потоках, запущенных
+    через `propagate_context`). По завершении в лог (уровень INFO) пишется общее время запроса и время интервалов.
+    Запрос профилируется cProfile, если `profile=True` или профилирование включено `profile_next_requests`
+    (переменная окружения `STEAM_RECOMMENDER_PROFILE_REQUESTS`). Профилируется только поток запроса.
+
+    Аргументы:
+        name (str): Имя запроса, например 'analyze'.
+        trace_id (str, optional): Идентификатор трассировки. По умолчанию новый (`new_trace_id`).
+        profile (bool, optional): Профилировать запрос. По умолчанию None (по `profile_next_requests`).
+        profile_memory (bool, optional): Добавить снимок tracemalloc. По умолчанию как в `profile_next_requests`.
+        profile_dir (str, optional): Каталог профилей. По умолчанию `PROFILE_DIR`.
+
+    Возвращает:
+        dict: Трассировка запроса с ключами 'name', 'trace_id', 'spans', 'total_ms' (после выхода из блока)
+              и 'profile_path' / 'memory_profile_path', если запрос профилировался.
+    """
+    trace = {'name': name, 'trace_id': trace_id or new_trace_id(), 'spans': []}
+    trace_token = _trace_id.set(trace['trace_id'])
+    spans_token = _trace_spans.set(trace['spans'])
+    if profile is None:
+        profile = _take_profile_slot()
+    profile_memory = _profile_memory if profile_memory is None else profile_memory
+    profiler = cProfile.Profile() if profile else None
+    started_tracemalloc = False
+    if profiler is not None:
+        if profile_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracemalloc = True
+        profiler.enable()
+    start_time = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        trace['total_ms'] = (time.perf_counter() - start_time) * 1000
+        try:
+            if profiler is not None:
+                profiler.disable()
+                memory_snapshot = tracemalloc.take_snapshot() if profile_memory and tracemalloc.is_tracing() else None
+                if started_tracemalloc:
+                    tracemalloc.stop()
+                try:
+                    _save_profile(profiler, trace, memory_snapshot, profile_dir or PROFILE_DIR)
+                except OSError as e:
+                    get_logger('profile').warning("⚠️ Не удалось сохранить профиль запроса: %s", e)
+            if logger.isEnabledFor(logging.INFO):
+                span_summary = ', '.join(f"{entry['name']}={entry['ms']:.1f}мс" for entry in trace['spans'])
+                get_logger('request').info("✅ Запрос %s выполнен за %.1f мс (%s)", name, trace['total_ms'], span_summary)
+        finally:
+            _trace_spans.reset(spans_token)
+            _trace_id.reset(trace_token)
+
+
+if LOG_LEVEL:
+    configure_logging(LOG_LEVEL)
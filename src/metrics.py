@@ -0,0 +1,270 @@
+import math
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Формат текстовой выдачи Prometheus (exposition format 0.0.4)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+METRICS_PREFIX = 'steam_recommender_'
+# Границы корзин гистограмм задержек в секундах: от миллисекунд ранжирования до минут анализа большой библиотеки
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_value(value):
+    """Форматирует значение метрики в текстовом формате Prometheus (+Inf, -Inf, NaN, целые без дробной части)."""
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues)) + (list(extra) if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    """
+    Базовый класс метрики с набором меток.
+
+    Значения хранятся отдельно для каждой комбинации значений меток. Все операции потокобезопасны.
+
+    Аргументы:
+        name (str): Имя метрики (латиница, цифры и '_').
+        documentation (str): Описание метрики для строки HELP.
+        labelnames (tuple, optional): Имена меток. По умолчанию без меток.
+    """
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"❌ Метрика {self.name} ожидает метки {list(self.labelnames)}, получены: {sorted(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        """Удаляет все накопленные значения метрики."""
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self):
+        """Возвращает строки с образцами значений метрики (без HELP и TYPE)."""
+        raise NotImplementedError
+
+    def render(self):
+        """Возвращает метрику в текстовом формате Prometheus."""
+        documentation = self.documentation.replace('\\', '\\\\').replace('\n', '\\n')
+        lines = [f"# HELP {self.name} {documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Монотонно возрастающий счетчик (имя по соглашению Prometheus оканчивается на '_total')."""
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """Увеличивает счетчик с метками `labels` на `amount` (неотрицательное число)."""
+        if amount < 0:
+            raise ValueError(f"❌ Счетчик {self.name} нельзя уменьшить (amount={amount}).")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Возвращает текущее значение счетчика с метками `labels` (0, если он не увеличивался)."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Значение, которое может как расти, так и уменьшаться (например, размер каталога)."""
+    type_name = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        """Изменяет значение с метками `labels` на `amount` (может быть отрицательным)."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set(self, value, **labels):
+        """Устанавливает значение с метками `labels`."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """
+    Гистограмма наблюдений (например, задержек в секундах) с фиксированными корзинами.
+
+    Для каждой комбинации меток хранит количество наблюдений в каждой корзине, их сумму и количество.
+    При выдаче корзины накапливаются (`le` - верхняя граница включительно), как того требует формат Prometheus.
+
+    Аргументы:
+        name (str): Имя метрики.
+        documentation (str): Описание метрики.
+        labelnames (tuple, optional): Имена меток. По умолчанию без меток.
+        buckets (tuple, optional): Возрастающие верхние границы корзин. По умолчанию `DEFAULT_LATENCY_BUCKETS`.
+    """
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        if 'le' in self.labelnames:
+            raise ValueError(f"❌ Метка 'le' зарезервирована для корзин гистограммы {name}.")
+        buckets = [float(bound) for bound in buckets]
+        if not buckets or buckets != sorted(set(buckets)):
+            raise ValueError(f"❌ Границы корзин гистограммы {name} должны строго возрастать.")
+        if not math.isinf(buckets[-1]):
+            buckets.append(math.inf)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        """Добавляет наблюдение `value` с метками `labels`."""
+        key = self._key(labels)
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            state['counts'][bucket] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Измеряет время выполнения блока в секундах и добавляет его как наблюдение."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def snapshot(self, **labels):
+        """Возвращает словарь {'buckets': {граница: накопленное количество}, 'sum', 'count'} для меток `labels`."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            counts = list(state['counts']) if state else [0] * len(self.buckets)
+            total = state['sum'] if state else 0.0
+        cumulative = [sum(counts[:i + 1]) for i in range(len(counts))]
+        return {'buckets': dict(zip(self.buckets, cumulative)), 'sum': total, 'count': cumulative[-1]}
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, list(state['counts']), state['sum'], state['count']) for key, state in self._values.items())
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Реестр метрик процесса.
+
+    Метрики создаются методами `counter`, `gauge` и `histogram`; повторный вызов с тем же именем возвращает
+    уже зарегистрированную метрику, поэтому модули могут объявлять метрики независимо друг от друга.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_class, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not metric_class or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"❌ Метрика {name} уже зарегистрирована с другим типом или метками.")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """Возвращает счетчик `name`, создавая его при первом вызове."""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        """Возвращает метрику-значение `name`, создавая ее при первом вызове."""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        """Возвращает гистограмму `name`, создавая ее при первом вызове."""
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        """Возвращает зарегистрированную метрику по имени или None."""
+        return self._metrics.get(name)
+
+    def clear(self):
+        """Обнуляет значения всех метрик реестра (сами метрики остаются зарегистрированными)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+    def render(self):
+        """Возвращает все метрики реестра в текстовом формате Prometheus."""
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Метрики сервиса. Объявлены здесь, чтобы их список и описания были в одном месте
+REQUESTS = REGISTRY.counter(
+    METRICS_PREFIX + 'requests_total', 'Запросы к сервису по типу ввода и результату.', ('type', 'status'))
+REQUEST_LATENCY = REGISTRY.histogram(
+    METRICS_PREFIX + 'request_duration_seconds', 'Время обработки запроса к сервису по типу ввода.', ('type',))
+CATALOG_LOOKUPS = REGISTRY.counter(
+    METRICS_PREFIX + 'catalog_lookups_total',
+    "Поиск игр запроса: 'catalog' - основной каталог, 'delta' - дельта-каталог, 'miss' - запрос к Steam API.", ('result',))
+API_REQUESTS = REGISTRY.counter(
+    METRICS_PREFIX + 'api_requests_total',
+    "Запросы к Steam/SteamSpy API по эндпоинту и статусу ('error' - сетевая ошибка).", ('api', 'endpoint', 'status'))
+API_LATENCY = REGISTRY.histogram(
+    METRICS_PREFIX + 'api_request_duration_seconds',
+    'Время запроса к Steam/SteamSpy API с учетом ожидания лимита и повторов.', ('api', 'endpoint'))
+API_CACHE = REGISTRY.counter(
+    METRICS_PREFIX + 'api_cache_lookups_total', "Обращения к кэшу ответов API ('hit' или 'miss').", ('api', 'endpoint', 'result'))
+CLEANER_REJECTIONS = REGISTRY.counter(
+    METRICS_PREFIX + 'cleaner_rejections_total', 'Строки, отброшенные шагами очистки данных.', ('step',))
+STAGE_LATENCY = REGISTRY.histogram(
+    METRICS_PREFIX + 'stage_duration_seconds',
+    'Время этапов обработки запроса (интервалы трассировки: трансформация моделью, сходство, ранжирование, шаги очистки).',
+    ('stage',))
+MODEL_INFO = REGISTRY.gauge(
+    METRICS_PREFIX + 'model_info', 'Загруженная модель и каталог (значение - количество игр каталога).', ('model_fingerprint', 'index_kind'))
+
+
+def render_metrics(registry=REGISTRY):
+    """Возвращает метрики реестра (по умолчанию общего реестра процесса) в текстовом формате Prometheus."""
+    return registry.render()
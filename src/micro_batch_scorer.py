@@ -0,0 +1,138 @@
+import time
+import queue
+import threading
+import numpy as np
+from concurrent.futures import Future
+
+from instrumentation import get_logger, record_span
+from metrics import REGISTRY, METRICS_PREFIX
+
+logger = get_logger('micro_batch_scorer')
+
+BATCH_SIZE = REGISTRY.histogram(
+    METRICS_PREFIX + 'scoring_batch_size', 'Количество запросов, посчитанных одним матричным произведением.',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+QUEUE_WAIT = REGISTRY.histogram(
+    METRICS_PREFIX + 'scoring_queue_wait_seconds', 'Время ожидания запроса в очереди пакетного расчета схожести.')
+
+_STOP = object()
+
+
+class MicroBatchScorer:
+    """
+    Планировщик расчета схожести, объединяющий одновременные запросы в пакеты.
+
+    Запросы (векторы) из разных потоков складываются в очередь. Фоновый поток забирает первый запрос,
+    дособирает пакет из запросов, пришедших в течение `max_wait_ms` (но не больше `max_batch_size`),
+    и считает схожесть всего пакета одним матрично-матричным произведением `index.similarities_many`.
+    Матрица каталога при этом читается из памяти один раз на пакет, а не на каждого пользователя.
+    Результаты возвращаются ожидающим потокам через `concurrent.futures.Future`.
+
+    Под нагрузкой пакеты собираются сами, пока считается предыдущий пакет; одиночный запрос ждет
+    не больше `max_wait_ms`. Ошибка расчета передается всем запросам пакета.
+
+    Аргументы:
+        index (ExactIndex или IVFIndex): Индекс поиска с методами `similarities` и `similarities_many`.
+        max_batch_size (int, optional): Максимальное количество запросов в пакете. По умолчанию 32.
+        max_wait_ms (float, optional): Максимальное время сбора пакета после первого запроса, мс. По умолчанию 2.
+    """
+    def __init__(self, index, max_batch_size=32, max_wait_ms=2.0):
+        if max_batch_size < 1:
+            raise ValueError("❌ max_batch_size должен быть положительным.")
+        if max_wait_ms < 0:
+            raise ValueError("❌ max_wait_ms не может быть отрицательным.")
+        self.index = index
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='MicroBatchScorer', daemon=True)
+        self._thread.start()
+
+    def submit(self, query_vector):
+        """Ставит вектор запроса в очередь расчета.
+
+        Аргументы:
+            query_vector (np.ndarray): Вектор запроса (размерность каталога).
+
+        Возвращает:
+            concurrent.futures.Future: Будущий результат - массив схожести длины каталога.
+
+        Вызывает:
+            RuntimeError: Если планировщик остановлен (`close`).
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("❌ MicroBatchScorer остановлен.")
+            self._queue.put((np.asarray(query_vector, dtype=np.float32).ravel(), future, time.perf_counter()))
+        return future
+
+    def similarities(self, query_vector, timeout=None):
+        """Вычисляет схожесть вектора запроса с каталогом в составе пакета и ждет результат (см. `submit`)."""
+        return self.submit(query_vector).result(timeout=timeout)
+
+    def close(self, timeout=None):
+        """Останавливает фоновый поток после расчета уже поставленных запросов."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _collect_batch(self, first_item):
+        """Дособирает пакет к первому запросу: до `max_batch_size` запросов или до истечения `max_wait`.
+
+        Возвращает:
+            tuple: (список запросов пакета, признак остановки планировщика).
+        """
+        batch = [first_item]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                # Уже стоящие в очереди запросы забираются без ожидания
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _score_batch(self, batch):
+        """Считает схожесть пакета одним вызовом индекса и передает строки результата ожидающим запросам."""
+        start_time = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            QUEUE_WAIT.observe(start_time - enqueued_at)
+        BATCH_SIZE.observe(len(batch))
+        try:
+            if len(batch) == 1:
+                scores = [self.index.similarities(batch[0][0])]
+            else:
+                scores = self.index.similarities_many(np.vstack([query for query, _, _ in batch]))
+        except Exception as e:
+            logger.warning("⚠️ Ошибка пакетного расчета схожести (%d запросов): %s", len(batch), e)
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        record_span('rank.similarity_batch', time.perf_counter() - start_time, batch_size=len(batch))
+        for (_, future, _), row in zip(batch, scores):
+            future.set_result(row)
+
+    def _run(self):
+        """Цикл фонового потока: собирает пакеты из очереди и считает их до остановки планировщика."""
+        stopped = False
+        while not stopped:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch, stopped = self._collect_batch(item)
+            self._score_batch(batch)
@@ -0,0 +1,470 @@
+import os
+import csv
+import json
+import time
+import pickle
+import hashlib
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sklearn.pipeline import Pipeline
+from sklearn.model_selection import ParameterGrid
+
+from vectorizer import (
+    CombinedVectorizer, TopicModelEvaluator, vectorize_owners, vectorize_tags, make_tfidf_vectorizer,
+    make_minmax_scaler, resolve_backend, fit_topic_model, tfidf_feature_names, to_scipy_csr,
+    as_dense_vectors, cosine_similarity_matrix
+)
+
+MODEL_SEARCH_CACHE_DIR = os.getenv(
+    "MODEL_SEARCH_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache', 'model_search')
+)
+RESULT_COLUMNS = [
+    'candidate_id', 'params', 'model_type', 'n_topics', 'coherence', 'topic_diversity', 'intra_topic_diversity',
+    'fit_time', 'time', 'recommendations', 'error'
+]
+# Параметры CombinedVectorizer, от которых зависит каждый обучаемый этап
+STAGE_PARAMS = {
+    'owners': ('owners_method', 'backend'),
+    'tags': ('multilabel_params',),
+    'tfidf': ('tfidf_cuml_params', 'backend'),
+}
+DEFAULT_VECTORIZER_PARAMS = {
+    'owners_method': 'log_scale', 'multilabel_params': None, 'nmf_params': None, 'lda_params': None,
+    'tag_weight': 1.0, 'tfidf_cuml_params': None, 'backend': 'auto',
+}
+
+
+def stage_key(stage, params):
+    """Формирует ключ кэша этапа из значений параметров, от которых он зависит.
+
+    Аргументы:
+        stage (str): Имя этапа ('owners', 'tags', 'tfidf' или 'topics').
+        params (dict): Параметры CombinedVectorizer (без префикса 'vectorizer__').
+
+    Возвращает:
+        str: SHA-256 от имени этапа и нормализованных (JSON, сортировка ключей) значений параметров.
+    """
+    if stage == 'topics':
+        values = {'tfidf': stage_key('tfidf', params), 'nmf_params': params.get('nmf_params'), 'lda_params': params.get('lda_params')}
+    else:
+        values = {name: params.get(name) for name in STAGE_PARAMS[stage]}
+    payload = json.dumps([stage, values], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def data_fingerprint(X):
+    """Возвращает отпечаток обучающей выборки: хэш индекса и столбцов, на которых обучаются этапы.
+
+    Аргументы:
+        X (pd.DataFrame): Обучающая выборка ('estimated_owners', 'all_tags', 'short_description_clean').
+
+    Возвращает:
+        str: Шестнадцатеричный отпечаток (16 символов). Меняется при другом `--data`, `--percentage` или обновленном датасете.
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(X.index.to_series(), index=False).values.tobytes())
+    for column in ('estimated_owners', 'all_tags', 'short_description_clean'):
+        values = X[column].map(lambda value: json.dumps(value, ensure_ascii=False, default=str) if isinstance(value, (list, tuple)) else value)
+        digest.update(column.encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(values.astype(str), index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def candidate_id(params):
+    """Возвращает короткий идентификатор конфигурации (строка таблицы результатов)."""
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def normalize_candidate_params(params):
+    """Убирает префикс 'vectorizer__' (формат сеток Pipeline из notebook) и дополняет параметры значениями по умолчанию.
+
+    Значение 'backend' разрешается в 'gpu' или 'cpu', чтобы ключи этапов не зависели от 'auto'.
+    """
+    params = {name.split('__', 1)[1] if name.startswith('vectorizer__') else name: value for name, value in params.items()}
+    unknown = set(params) - set(DEFAULT_VECTORIZER_PARAMS)
+    if unknown:
+        raise ValueError(f"❌ Неизвестные параметры CombinedVectorizer в сетке: {sorted(unknown)}")
+    params = {**DEFAULT_VECTORIZER_PARAMS, **params}
+    params['backend'] = resolve_backend(params['backend'])
+    return params
+
+
+class StageCache:
+    """
+    Кэш обученных этапов CombinedVectorizer с ключами по их параметрам.
+
+    Этапы 'owners' (MinMaxScaler), 'tags' (MultiLabelBinarizer) и 'tfidf' (TF-IDF векторизатор,
+    матрица описаний и список слов) обучаются один раз для каждой комбинации своих параметров,
+    поэтому конфигурации, различающиеся только `nmf_params`, `lda_params` или `tag_weight`,
+    не переобучают их. Этап 'topics' (NMF/LDA) кэшируется по параметрам модели и ключу TF-IDF,
+    так что изменение только `tag_weight` не переобучает и тематическую модель.
+    При заданной `cache_dir` этапы дополнительно сохраняются на диск и переживают перезапуск поиска.
+    Файлы этапов лежат в подкаталоге с отпечатком обучающей выборки (`data_fingerprint`), поэтому этапы,
+    обученные на другой выборке, не переиспользуются.
+
+    Аргументы:
+        X (pd.DataFrame): Обучающая выборка ('estimated_owners', 'all_tags', 'short_description_clean').
+        cache_dir (str, optional): Директория для кэша этапов на диске. None - только в памяти. По умолчанию None.
+    """
+    def __init__(self, X, cache_dir=None):
+        self.X = X
+        self.data_fingerprint = data_fingerprint(X)
+        self.cache_dir = os.path.join(cache_dir, self.data_fingerprint) if cache_dir else None
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'disk_hits': 0, 'fits': 0}
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def get(self, stage, params):
+        """Возвращает обученный этап, обучая его (или читая с диска) только при отсутствии в кэше.
+
+        Аргументы:
+            stage (str): Имя этапа ('owners', 'tags', 'tfidf' или 'topics').
+            params (dict): Нормализованные параметры CombinedVectorizer.
+
+        Возвращает:
+            Обученный этап: скалер, MultiLabelBinarizer, словарь этапа 'tfidf' или модель NMF/LDA.
+        """
+        key = stage_key(stage, params)
+        with self.lock:
+            if key in self.stages:
+                self.counters['hits'] += 1
+                return self.stages[key]
+        path = os.path.join(self.cache_dir, f"{stage}_{key}.pkl") if self.cache_dir else None
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            self.counters['disk_hits'] += 1
+        else:
+            value = self._fit(stage, params)
+            self.counters['fits'] += 1
+            if path:
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(value, f)
+                os.replace(tmp_path, path)
+        with self.lock:
+            self.stages[key] = value
+        return value
+
+    def _fit(self, stage, params):
+        """Обучает один этап на обучающей выборке."""
+        if stage == 'owners':
+            scaler = make_minmax_scaler(params['backend'])
+            scaler.fit(vectorize_owners(self.X, method=params['owners_method']))
+            return scaler
+        if stage == 'tags':
+            _, mlb = vectorize_tags(self.X, multilabel_params=params['multilabel_params'])
+            return mlb
+        if stage == 'tfidf':
+            tfidf = make_tfidf_vectorizer(params['tfidf_cuml_params'], params['backend'])
+            tfidf.fit(self.X['short_description_clean'].str.lower())
+            return {
+                'tfidf': tfidf,
+                'matrix': to_scipy_csr(tfidf.transform(self.X['short_description_clean'])),
+                'feature_names': tfidf_feature_names(tfidf),
+            }
+        if stage == 'topics':
+            _, topic_model = fit_topic_model(self.get('tfidf', params)['matrix'], nmf_params=params['nmf_params'], lda_params=params['lda_params'])
+            return topic_model
+        raise ValueError(f"❌ Неизвестный этап: {stage}")
+
+    def prepare_upstream(self, candidates):
+        """Обучает этапы 'owners', 'tags' и 'tfidf' для всех конфигураций (каждую комбинацию параметров один раз)."""
+        for params in candidates:
+            for stage in STAGE_PARAMS:
+                self.get(stage, params)
+
+    def build_vectorizer(self, params):
+        """Собирает обученный CombinedVectorizer из этапов кэша без повторного обучения.
+
+        Аргументы:
+            params (dict): Нормализованные параметры CombinedVectorizer.
+
+        Возвращает:
+            CombinedVectorizer: Векторизатор, эквивалентный `CombinedVectorizer(**params).fit(X)`.
+        """
+        vectorizer = CombinedVectorizer(**params)
+        tfidf_stage = self.get('tfidf', params)
+        vectorizer.scaler = self.get('owners', params)
+        vectorizer.mlb = self.get('tags', params)
+        vectorizer.tfidf_cuml = tfidf_stage['tfidf']
+        vectorizer.tfidf_feature_names_out_ = tfidf_stage['feature_names']
+        topic_model = self.get('topics', params)
+        if params['nmf_params']:
+            vectorizer.nmf, vectorizer.lda = topic_model, None
+        else:
+            vectorizer.nmf, vectorizer.lda = None, topic_model
+        return vectorizer
+
+
+def evaluate_candidate(params, stage_cache, evaluator, probe_game=None, top_n=5):
+    """Обучает тематическую модель конфигурации на кэшированных этапах и вычисляет ее метрики.
+
+    Аргументы:
+        params (dict): Нормализованные параметры CombinedVectorizer.
+        stage_cache (StageCache): Кэш обученных этапов.
+        evaluator (TopicModelEvaluator): Оценщик тематических моделей на корпусе описаний.
+        probe_game (str, optional): Название игры обучающей выборки для контрольных рекомендаций. По умолчанию None.
+        top_n (int, optional): Количество контрольных рекомендаций. По умолчанию 5.
+
+    Возвращает:
+        dict: Строка таблицы результатов (см. `RESULT_COLUMNS`).
+    """
+    start_time = time.time()
+    row = {
+        'candidate_id': candidate_id(params),
+        'params': json.dumps(params, sort_keys=True, ensure_ascii=False, default=str),
+        'model_type': 'nmf' if params['nmf_params'] else 'lda',
+    }
+    try:
+        vectorizer = stage_cache.build_vectorizer(params)
+        row['fit_time'] = time.time() - start_time
+        topic_model = vectorizer.nmf if vectorizer.nmf is not None else vectorizer.lda
+        if np.isnan(topic_model.components_).any():
+            print(f"⚠️ Обнаружены NaN значения в components_ для конфигурации {row['candidate_id']}")
+        row['n_topics'] = int(topic_model.components_.shape[0])
+        metrics = evaluator.evaluate(topic_model, vectorizer.tfidf_feature_names_out_)
+        row['coherence'] = metrics['coherence']
+        row['topic_diversity'] = metrics['diversity']
+        row['intra_topic_diversity'] = metrics['intra_topic_diversity']
+        if probe_game:
+            row['recommendations'] = json.dumps(probe_recommendations(vectorizer, stage_cache.X, probe_game, top_n), ensure_ascii=False)
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+    row['time'] = time.time() - start_time
+    return row
+
+
+def probe_recommendations(vectorizer, X, game_name, top_n=5):
+    """Возвращает названия `top_n` игр выборки, наиболее похожих на игру `game_name` (пустой список, если ее нет)."""
+    matches = np.flatnonzero((X['name'] == game_name).to_numpy())
+    if not len(matches):
+        return []
+    vectors = as_dense_vectors(vectorizer.transform(X))
+    similarities = cosine_similarity_matrix(vectors[matches[:1]], vectors)[0]
+    similarities[matches] = -np.inf
+    top_indices = np.argpartition(-similarities, min(top_n, len(similarities) - 1))[:top_n]
+    top_indices = top_indices[np.argsort(-similarities[top_indices])]
+    return X['name'].iloc[top_indices].tolist()
+
+
+def load_results(results_path):
+    """Читает таблицу результатов поиска (пустой DataFrame, если файла нет)."""
+    if not os.path.exists(results_path):
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    return pd.read_csv(results_path, dtype={'candidate_id': str})
+
+
+class ResultsWriter:
+    """
+    Построчная запись результатов поиска в CSV.
+
+    Каждая строка дописывается и сбрасывается на диск сразу после оценки конфигурации,
+    поэтому прерванный поиск продолжается с места остановки (см. `run_search`).
+
+    Аргументы:
+        path (str): Путь к CSV файлу результатов.
+    """
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=RESULT_COLUMNS)
+        if write_header:
+            self.writer.writeheader()
+            self.file.flush()
+
+    def write(self, row):
+        """Дописывает строку результата и сбрасывает файл на диск."""
+        self.writer.writerow({column: row.get(column) for column in RESULT_COLUMNS})
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+_worker_search = None
+
+
+def _init_worker_search(stage_cache, evaluator, probe_game):
+    """Сохраняет кэш этапов и оценщик процесса пула run_search."""
+    global _worker_search
+    _worker_search = (stage_cache, evaluator, probe_game)
+
+
+def _evaluate_group_in_worker(group):
+    """Оценивает группу конфигураций с общей тематической моделью кэшем этапов и оценщиком текущего процесса пула."""
+    stage_cache, evaluator, probe_game = _worker_search
+    return [evaluate_candidate(params, stage_cache, evaluator, probe_game) for params in group]
+
+
+def run_search(X, param_grid, results_path, n_workers=None, cache_dir=MODEL_SEARCH_CACHE_DIR, probe_game=None, retry_failed=False):
+    """Выполняет поиск гиперпараметров CombinedVectorizer с кэшированием этапов и возобновлением.
+
+    Конфигурации, уже записанные в `results_path`, пропускаются (с ошибкой - только при `retry_failed=False`).
+    Этапы 'owners', 'tags' и 'tfidf' обучаются в текущем процессе один раз на комбинацию своих параметров,
+    затем тематические модели обучаются и оцениваются в пуле процессов; корпус, оценщик и этапы передаются
+    в каждый процесс один раз. Конфигурации с общей тематической моделью (различающиеся, например, только
+    `tag_weight`) оцениваются одной задачей пула, чтобы модель обучалась один раз. Результаты дописываются
+    в CSV по мере готовности.
+
+    Аргументы:
+        X (pd.DataFrame): Обучающая выборка.
+        param_grid (dict или list): Сетка параметров в формате `ParameterGrid` (с префиксом 'vectorizer__' или без).
+        results_path (str): Путь к CSV файлу результатов.
+        n_workers (int, optional): Количество процессов. По умолчанию None (число ядер процессора). На GPU-бэкенде всегда 1.
+        cache_dir (str, optional): Директория кэша этапов на диске. None - только в памяти. По умолчанию `MODEL_SEARCH_CACHE_DIR`.
+        probe_game (str, optional): Название игры для контрольных рекомендаций в таблице. По умолчанию None.
+        retry_failed (bool, optional): Повторно оценивать конфигурации, завершившиеся ошибкой. По умолчанию False.
+
+    Возвращает:
+        pd.DataFrame: Полная таблица результатов (включая результаты предыдущих запусков).
+    """
+    candidates = [normalize_candidate_params(params) for params in ParameterGrid(param_grid)]
+    existing = load_results(results_path)
+    done = existing if not retry_failed or 'error' not in existing else existing[existing['error'].isna()]
+    done_ids = set(done['candidate_id'].astype(str))
+    pending = list({candidate_id(params): params for params in candidates if candidate_id(params) not in done_ids}.values())
+    print(f"🧪 Конфигураций: {len(candidates)}, уже оценено: {len(candidates) - len(pending)}, к оценке: {len(pending)}")
+    if not pending:
+        return load_results(results_path)
+
+    stage_cache = StageCache(X, cache_dir=cache_dir)
+    start_time = time.time()
+    stage_cache.prepare_upstream(pending)
+    print(f"✅ Этапы владельцев, тегов и TF-IDF подготовлены за {time.time() - start_time:.2f} секунд ({stage_cache.counters})")
+    evaluator = TopicModelEvaluator(X['short_description_clean'].tolist())
+
+    n_workers = n_workers if n_workers else os.cpu_count()
+    n_workers = max(1, min(n_workers, len(pending)))
+    if any(params['backend'] == 'gpu' for params in pending) and n_workers > 1:
+        print("ℹ️ GPU-бэкенд: конфигурации оцениваются в одном процессе.")
+        n_workers = 1
+
+    writer = ResultsWriter(results_path)
+    try:
+        if n_workers == 1:
+            rows = (evaluate_candidate(params, stage_cache, evaluator, probe_game) for params in pending)
+            for i, row in enumerate(rows, 1):
+                _report_row(row, i, len(pending))
+                writer.write(row)
+        else:
+            groups = {}
+            for params in pending:
+                groups.setdefault(stage_key('topics', params), []).append(params)
+            n_workers = min(n_workers, len(groups))
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker_search, initargs=(stage_cache, evaluator, probe_game)) as executor:
+                futures = [executor.submit(_evaluate_group_in_worker, group) for group in groups.values()]
+                n_done = 0
+                for future in as_completed(futures):
+                    for row in future.result():
+                        n_done += 1
+                        _report_row(row, n_done, len(pending))
+                        writer.write(row)
+    finally:
+        writer.close()
+    print(f"✅ Поиск завершен за {time.time() - start_time:.2f} секунд. Результаты: {results_path}")
+    return load_results(results_path)
+
+
+def _report_row(row, index, total):
+    """Выводит итог оценки одной конфигурации."""
+    if row.get('error'):
+        print(f"❌ ({index}/{total}) {row['candidate_id']}: {row['error']}")
+    else:
+        print(f"📊 ({index}/{total}) {row['candidate_id']} {row['model_type']}[{row['n_topics']}]: coherence={row['coherence']:.4f}, "
+              f"diversity={row['topic_diversity']:.4f}, intra={row['intra_topic_diversity']:.4f}, время={row['time']:.2f} с")
+
+
+def select_best_params(results, metric='coherence'):
+    """Возвращает параметры конфигурации с наибольшим значением `metric` среди оцененных без ошибок.
+
+    Вызывает:
+        ValueError: Если в таблице нет успешно оцененных конфигураций.
+    """
+    successful = results[results['error'].isna()] if 'error' in results else results
+    successful = successful.dropna(subset=[metric])
+    if successful.empty:
+        raise ValueError("❌ В таблице результатов нет успешно оцененных конфигураций.")
+    return json.loads(successful.sort_values(by=metric, ascending=False).iloc[0]['params'])
+
+
+def train_best_model(X, params, model_path, cache_dir=MODEL_SEARCH_CACHE_DIR):
+    """Собирает Pipeline с CombinedVectorizer по параметрам (этапы берутся из кэша) и сохраняет его.
+
+    Аргументы:
+        X (pd.DataFrame): Обучающая выборка.
+        params (dict): Параметры CombinedVectorizer.
+        model_path (str): Путь для сохранения модели (.pkl).
+        cache_dir (str, optional): Директория кэша этапов на диске. По умолчанию `MODEL_SEARCH_CACHE_DIR`.
+
+    Возвращает:
+        Pipeline: Обученная модель.
+    """
+    start_time = time.time()
+    model = Pipeline([('vectorizer', StageCache(X, cache_dir=cache_dir).build_vectorizer(normalize_candidate_params(params)))])
+    os.makedirs(os.path.dirname(os.path.abspath(model_path)), exist_ok=True)
+    tmp_path = model_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(model, f)
+    os.replace(tmp_path, model_path)
+    print(f"💾 Лучшая модель сохранена по пути: {model_path} ({time.time() - start_time:.2f} секунд)")
+    return model
+
+
+def main():
+    """Запускает поиск гиперпараметров из командной строки и, при необходимости, обучает лучшую модель."""
+    from steam_library_analyzer import DF_PROCESSED_JSON_PATH, load_dataframe
+    from catalog_store import resolve_catalog_path
+    from catalog_embeddings import prepare_catalog_frame
+    from vectorizer import reduce_dataset
+
+    parser = argparse.ArgumentParser(description="Поиск гиперпараметров CombinedVectorizer с кэшированием этапов и возобновлением.")
+    parser.add_argument('--grid', type=str, required=True, help="JSON файл с сеткой параметров (словарь или список словарей, ключи с префиксом 'vectorizer__' или без).")
+    parser.add_argument('--results', type=str, required=True, help='CSV файл результатов (дописывается, оцененные конфигурации пропускаются).')
+    parser.add_argument('--data', type=str, default=resolve_catalog_path(DF_PROCESSED_JSON_PATH), help='Путь к обработанному датасету (.parquet или .json).')
+    parser.add_argument('--percentage', type=float, default=None, help='Доля датасета (самые популярные игры) для поиска, например 0.1.')
+    parser.add_argument('--workers', type=int, default=None, help='Количество процессов (по умолчанию число ядер).')
+    parser.add_argument('--cache-dir', type=str, default=MODEL_SEARCH_CACHE_DIR, help="Директория кэша этапов ('' - только в памяти).")
+    parser.add_argument('--probe-game', type=str, default=None, help='Название игры для контрольных рекомендаций в таблице результатов.')
+    parser.add_argument('--retry-failed', action='store_true', help='Повторно оценить конфигурации, завершившиеся ошибкой.')
+    parser.add_argument('--train-best', type=str, default=None, help='Путь для сохранения лучшей модели (.pkl) после поиска.')
+    parser.add_argument('--metric', type=str, default='coherence', choices=['coherence', 'topic_diversity', 'intra_topic_diversity'], help='Метрика выбора лучшей модели.')
+    args = parser.parse_args()
+
+    with open(args.grid, 'r', encoding='utf-8') as f:
+        param_grid = json.load(f)
+    X = load_dataframe(args.data)
+    if args.percentage is not None:
+        X = reduce_dataset(X, args.percentage)
+    if 'short_description_clean' not in X.columns:
+        prepare_catalog_frame(X)
+
+    cache_dir = args.cache_dir if args.cache_dir else None
+    results = run_search(X, param_grid, args.results, n_workers=args.workers, cache_dir=cache_dir, probe_game=args.probe_game, retry_failed=args.retry_failed)
+    if args.train_best:
+        best_params = select_best_params(results, args.metric)
+        print(f"🏆 Лучшие параметры по метрике {args.metric}: {best_params}")
+        train_best_model(X, best_params, args.train_best, cache_dir=cache_dir)
+
+
+if __name__ == '__main__':
+    main()
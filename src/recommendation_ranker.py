@@ -0,0 +1,143 @@
+import re
+import numpy as np
+import pandas as pd
+
+DEFAULT_TOP_K = 10
+DEFAULT_MIN_POSITIVE_RATIO = 0.7
+
+
+def process_game_name(name):
+    """Обрабатывает название игры для целей сравнения."""
+    if not isinstance(name, str):
+        return ""
+    name_lower = name.lower()
+    name_latin_only = re.sub(r'[^a-z0-9\s]', '', name_lower)
+    return name_latin_only
+
+
+def process_game_names(names):
+    """Векторизованный вариант `process_game_name` для pandas Series названий.
+
+    Возвращает:
+        np.ndarray: Массив обработанных названий (dtype object), "" для нестроковых значений.
+    """
+    is_str = names.map(lambda name: isinstance(name, str)).to_numpy(dtype=bool)
+    processed = np.full(len(names), "", dtype=object)
+    if is_str.any():
+        processed[is_str] = names[is_str].str.lower().str.replace(r'[^a-z0-9\s]', '', regex=True).to_numpy(dtype=object)
+    return processed
+
+
+class CatalogRanker:
+    """
+    Ранжирование игр каталога по массиву схожести без обращения к строкам pandas.
+
+    При создании один раз вычисляет для всего каталога массивы, нужные для фильтрации:
+    маску игр с `estimated_owners == 0`, долю положительных отзывов `positive / (positive + negative)`
+    и нормализованные названия. Запрос ранжирования применяет фильтры как маски массивов
+    и выбирает top-k через `np.argpartition`, поэтому стоимость не растет линейно с k.
+
+    Аргументы:
+        catalog_df (pd.DataFrame): DataFrame каталога с индексом `steam_id` и столбцами
+                                   'name', 'estimated_owners', 'positive', 'negative'.
+                                   Порядок строк должен совпадать с порядком матрицы векторов каталога.
+        min_positive_ratio (float, optional): Минимальная доля положительных отзывов по умолчанию. По умолчанию 0.7.
+        exclude_zero_owners (bool, optional): Исключать игры с нулевым числом владельцев по умолчанию. По умолчанию True.
+    """
+    def __init__(self, catalog_df, min_positive_ratio=DEFAULT_MIN_POSITIVE_RATIO, exclude_zero_owners=True):
+        self.steam_ids = catalog_df.index.to_numpy()
+        self.names = catalog_df['name'].to_numpy(dtype=object)
+        self.estimated_owners = catalog_df['estimated_owners'].to_numpy(dtype=object)
+        self.processed_names = process_game_names(catalog_df['name'])
+
+        owners = pd.to_numeric(catalog_df['estimated_owners'], errors='coerce').to_numpy(dtype=float)
+        self.zero_owners_mask = owners == 0
+
+        # Нечисловые значения отзывов (например, 'placeholder') не участвуют в фильтрации, как и игры без отзывов
+        positive = pd.to_numeric(catalog_df['positive'], errors='coerce').to_numpy(dtype=float)
+        negative = pd.to_numeric(catalog_df['negative'], errors='coerce').to_numpy(dtype=float)
+        total_reviews = positive + negative
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.positive_ratio = np.where(total_reviews > 0, positive / total_reviews, np.nan)
+
+        name_codes, unique_names = pd.factorize(self.processed_names)
+        order = np.argsort(name_codes, kind='stable')
+        boundaries = np.flatnonzero(np.diff(name_codes[order])) + 1
+        self._name_positions = dict(zip(unique_names, np.split(order, boundaries)))
+
+        self.min_positive_ratio = min_positive_ratio
+        self.exclude_zero_owners = exclude_zero_owners
+        self._eligible_masks = {}
+        self.eligible_mask(min_positive_ratio, exclude_zero_owners)
+
+    def __len__(self):
+        return len(self.steam_ids)
+
+    def eligible_mask(self, min_positive_ratio=None, exclude_zero_owners=None):
+        """Возвращает булеву маску игр каталога, проходящих фильтры по владельцам и отзывам.
+
+        Маски кэшируются по значениям порогов, поэтому повторные запросы с теми же параметрами бесплатны.
+
+        Аргументы:
+            min_positive_ratio (float, optional): Минимальная доля положительных отзывов (None - значение по умолчанию).
+            exclude_zero_owners (bool, optional): Исключать игры с нулевым числом владельцев (None - значение по умолчанию).
+
+        Возвращает:
+            np.ndarray: Булева маска длины каталога.
+        """
+        min_positive_ratio = self.min_positive_ratio if min_positive_ratio is None else min_positive_ratio
+        exclude_zero_owners = self.exclude_zero_owners if exclude_zero_owners is None else exclude_zero_owners
+        key = (float(min_positive_ratio), bool(exclude_zero_owners))
+        mask = self._eligible_masks.get(key)
+        if mask is None:
+            mask = ~(self.positive_ratio < min_positive_ratio)
+            if exclude_zero_owners:
+                mask &= ~self.zero_owners_mask
+            mask.setflags(write=False)
+            self._eligible_masks[key] = mask
+        return mask
+
+    def rank(self, similarities, exclude_names=(), top_k=DEFAULT_TOP_K, min_positive_ratio=None, exclude_zero_owners=None):
+        """Выбирает top-k игр каталога с наибольшей схожестью, прошедших фильтры.
+
+        Аргументы:
+            similarities (np.ndarray): Массив схожести длины каталога.
+            exclude_names (iterable, optional): Обработанные (`process_game_name`) названия входных игр,
+                                                которые исключаются из рекомендаций.
+            top_k (int, optional): Количество рекомендаций. По умолчанию 10.
+            min_positive_ratio (float, optional): Минимальная доля положительных отзывов (None - значение по умолчанию).
+            exclude_zero_owners (bool, optional): Исключать игры с нулевым числом владельцев (None - значение по умолчанию).
+
+        Возвращает:
+            list: Список словарей рекомендаций ('name', 'estimated_owners', 'steam_id', 'similarity_score'),
+                  отсортированный по убыванию схожести.
+        """
+        similarities = np.asarray(similarities).ravel()
+        if similarities.shape[0] != len(self):
+            raise ValueError(f"❌ Длина массива схожести не совпадает с каталогом: {similarities.shape[0]} vs {len(self)}")
+        if top_k <= 0:
+            return []
+
+        valid = self.eligible_mask(min_positive_ratio, exclude_zero_owners) & np.isfinite(similarities)
+        scores = np.where(valid, similarities, -np.inf)
+        for name in set(exclude_names):
+            positions = self._name_positions.get(name)
+            if positions is not None:
+                scores[positions] = -np.inf
+
+        n_candidates = int(np.count_nonzero(scores > -np.inf))
+        k = min(top_k, n_candidates)
+        if k == 0:
+            return []
+        top_indices = np.argpartition(-scores, k - 1)[:k]
+        top_indices = top_indices[np.argsort(-scores[top_indices], kind='stable')]
+
+        return [
+            {
+                "name": self.names[i],
+                "estimated_owners": self.estimated_owners[i],
+                "steam_id": self.steam_ids[i],
+                "similarity_score": float(scores[i])
+            }
+            for i in top_indices
+        ]
@@ -0,0 +1,212 @@
+import os
+import copy
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from cachetools import LRUCache
+
+from instrumentation import get_logger
+from metrics import REGISTRY, METRICS_PREFIX
+
+DEFAULT_RESULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache', 'recommendation_cache.sqlite')
+# Пустое значение - результаты хранятся только в памяти процесса
+RECOMMENDATION_CACHE_PATH = os.getenv("RECOMMENDATION_CACHE_PATH", DEFAULT_RESULT_CACHE_PATH)
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "4096")) # Максимальное количество результатов в памяти
+RECOMMENDATION_CACHE_ENABLED = os.getenv("RECOMMENDATION_CACHE", "1") != "0" # "0" отключает кэш рекомендаций
+
+logger = get_logger('result_cache')
+
+RESULT_CACHE_LOOKUPS = REGISTRY.counter(
+    METRICS_PREFIX + 'result_cache_lookups_total', "Обращения к кэшу рекомендаций ('memory', 'disk' или 'miss').", ('result',))
+
+
+def _json_default(value):
+    """Приводит значения numpy в результатах ранжирования к типам JSON."""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+def result_version(catalog_meta, index_meta=None, catalog_path=None):
+    """Возвращает версию результатов ранжирования: отпечаток модели, векторов каталога, индекса и файла каталога.
+
+    Замена модели, пересборка каталога или индекса и изменение файла каталога (например, обновленные отзывы,
+    по которым фильтрует `CatalogRanker`) меняют версию, поэтому сохраненные ранее результаты больше не находятся.
+
+    Аргументы:
+        catalog_meta (dict): Метаданные `CatalogEmbeddings` ('model_fingerprint', 'created_at', 'n_items').
+        index_meta (dict, optional): Метаданные индекса поиска ('kind', 'n_probe'). По умолчанию None.
+        catalog_path (str, optional): Путь к файлу каталога; учитываются его размер и время изменения. По умолчанию None.
+
+    Возвращает:
+        str: Шестнадцатеричный отпечаток версии (16 символов).
+    """
+    index_meta = index_meta or {}
+    parts = {
+        'model_fingerprint': catalog_meta.get('model_fingerprint'),
+        'catalog_created_at': catalog_meta.get('created_at'),
+        'n_items': catalog_meta.get('n_items'),
+        'index_kind': index_meta.get('kind'),
+        'n_probe': index_meta.get('n_probe'),
+    }
+    if catalog_path and os.path.exists(catalog_path):
+        stat = os.stat(catalog_path)
+        parts['catalog_file'] = [stat.st_size, int(stat.st_mtime)]
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def make_result_key(games_data, combination_method, top_k, min_positive_ratio, exclude_zero_owners, block_weights, version):
+    """Формирует ключ кэша результата `calculate_similarity_and_rank`.
+
+    Ключ состоит из отсортированного множества app id входных игр, метода комбинирования, параметров фильтрации,
+    весов блоков и версии модели и каталога (`result_version`), поэтому порядок и повторы игр на ключ не влияют.
+
+    Аргументы:
+        games_data (list): Словари входных игр с ключом 'steam_id' или 'appid'.
+        combination_method (str): Метод комбинирования векторов.
+        top_k (int): Количество рекомендаций.
+        min_positive_ratio (float): Минимальная доля положительных отзывов.
+        exclude_zero_owners (bool): Исключать ли игры без владельцев.
+        block_weights (dict или None): Веса блоков признаков.
+        version (str): Версия модели и каталога.
+
+    Возвращает:
+        str или None: Ключ кэша или None, если у какой-либо игры нет app id (такой результат не кэшируется).
+    """
+    app_ids = set()
+    for game in games_data:
+        app_id = game.get('steam_id', game.get('appid'))
+        if app_id is None or (isinstance(app_id, float) and np.isnan(app_id)):
+            return None
+        app_ids.add(str(int(app_id)) if isinstance(app_id, (int, np.integer, float, np.floating)) else str(app_id))
+    if not app_ids:
+        return None
+    key = {
+        'app_ids': sorted(app_ids),
+        'method': combination_method,
+        'top_k': int(top_k),
+        'min_positive_ratio': float(min_positive_ratio),
+        'exclude_zero_owners': bool(exclude_zero_owners),
+        'block_weights': sorted((str(name), float(weight)) for name, weight in block_weights.items()) if block_weights else None,
+    }
+    return f"{version}:{json.dumps(key, sort_keys=True, ensure_ascii=False)}"
+
+
+class RecommendationCache:
+    """
+    Кэш результатов ранжирования (вывод `calculate_similarity_and_rank`).
+
+    Первый уровень - LRU в памяти процесса с ограниченным количеством записей, второй (необязательный) -
+    таблица SQLite, которая переживает перезапуск сервиса. Ключ содержит версию модели и каталога
+    (`make_result_key`), поэтому после замены модели старые записи не находятся, а `purge_other_versions`
+    удаляет их с диска. Возвращаются копии сохраненных результатов. Потокобезопасен.
+
+    Аргументы:
+        path (str, optional): Путь к файлу SQLite. None - только кэш в памяти. По умолчанию None.
+        memory_size (int, optional): Максимальное количество результатов в памяти. По умолчанию 4096.
+    """
+    def __init__(self, path=None, memory_size=4096):
+        self.path = path
+        self.memory = LRUCache(maxsize=memory_size)
+        self.lock = threading.Lock()
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0}
+        self.connection = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, version TEXT NOT NULL, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self.connection.commit()
+
+    def __len__(self):
+        return len(self.memory)
+
+    def get(self, key):
+        """Возвращает копию сохраненного результата или None, если его нет."""
+        with self.lock:
+            value = self.memory.get(key)
+            result = 'memory'
+            if value is None and self.connection is not None:
+                row = self.connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self.memory[key] = value
+                    result = 'disk'
+            if value is None:
+                result = 'miss'
+            self.counters['misses' if result == 'miss' else f'{result}_hits'] += 1
+        RESULT_CACHE_LOOKUPS.inc(result=result)
+        return copy.deepcopy(value) if value is not None else None
+
+    def set(self, key, value):
+        """Сохраняет копию результата в память и, если задан путь, в SQLite (версия - префикс ключа до ':')."""
+        value = copy.deepcopy(value)
+        with self.lock:
+            self.memory[key] = value
+            if self.connection is not None:
+                try:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO results (key, version, value, created_at) VALUES (?, ?, ?, ?)",
+                        (key, key.split(':', 1)[0], json.dumps(value, ensure_ascii=False, default=_json_default), time.time())
+                    )
+                    self.connection.commit()
+                except (sqlite3.Error, TypeError) as e:
+                    logger.warning("⚠️ Не удалось сохранить результат в кэш рекомендаций на диске: %s", e)
+            self.counters['stores'] += 1
+
+    def purge_other_versions(self, version):
+        """Удаляет из памяти и SQLite результаты всех версий, кроме `version`. Возвращает количество удаленных записей на диске."""
+        with self.lock:
+            for key in [key for key in self.memory if not key.startswith(f"{version}:")]:
+                del self.memory[key]
+            if self.connection is None:
+                return 0
+            deleted = self.connection.execute("DELETE FROM results WHERE version != ?", (version,)).rowcount
+            self.connection.commit()
+        return deleted
+
+    def clear(self):
+        """Удаляет все результаты из памяти и SQLite."""
+        with self.lock:
+            self.memory.clear()
+            if self.connection is not None:
+                self.connection.execute("DELETE FROM results")
+                self.connection.commit()
+
+    def stats(self):
+        """Возвращает счетчики попаданий, промахов и сохранений, а также долю попаданий."""
+        with self.lock:
+            stats = dict(self.counters)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_ratio'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def close(self):
+        """Закрывает соединение с SQLite."""
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+def create_result_cache():
+    """Создает кэш рекомендаций по переменным окружения или возвращает None, если он отключен (`RECOMMENDATION_CACHE=0`).
+
+    При ошибке открытия файла SQLite (`RECOMMENDATION_CACHE_PATH`) используется кэш только в памяти.
+    """
+    if not RECOMMENDATION_CACHE_ENABLED:
+        return None
+    try:
+        return RecommendationCache(RECOMMENDATION_CACHE_PATH or None, memory_size=RECOMMENDATION_CACHE_SIZE)
+    except sqlite3.Error as e:
+        logger.warning("⚠️ Не удалось открыть кэш рекомендаций (%s). Используется кэш только в памяти.", e)
+        return RecommendationCache(memory_size=RECOMMENDATION_CACHE_SIZE)
@@ -1,11 +1,70 @@
 import os
+import time
+import random
+import threading
 import requests
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
-from steam_constants import all_api_requests
+from steam_constants import all_api_requests, api_rate_limits, api_client_settings, api_negative_cache_ttl
+from api_cache import get_default_cache, make_cache_key, get_cache_ttl, is_failed_lookup
+from instrumentation import get_logger, span, propagate_context
+from metrics import API_REQUESTS, API_LATENCY, API_CACHE
 
 load_dotenv()
 
 STEAM_API_KEY = os.getenv("STEAM_API_KEY")
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+logger = get_logger('steam_api_client')
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов по алгоритму token bucket.
+
+    Запас токенов пополняется со скоростью `rate` в секунду до `capacity`, каждый запрос забирает один токен.
+    При пустом запасе `acquire` ждет появления токена. Потокобезопасен.
+
+    Аргументы:
+        rate (float): Скорость пополнения (запросов в секунду).
+        capacity (int): Максимальный запас токенов (допустимый всплеск запросов).
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Забирает один токен, при необходимости ожидая его появления."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(host):
+    """Возвращает общий для процесса TokenBucket хоста (лимиты из `api_rate_limits`) или None, если лимит не задан."""
+    limits = api_rate_limits.get(host)
+    if not limits:
+        return None
+    with _rate_limiters_lock:
+        if host not in _rate_limiters:
+            _rate_limiters[host] = TokenBucket(limits['rate'], limits['capacity'])
+        return _rate_limiters[host]
 
 class ApiClient:
     """
@@ -14,8 +73,16 @@ class ApiClient:
     Инициализирует клиент API, позволяющий отправлять запросы к различным эндпоинтам
     Steam Web API и SteamSpy API, используя конфигурации, определенные в steam_constants.py.
     Обеспечивает обработку ответов API и ошибок.
+
+    Запросы выполняются через общую `requests.Session` с пулом соединений, с таймаутами,
+    ограничением частоты по хостам (`api_rate_limits`) и повторными попытками с экспоненциальной
+    задержкой со случайным разбросом при ответах 429/5xx и сетевых ошибках. Клиент потокобезопасен,
+    `fetch_many` выполняет пакет запросов параллельно.
+
+    Ответы GET-запросов кэшируются в `ResponseCache` (см. `api_cache.py`) с TTL из `api_cache_ttls`;
+    ответы об отсутствии данных кэшируются на `api_negative_cache_ttl`, временные ошибки не кэшируются.
     """
-    def __init__(self, api_name):
+    def __init__(self, api_name, timeout=None, max_retries=None, max_workers=None, use_cache=True, cache=None):
         """
         Инициализирует ApiClient для указанного имени API.
 
@@ -23,9 +90,61 @@ class ApiClient:
             api_name (str): Имя API, для которого создается клиент.
                             Должно соответствовать ключу верхнего уровня в словаре `all_api_requests`
                             в файле `steam_constants.py` (например, 'steam_web_api' или 'steamspy_api').
+            timeout (tuple или float, optional): Таймаут запроса (соединение, чтение) в секундах. По умолчанию из `api_client_settings`.
+            max_retries (int, optional): Количество повторных попыток. По умолчанию из `api_client_settings`.
+            max_workers (int, optional): Количество потоков `fetch_many`. По умолчанию из `api_client_settings`.
+            use_cache (bool, optional): Использовать кэш ответов. По умолчанию True.
+            cache (ResponseCache, optional): Кэш ответов. По умолчанию общий кэш процесса (`get_default_cache`).
         """
         self.api_name = api_name
         self.api_requests = all_api_requests.get(api_name, {})
+        self.timeout = timeout if timeout is not None else api_client_settings['timeout']
+        self.max_retries = max_retries if max_retries is not None else api_client_settings['max_retries']
+        self.max_workers = max_workers if max_workers else api_client_settings['max_workers']
+        self.backoff_base = api_client_settings['backoff_base']
+        self.backoff_max = api_client_settings['backoff_max']
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=api_client_settings['pool_connections'], pool_maxsize=api_client_settings['pool_maxsize'])
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.cache = (cache if cache is not None else get_default_cache()) if use_cache else None
+
+    def _backoff_delay(self, attempt, response=None):
+        """Возвращает задержку перед повторной попыткой: Retry-After ответа 429 или экспоненциальная задержка со случайным разбросом."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _send(self, url, params, method):
+        """Отправляет HTTP-запрос с учетом лимита хоста, повторяя его при ответах 429/5xx и сетевых ошибках.
+
+        Время запроса вместе с ожиданием лимита и повторами сохраняется в интервал трассировки 'api.request'.
+        """
+        host = urlparse(url).hostname
+        rate_limiter = get_rate_limiter(host)
+        with span('api.request', api=self.api_name, host=host, path=urlparse(url).path) as fields:
+            for attempt in range(self.max_retries + 1):
+                fields['attempts'] = attempt + 1
+                if rate_limiter is not None:
+                    rate_limiter.acquire()
+                try:
+                    response = self.session.request(method, url, params=params, timeout=self.timeout)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    if attempt == self.max_retries:
+                        fields['status'] = type(e).__name__
+                        raise
+                    logger.debug("🔁 Повтор запроса %s после ошибки: %s", host, type(e).__name__)
+                    time.sleep(self._backoff_delay(attempt))
+                    continue
+                fields['status'] = response.status_code
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    logger.debug("🔁 Повтор запроса %s после ответа %s", host, response.status_code)
+                    time.sleep(self._backoff_delay(attempt, response))
+                    continue
+                return response
 
     def _check_api_request(self, url, params=None, method='GET'):
         """Выполняет HTTP-запрос к API и обрабатывает ответ.
@@ -46,10 +165,8 @@ class ApiClient:
                 - 'error' (str или None): Описание ошибки, если произошла ошибка при выполнении запроса или парсинге ответа, иначе None.
         """
         try:
-            if method.upper() == 'GET':
-                response = requests.get(url, params=params)
-            elif method.upper() == 'POST':
-                response = requests.post(url, params=params)
+            if method.upper() in ('GET', 'POST'):
+                response = self._send(url, params, method.upper())
             else:
                 return {
                     'status_code': None,
@@ -78,6 +195,12 @@ class ApiClient:
                 'error': None
             }
 
+        except requests.exceptions.HTTPError as e:
+            return {
+                'status_code': e.response.status_code if e.response is not None else None,
+                'response_json': None,
+                'error': str(e)
+            }
         except requests.exceptions.RequestException as e:
             return {
                 'status_code': None,
@@ -111,12 +234,52 @@ class ApiClient:
       url = request_info['url']
       method = request_info['method']
 
+      params = dict(request_info.get('default_params', {}))
       if request_params:
-        params = request_params
-      else:
-        params = {}
+        params.update(request_params)
 
       if self.api_name == 'steam_web_api' and 'key' not in params:
         params['key'] = STEAM_API_KEY
 
-      return self._check_api_request(url, params=params, method=method)
\ No newline at end of file
+      cache_ttl = get_cache_ttl(self.api_name, request_name) if self.cache is not None and method.upper() == 'GET' else None
+      if cache_ttl:
+        cache_key = make_cache_key(self.api_name, request_name, params)
+        cached_response = self.cache.get(cache_key)
+        API_CACHE.inc(api=self.api_name, endpoint=request_name, result='hit' if cached_response is not None else 'miss')
+        if cached_response is not None:
+          return cached_response
+
+      start_time = time.perf_counter()
+      response = self._check_api_request(url, params=params, method=method)
+      API_LATENCY.observe(time.perf_counter() - start_time, api=self.api_name, endpoint=request_name)
+      API_REQUESTS.inc(api=self.api_name, endpoint=request_name, status=response['status_code'] or 'error')
+
+      if cache_ttl:
+        if is_failed_lookup(response):
+          self.cache.set(cache_key, response, api_negative_cache_ttl)
+        elif response['error'] is None:
+          self.cache.set(cache_key, response, cache_ttl)
+      return response
+
+    def fetch_many(self, request_name, params_list, max_workers=None):
+      """Параллельно выполняет пакет однотипных API-запросов.
+
+      Запросы выполняются в пуле потоков через общий пул соединений; частота запросов
+      к каждому хосту по-прежнему ограничивается `api_rate_limits`.
+
+      Аргументы:
+          request_name (str): Название запроса API, определенное в `steam_constants.py`.
+          params_list (list): Список словарей параметров, по одному на запрос.
+          max_workers (int, optional): Количество потоков. По умолчанию `self.max_workers`.
+
+      Возвращает:
+          list: Результаты `make_request` в порядке `params_list`.
+      """
+      if not params_list:
+        return []
+      max_workers = min(max_workers if max_workers else self.max_workers, len(params_list))
+      if max_workers == 1:
+        return [self.make_request(request_name, dict(params)) for params in params_list]
+      # Задачи выполняются в контексте запроса, чтобы интервалы 'api.request' попали в его трассировку
+      with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(propagate_context(lambda params: self.make_request(request_name, dict(params))), params_list))
\ No newline at end of file
@@ -1,10 +1,13 @@
 import os
 from dotenv import load_dotenv
 from steam_api_client import ApiClient
+from instrumentation import get_logger
 
 load_dotenv()
 STEAM_API_KEY = os.getenv("STEAM_API_KEY")
 
+logger = get_logger('steam_api_parser')
+
 class ApiParser:
     """
     Класс для парсинга данных из Steam API и SteamSpy API.
@@ -35,14 +38,14 @@ class ApiParser:
             str или None: Steam ID пользователя в виде строки, если преобразование успешно,
                          иначе None, если vanity URL не найден или произошла ошибка.
 
-        Выводит в консоль информационные сообщения о начале запроса и полученном результате.
+        Пишет в лог (уровень DEBUG) начало запроса и статус ответа.
         """
-        print(f"⚙️ Запрос на преобразование vanity URL: {vanity_url}...")
+        logger.debug("⚙️ Запрос на преобразование vanity URL: %s...", vanity_url)
         response = self.steam_web_api_client.make_request(
             request_name="resolve_vanity_url",
             request_params={"vanityurl": vanity_url}
         )
-        print(f"✅ Результат преобразования vanity URL: {response}")
+        logger.debug("✅ Результат преобразования vanity URL: статус %s, ошибка: %s", response["status_code"], response["error"])
         if response["error"] is None and response["response_json"] and response["response_json"]["response"]["success"] == 1:
             return response["response_json"]["response"]["steamid"]
         else:
@@ -62,9 +65,9 @@ class ApiParser:
                   Возвращает пустой список, если Steam ID не найден или произошла ошибка.
                   Каждый словарь может содержать ключи, такие как 'appid', 'name', 'playtime_forever' и др.
 
-        Выводит в консоль информационные сообщения о начале запроса и полученном результате.
+        Пишет в лог (уровень DEBUG) начало запроса.
         """
-        print(f"⚙️ Запрос списка игр пользователя Steam ID: {steam_id}...")
+        logger.debug("⚙️ Запрос списка игр пользователя Steam ID: %s...", steam_id)
         response = self.steam_web_api_client.make_request(
             request_name="get_owned_games",
              request_params={
@@ -77,4 +80,43 @@ class ApiParser:
         if response["error"] is None and response["response_json"]:
             return response["response_json"].get("response", {}).get("games", [])
         else:
-            return []
\ No newline at end of file
+            return []
+
+    def get_store_app_details_many(self, app_ids):
+        """Параллельно получает данные приложений из Steam Store API.
+
+        Аргументы:
+            app_ids (list): Список ID приложений.
+
+        Возвращает:
+            dict: Словарь {app_id: данные приложения ('data' ответа appdetails) или None, если данные не получены}.
+        """
+        responses = self.steam_web_api_client.fetch_many(
+            "get_app_details",
+            [{"appids": app_id} for app_id in app_ids]
+        )
+        app_details = {}
+        for app_id, response in zip(app_ids, responses):
+            app_data = None
+            if response["error"] is None and response["response_json"]:
+                app_data = response["response_json"].get(str(app_id), {}).get("data")
+            app_details[app_id] = app_data
+        return app_details
+
+    def get_steamspy_app_details_many(self, app_ids):
+        """Параллельно получает данные приложений из SteamSpy API.
+
+        Аргументы:
+            app_ids (list): Список ID приложений.
+
+        Возвращает:
+            dict: Словарь {app_id: ответ SteamSpy или None, если данные не получены}.
+        """
+        responses = self.steamspy_api_client.fetch_many(
+            "get_app_details",
+            [{"appid": app_id} for app_id in app_ids]
+        )
+        return {
+            app_id: response["response_json"] if response["error"] is None and response["response_json"] else None
+            for app_id, response in zip(app_ids, responses)
+        }
\ No newline at end of file
@@ -44,6 +44,9 @@ all_api_requests = {
                "request": "Всегда 'appdetails' (обязательный)",
                "appid": "ID приложения (обязательный)"
             },
+            "default_params": {
+                "request": "appdetails"
+            },
             "description": "Получение дополнительной информации об игре."
         }
     }
@@ -60,4 +63,58 @@ all_api_requests = {
 
 Этот словарь служит централизованным хранилищем конфигураций для взаимодействия с различными API,
 облегчая поддержку и модификацию API запросов в рамках проекта.
+
+Необязательный ключ `default_params` задает параметры, которые всегда добавляются к запросу.
+"""
+
+api_rate_limits = {
+    "store.steampowered.com": {"rate": 200 / 300, "capacity": 40},
+    "api.steampowered.com": {"rate": 10, "capacity": 20},
+    "steamspy.com": {"rate": 1, "capacity": 4}
+}
+"""
+Ограничения частоты запросов по хостам для `TokenBucket` в `steam_api_client.py`:
+    - `rate`: Скорость пополнения токенов (запросов в секунду). Steam Store допускает около 200 запросов за 5 минут с одного IP,
+      SteamSpy - около 1 запроса в секунду.
+    - `capacity`: Допустимый всплеск запросов.
+Хосты, отсутствующие в словаре, не ограничиваются.
+"""
+
+api_client_settings = {
+    "timeout": (3.05, 15),
+    "max_retries": 3,
+    "backoff_base": 0.5,
+    "backoff_max": 10,
+    "pool_connections": 4,
+    "pool_maxsize": 16,
+    "max_workers": 8
+}
+"""
+Настройки HTTP-клиента `ApiClient`:
+    - `timeout`: Таймаут (соединение, чтение) в секундах.
+    - `max_retries`: Количество повторных попыток при ответах 429/5xx и сетевых ошибках.
+    - `backoff_base`, `backoff_max`: Базовая и максимальная задержка между попытками в секундах.
+    - `pool_connections`, `pool_maxsize`: Параметры пула соединений `HTTPAdapter`.
+    - `max_workers`: Количество потоков для параллельных запросов `fetch_many`.
+"""
+
+api_cache_ttls = {
+    "steam_web_api": {
+        "get_app_list": 24 * 60 * 60,
+        "resolve_vanity_url": 24 * 60 * 60,
+        "get_owned_games": 10 * 60,
+        "get_app_details": 7 * 24 * 60 * 60
+    },
+    "steamspy_api": {
+        "get_app_details": 24 * 60 * 60
+    }
+}
+"""
+Время хранения ответов API в кэше (`api_cache.py`) в секундах по запросам.
+Запросы, отсутствующие в словаре, не кэшируются.
+"""
+
+api_negative_cache_ttl = 60 * 60
+"""
+Время хранения в кэше ответов об отсутствии данных (404, `success: false`) в секундах.
 """
\ No newline at end of file
@@ -4,9 +4,9 @@ import sys
 import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
-from sklearn.metrics.pairwise import cosine_similarity
 import pickle
 import time
+import threading
 import argparse # Импортируем argparse для обработки аргументов командной строки
 
 import warnings
@@ -20,56 +20,82 @@ if os.path.dirname(current_dir) not in sys.path:
 from steam_api_parser import ApiParser
 from steam_library_grouper import group_user_games
 from steam_constants import all_api_requests
-from vectorizer import CombinedVectorizer, clean_text
-from dataset_cleaner import DataCleaner
+from vectorizer import CombinedVectorizer, clean_text, convert_model_to_cpu, disable_debug_vectors, as_dense_vectors, GPU_AVAILABLE
+from dataset_cleaner import DataCleaner, REJECTION_REASONS
+from catalog_embeddings import load_or_build_catalog_embeddings, get_catalog_dir
+from catalog_store import CatalogStore, load_catalog_frame, resolve_catalog_path
+from enrichment_store import EnrichmentStore
+from vector_index import load_or_build_vector_index
+from recommendation_ranker import CatalogRanker, process_game_name, DEFAULT_TOP_K, DEFAULT_MIN_POSITIVE_RATIO
+from instrumentation import get_logger, span, configure_logging
+from metrics import CATALOG_LOOKUPS, MODEL_INFO
+from micro_batch_scorer import MicroBatchScorer
+from result_cache import create_result_cache, make_result_key, result_version
 
 load_dotenv()
 
-MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'latest_model_approved.pkl')
+# Путь к модели (.pkl); относительный путь отсчитывается от каталога src, например 'models/latest_model_approved_cpu.pkl'
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.getenv("MODEL_PATH", os.path.join('models', 'latest_model_approved.pkl')))
 DF_PROCESSED_JSON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'processed', 'steam_games_data.json')
 STEAM_USER_URL = os.getenv("STEAM_USER_URL") # Будет использоваться, если не указан аргумент командной строки
+VECTOR_INDEX_KIND = os.getenv("VECTOR_INDEX_KIND", "exact") # 'exact' или 'ivf' (приближенный поиск)
+VECTOR_INDEX_N_PROBE = int(os.getenv("VECTOR_INDEX_N_PROBE", "8")) # Количество сканируемых кластеров для 'ivf'
+SCORING_MAX_BATCH_SIZE = int(os.getenv("SCORING_MAX_BATCH_SIZE", "32")) # Запросов в пакете расчета схожести (1 - без пакетов)
+SCORING_MAX_WAIT_MS = float(os.getenv("SCORING_MAX_WAIT_MS", "2")) # Время сбора пакета одновременных запросов, мс
+
+logger = get_logger('steam_library_analyzer')
 
 def load_model(model_path):
-    """Загружает предварительно обученную модель из указанного файла."""
+    """Загружает предварительно обученную модель из указанного файла.
+
+    Без GPU модель переводится на CPU-бэкенд (sklearn), чтобы трансформация не требовала cupy/cuml.
+    Модель, сохраненную на GPU, для такого сервера нужно заранее сконвертировать: `python3 vectorizer.py <gpu.pkl> <cpu.pkl>`.
+    Отладочные копии векторов transform сервису не нужны и отключаются.
+    """
     with open(model_path, 'rb') as f:
-        return pickle.load(f)
-
-def load_dataframe(df_path):
-    """Загружает DataFrame из JSON файла и обрабатывает индекс."""
-    df = pd.read_json(df_path)
-    if 'steam_id' in df.index.names:
-        df['steam_id'] = df.index
-        df = df.reset_index(drop=True)
-        df = df.set_index('steam_id')
-    else:
-        if df.index.is_numeric():
-            df['steam_id'] = df.index.astype(int)
-            df = df.reset_index(drop=True)
-            df = df.set_index('steam_id')
-    return df
-
-def process_game_name(name):
-    """Обрабатывает название игры для целей сравнения."""
-    if not isinstance(name, str):
-        return ""
-    name_lower = name.lower()
-    name_latin_only = re.sub(r'[^a-z0-9\s]', '', name_lower)
-    return name_latin_only
-
-def calculate_similarity_and_rank(self, games_data, combination_method='average'):
-    """Вычисляет косинусную схожесть и ранжирует игры на основе комбинированных векторов."""
+        model = pickle.load(f)
+    if not GPU_AVAILABLE:
+        convert_model_to_cpu(model)
+    disable_debug_vectors(model)
+    return model
+
+def load_dataframe(df_path, columns=None):
+    """Загружает DataFrame из JSON или Parquet файла (только указанные столбцы) и обрабатывает индекс."""
+    return load_catalog_frame(df_path, columns=columns)
+
+def calculate_similarity_and_rank(self, games_data, combination_method='average', top_k=DEFAULT_TOP_K,
+                                  min_positive_ratio=DEFAULT_MIN_POSITIVE_RATIO, exclude_zero_owners=True, block_weights=None):
+    """Вычисляет косинусную схожесть и ранжирует игры на основе комбинированных векторов.
+
+    Аргументы:
+        games_data (list): Список словарей с данными входных игр.
+        combination_method (str, optional): Метод комбинирования векторов ('average' или 'sum'). По умолчанию 'average'.
+        top_k (int, optional): Количество рекомендаций. По умолчанию 10.
+        min_positive_ratio (float, optional): Минимальная доля положительных отзывов рекомендуемой игры. По умолчанию 0.7.
+        exclude_zero_owners (bool, optional): Исключать игры с нулевым числом владельцев. По умолчанию True.
+        block_weights (dict, optional): Веса блоков признаков {'owners', 'tags', 'description': вес} для взвешенного
+                                        косинусного сходства (см. `CatalogEmbeddings.weighted_similarities`).
+                                        По умолчанию None (обычное сходство через индекс поиска).
+
+    Результат сохраняется в кэше рекомендаций (`self.result_cache`, см. `RecommendationCache`) по множеству app id
+    входных игр, методу, параметрам фильтрации и версии модели и каталога; повторный запрос возвращается из кэша.
+    """
     if not games_data:
         return []
 
-    print(f"\n--- ⚙️ Метод calculate_similarity_and_rank: {combination_method} ---")
-
-    train_vectors = self.model.transform(self.train_df)
+    cache_key = None
+    if self.result_cache is not None:
+        cache_key = make_result_key(games_data, combination_method, top_k, min_positive_ratio, exclude_zero_owners,
+                                    block_weights, self.result_cache_version)
+        cached_group = self.result_cache.get(cache_key) if cache_key is not None else None
+        if cached_group is not None:
+            logger.debug("♻️ Результат calculate_similarity_and_rank взят из кэша рекомендаций")
+            return cached_group
 
-    new_df = pd.DataFrame(games_data)
-    new_df['short_description_clean'] = new_df['short_description'].apply(clean_text)
-    new_df['steam_id'] = [game.get('appid') for game in games_data]
+    logger.debug("⚙️ Метод calculate_similarity_and_rank: %s, игр: %d", combination_method, len(games_data))
 
-    game_vectors = self.model.transform(new_df)
+    with span('rank.game_vectors', n_games=len(games_data)):
+        game_vectors = self.get_game_vectors(games_data)
 
     if combination_method == 'average':
         combined_game_vector = np.mean(game_vectors, axis=0).reshape(1, -1)
@@ -80,55 +106,25 @@ def calculate_similarity_and_rank(self, games_data, combination_method='average'
     else:
         raise ValueError(f"❌ Неизвестный метод комбинирования: {combination_method}")
 
-    similarities = cosine_similarity(combined_game_vector, train_vectors)
-    game_similarities = similarities[0]
-    ranked_indices = np.argsort(game_similarities)[::-1]
-
-    game_recommendations = []
-
-    input_game_names_processed = {process_game_name(game_data.get('name')) for game_data in games_data if 'name' in game_data}
-    print(f"🐞 input_game_names_processed: {input_game_names_processed}")
-
-    for j in ranked_indices:
-        recommended_game = self.train_df.iloc[j]
-        recommended_game_name = recommended_game['name']
-        recommended_game_name_processed = process_game_name(recommended_game_name)
-
-        print(f"🤔 Рассматриваем рекомендацию: Название: {recommended_game_name}, Processed Name: {recommended_game_name_processed}")
-
-        if recommended_game_name_processed in input_game_names_processed:
-            print(f"🚫 Исключена игра: {recommended_game_name} (processed name: {recommended_game_name_processed}) так как она есть во входной группе.")
-            continue
+    with span('rank.similarity', weighted=bool(block_weights)):
+        if block_weights:
+            game_similarities = self.catalog_embeddings.weighted_similarities(combined_game_vector[0], block_weights)
+        elif self.scorer is not None:
+            # Одновременные запросы считаются одним матричным произведением (см. MicroBatchScorer)
+            game_similarities = self.scorer.similarities(combined_game_vector[0])
         else:
-            print(f"🔍 Проверка имени: '{recommended_game_name_processed}' не в '{input_game_names_processed}' - игра НЕ из входной группы.")
-
-        estimated_owners = recommended_game['estimated_owners']
-        positive = recommended_game['positive']
-        negative = recommended_game['negative']
-
-        if estimated_owners == 0:
-            print(f"🚫 Исключена игра: {recommended_game_name} (steam_id: {recommended_game.name}) из-за estimated_owners == 0.")
-            continue
-
-        if isinstance(positive, (int, float)) and isinstance(negative, (int, float)):
-            total_reviews = positive + negative
-            if total_reviews > 0:
-                positive_ratio = positive / total_reviews
-                if positive_ratio < 0.7:
-                    print(f"🚫 Исключена игра: {recommended_game_name} (steam_id: {recommended_game.name}) из-за positive_ratio < 0.7 ({positive_ratio:.2f}).")
-                    continue
-
-        if len(game_recommendations) < 10:
-            game_recommendations.append(
-                {
-                    "name": recommended_game_name,
-                    "estimated_owners": estimated_owners,
-                    "steam_id": recommended_game.name,
-                    "similarity_score": game_similarities[j]
-                }
-            )
-        if len(game_recommendations) >= 10:
-            break
+            game_similarities = self.vector_index.similarities(combined_game_vector[0])
+
+    with span('rank.ranking', top_k=top_k):
+        input_game_names_processed = {process_game_name(game_data.get('name')) for game_data in games_data if 'name' in game_data}
+        game_recommendations = self.ranker.rank(
+            game_similarities,
+            exclude_names=input_game_names_processed,
+            top_k=top_k,
+            min_positive_ratio=min_positive_ratio,
+            exclude_zero_owners=exclude_zero_owners
+        )
+    logger.debug("✅ Отобрано рекомендаций: %d (top_k=%d)", len(game_recommendations), top_k)
 
     scores = [d['similarity_score'] for d in game_recommendations]
     median_similarity = np.median(scores) if scores else 0
@@ -139,9 +135,32 @@ def calculate_similarity_and_rank(self, games_data, combination_method='average'
         "median_similarity": median_similarity,
         "combination_method": method_name
     }
+    if cache_key is not None:
+        self.result_cache.set(cache_key, ranked_game_group)
     return ranked_game_group
 
 
+_shared_analyzer = None
+_shared_analyzer_lock = threading.Lock()
+
+
+def get_shared_analyzer():
+    """Возвращает общий для процесса экземпляр LibraryAnalyzer.
+
+    Экземпляр создается и прогревается один раз при первом вызове и затем используется
+    всеми потоками сервиса. Состояние анализатора после инициализации только читается,
+    а данные конкретного запроса передаются через возвращаемые значения методов.
+    """
+    global _shared_analyzer
+    if _shared_analyzer is None:
+        with _shared_analyzer_lock:
+            if _shared_analyzer is None:
+                analyzer = LibraryAnalyzer()
+                analyzer.warm_up()
+                _shared_analyzer = analyzer
+    return _shared_analyzer
+
+
 class LibraryAnalyzer:
     """
     Класс для анализа библиотеки игр пользователя Steam и генерации рекомендаций.
@@ -155,161 +174,300 @@ class LibraryAnalyzer:
         """
         self.api_parser = ApiParser()
         self.model = load_model(MODEL_PATH)
-        self.train_df = load_dataframe(DF_PROCESSED_JSON_PATH)
-        self.train_df['short_description_clean'] = self.train_df['short_description'].apply(clean_text)
+        self.catalog_store = CatalogStore(resolve_catalog_path(DF_PROCESSED_JSON_PATH))
+        self.train_df = self.catalog_store.frame
+        self.catalog_embeddings = load_or_build_catalog_embeddings(self.model, self.train_df, MODEL_PATH, catalog_path=self.catalog_store.path)
+        index_params = {'n_probe': VECTOR_INDEX_N_PROBE} if VECTOR_INDEX_KIND == 'ivf' else {}
+        self.vector_index = load_or_build_vector_index(self.catalog_embeddings, get_catalog_dir(MODEL_PATH), kind=VECTOR_INDEX_KIND, **index_params)
+        self.ranker = CatalogRanker(self.train_df)
+        self.scorer = MicroBatchScorer(self.vector_index, SCORING_MAX_BATCH_SIZE, SCORING_MAX_WAIT_MS) if SCORING_MAX_BATCH_SIZE > 1 else None
+        # Версия результатов меняется при замене модели, каталога или индекса, и старые результаты из кэша не используются
+        self.result_cache = create_result_cache()
+        self.result_cache_version = result_version(self.catalog_embeddings.meta, self.vector_index.meta, self.catalog_store.path)
+        if self.result_cache is not None:
+            self.result_cache.purge_other_versions(self.result_cache_version)
+        self.enrichment_store = EnrichmentStore()
         self.data_cleaner = DataCleaner()
+        self._model_lock = threading.Lock()
+        MODEL_INFO.set(len(self.catalog_embeddings), model_fingerprint=self.catalog_embeddings.meta.get('model_fingerprint', 'unknown'), index_kind=VECTOR_INDEX_KIND)
+
+    def warm_up(self):
+        """Прогревает ленивые ресурсы анализатора перед обработкой первых запросов.
+
+        Загружает корпуса WordNet и pymorphy2, выполняет пробную трансформацию моделью
+        и подгружает страницы матрицы каталога, чтобы первый пользователь не ждал инициализации.
+        """
+        logger.info("🔥 Прогрев LibraryAnalyzer...")
+        start_time = time.time()
+        clean_text("warming up the games recommender")
+        self.data_cleaner.lemmatizer_en.lemmatize("games")
+        self.data_cleaner.morph.parse("игры")
+        warm_up_game = {
+            "name": "warm up",
+            "short_description": "warming up the games recommender",
+            "all_tags": [],
+            "estimated_owners": 0,
+            "steam_id": -1,
+        }
+        warm_up_vector = self.get_game_vectors([warm_up_game])
+        if len(self.catalog_embeddings):
+            self.vector_index.similarities(warm_up_vector[0])
+        logger.info("✅ LibraryAnalyzer прогрет за %.2f секунд", time.time() - start_time)
+
+    def get_game_vectors(self, games_data):
+        """Возвращает векторы входных игр.
+
+        Используются уже вычисленные векторы (ключ 'vector', его добавляет `enrich_games_from_api`),
+        затем векторы из предвычисленной матрицы каталога; моделью трансформируются только
+        оставшиеся игры, одним вызовом.
+        """
+        steam_ids = [game.get('steam_id', game.get('appid')) for game in games_data]
+        positions = self.catalog_embeddings.positions_of(steam_ids)
+        game_vectors = np.empty((len(games_data), self.catalog_embeddings.vectors.shape[1]), dtype=np.float32)
+
+        has_vector = np.array([game.get('vector') is not None for game in games_data], dtype=bool)
+        for i in np.flatnonzero(has_vector):
+            game_vectors[i] = games_data[i]['vector']
+        in_catalog = (positions >= 0) & ~has_vector
+        if in_catalog.any():
+            game_vectors[in_catalog] = self.catalog_embeddings.vectors[positions[in_catalog]]
+        missing = ~(in_catalog | has_vector)
+        if missing.any():
+            missing_games = [dict(game, steam_id=steam_id) for game, steam_id, is_missing in zip(games_data, steam_ids, missing) if is_missing]
+            game_vectors[missing] = self.vectorize_games(missing_games)
+        return game_vectors
+
+    def vectorize_games(self, games_data):
+        """Трансформирует моделью список игр (словари с данными в формате датасета) одним вызовом.
+
+        Возвращает:
+            np.ndarray: float32 матрица векторов в порядке `games_data`.
+        """
+        new_df = pd.DataFrame(games_data)
+        new_df['short_description_clean'] = new_df['short_description'].apply(clean_text)
+        # Внутренние компоненты модели (TF-IDF, NMF/LDA) не гарантируют потокобезопасность, поэтому доступ к ней сериализуется
+        with self._model_lock, span('model.transform', n_games=len(new_df)):
+            return as_dense_vectors(self.model.transform(new_df))
 
     def get_games_data_from_dataset(self, games):
-        """Извлекает данные об играх из предварительно загруженного датасета."""
+        """Извлекает данные об играх из предварительно загруженного датасета.
+
+        Игры, отсутствующие в датасете, ищутся во втором уровне - дельта-каталоге игр,
+        ранее полученных через API (`EnrichmentStore`). Результаты поиска учитываются в метрике
+        `steam_recommender_catalog_lookups_total` ('catalog', 'delta', 'miss').
+        """
         found_games = []
         not_found_games = []
         for game in games:
             app_id = game.get("appid")
             if app_id is not None and app_id in self.train_df.index:
-              found_games.append(self.train_df.loc[app_id])
+              found_game = self.train_df.loc[app_id].copy()
+              found_game['steam_id'] = app_id
+              found_games.append(found_game)
             else:
                 not_found_games.append(game)
+
+        n_catalog = len(found_games)
+        if not_found_games:
+            delta_games = self.enrichment_store.get_many(
+                [game.get("appid") for game in not_found_games],
+                self.catalog_embeddings.meta.get('model_fingerprint')
+            )
+            if delta_games:
+                still_not_found_games = []
+                for game in not_found_games:
+                    delta_game = delta_games.get(pd.to_numeric(game.get("appid"), errors='coerce'))
+                    if delta_game is not None:
+                        found_games.append(dict(delta_game))
+                    else:
+                        still_not_found_games.append(game)
+                not_found_games = still_not_found_games
+        n_delta = len(found_games) - n_catalog
+        if n_catalog:
+            CATALOG_LOOKUPS.inc(n_catalog, result='catalog')
+        if n_delta:
+            CATALOG_LOOKUPS.inc(n_delta, result='delta')
+        if not_found_games:
+            CATALOG_LOOKUPS.inc(len(not_found_games), result='miss')
         return found_games, not_found_games
 
     def get_games_data_from_api(self, not_found_games):
-        """Получает данные об играх из Steam API и Steam Spy API."""
-        games_data = []
+        """Получает данные об играх из Steam API и Steam Spy API (см. `enrich_games_from_api`)."""
+        return self.enrich_games_from_api(not_found_games)["games"]
+
+    def enrich_games_from_api(self, not_found_games):
+        """Получает, очищает и векторизует пакет игр, отсутствующих в каталоге.
+
+        Данные всех игр запрашиваются у Steam Store API параллельно одним пакетом, а для игр без ответа
+        Store API - так же одним пакетом у SteamSpy API. Все полученные записи очищаются одним вызовом
+        `DataCleaner.clean_data_with_report` и векторизуются одним вызовом `transform`, поэтому фиксированные
+        затраты очистки и векторизации не зависят от количества игр.
+
+        Аргументы:
+            not_found_games (list): Список словарей игр с ключом 'appid'. Повторяющиеся 'appid' обрабатываются один раз.
+
+        Возвращает:
+            dict: Словарь, содержащий:
+                - 'games' (list): Очищенные данные игр с вычисленным вектором (ключ 'vector').
+                - 'rejected' (list): Отклоненные игры в виде словарей {'appid', 'name', 'reason'}.
+        """
+        result = {"games": [], "rejected": []}
         if not not_found_games:
-            return games_data
+            return result
+        games_by_id = {}
         for game in not_found_games:
-            app_id = game.get('appid')
-            if app_id:
-                steam_web_api_response = self.api_parser.steam_web_api_client.make_request(
-                    request_name="get_app_details",
-                    request_params={"appids": app_id}
-                )
-
-                app_data = None
-                if steam_web_api_response['error'] is None and steam_web_api_response['response_json']:
-                    app_data = steam_web_api_response['response_json'].get(str(app_id), {}).get('data')
-
-                if app_data:
-                    categories = app_data.get("categories", [])
-                    if not isinstance(categories, list):
-                        categories = []
-                    parsed_data = {
-                        "name": app_data.get("name", "placeholder"),
-                        "release_date": app_data.get("release_date", {}).get("date", "placeholder"),
-                        "required_age": app_data.get("required_age", "placeholder"),
-                        "price": app_data.get("price_overview", {}).get("final_formatted", "placeholder"),
-                        "dlc_count": len(app_data.get("dlc", [])) if isinstance(app_data.get("dlc"), list) else 0,
-                        "detailed_description": app_data.get("detailed_description", "placeholder"),
-                        "about_the_game": app_data.get("about_the_game", "placeholder"),
-                        "short_description": app_data.get("short_description", "placeholder"),
-                        "reviews": app_data.get("reviews", "placeholder"),
-                        "header_image": app_data.get("header_image", "placeholder"),
-                        "website": app_data.get("website", "placeholder"),
-                        "support_url": app_data.get("support_info", {}).get("url", "placeholder"),
-                        "support_email": app_data.get("support_info", {}).get("email", "placeholder"),
-                        "windows": app_data.get("platforms", {}).get("windows", "placeholder"),
-                        "mac": app_data.get("platforms", {}).get("mac", "placeholder"),
-                        "linux": app_data.get("platforms", {}).get("linux", "placeholder"),
-                        "metacritic_score": app_data.get("metacritic", {}).get("score", "placeholder"),
-                        "metacritic_url": app_data.get("metacritic", {}).get("url", "placeholder"),
-                        "achievements": app_data.get("achievements", {}).get("total", "placeholder"),
-                        "recommendations": app_data.get("recommendations", {}).get("total", "placeholder"),
-                        "notes": "placeholder",
-                        "supported_languages": app_data.get("supported_languages", "placeholder"),
-                        "full_audio_languages": app_data.get("full_audio_languages", "placeholder"),
-                        "packages": app_data.get("packages", "placeholder"),
-                        "developers": app_data.get("developers", "placeholder"),
-                        "publishers": app_data.get("publishers", "placeholder"),
-                        "categories": [cat.get("description", "placeholder") for cat in categories],
-                        "genres": [genre.get("description", "placeholder") for genre in app_data.get("genres", [])],
-                        "screenshots": [ss.get("path_thumbnail", "placeholder") for ss in app_data.get("screenshots", [])],
-                        "movies": [m.get("webm", {}).get("480", "placeholder") for m in app_data.get("movies", [])],
-                        "user_score": "placeholder",
-                        "score_rank": "placeholder",
-                        "positive": "placeholder",
-                        "negative": "placeholder",
-                        "estimated_owners": app_data.get("estimated_owners", np.nan),
-                        "average_playtime_forever": "placeholder",
-                        "average_playtime_2weeks": "placeholder",
-                        "median_playtime_forever": "placeholder",
-                        "median_playtime_2weeks": "placeholder",
-                        "peak_ccu": "placeholder",
-                        "all_tags": [cat.get("description", "placeholder") for cat in categories],
-                        "steam_id": app_id
-                    }
-                    if pd.isna(parsed_data["estimated_owners"]):
-                        parsed_data["estimated_owners"] = 100000
-
-                    cleaned_data = self.data_cleaner.clean_data(pd.DataFrame([parsed_data]))
-                    if cleaned_data.shape[0] > 0:
-                        games_data.append(cleaned_data.to_dict('records')[0])
-                else:
-                    steamspy_api_response = self.api_parser.steamspy_api_client.make_request(
-                        request_name="get_app_details",
-                        request_params={"appid": app_id}
-                    )
-                    if steamspy_api_response['error'] is None and steamspy_api_response['response_json']:
-                        app_data = steamspy_api_response['response_json']
-                        categories = app_data.get("categories", [])
-                        if not isinstance(categories, list):
-                            categories = []
-
-                        parsed_data = {
-                            "name": app_data.get("name", "placeholder"),
-                            "release_date": "placeholder",
-                            "required_age": "placeholder",
-                            "price": "placeholder",
-                            "dlc_count": "placeholder",
-                            "detailed_description": "placeholder",
-                            "about_the_game": "placeholder",
-                            "short_description": "placeholder",
-                            "reviews": "placeholder",
-                            "header_image": "placeholder",
-                            "website": "placeholder",
-                            "support_url": "placeholder",
-                            "support_email": "placeholder",
-                            "windows": "placeholder",
-                            "mac": "placeholder",
-                            "linux": "placeholder",
-                            "metacritic_score": app_data.get("metacritic", "placeholder"),
-                            "metacritic_url": "placeholder",
-                            "achievements": "placeholder",
-                            "recommendations": "placeholder",
-                            "notes": "placeholder",
-                            "supported_languages": "placeholder",
-                            "full_audio_languages": "placeholder",
-                            "packages": "placeholder",
-                            "developers": "placeholder",
-                            "publishers": "placeholder",
-                            "categories": "placeholder",
-                            "genres": "placeholder",
-                            "screenshots": "placeholder",
-                            "movies": "placeholder",
-                            "user_score": "placeholder",
-                            "score_rank": "placeholder",
-                            "positive": app_data.get("positive", "placeholder"),
-                            "negative": app_data.get("negative", "placeholder"),
-                            "estimated_owners": app_data.get("owners", np.nan),
-                            "average_playtime_forever": "placeholder",
-                            "average_playtime_2weeks": "placeholder",
-                            "median_playtime_forever": "placeholder",
-                            "median_playtime_2weeks": "placeholder",
-                            "peak_ccu": "placeholder",
-                            "all_tags": [cat.get("description", "placeholder") for cat in categories],
-                            "steam_id": app_id
-                        }
-                        if pd.isna(parsed_data["estimated_owners"]):
-                            parsed_data["estimated_owners"] = 100000
-
-                        cleaned_data = self.data_cleaner.clean_data(pd.DataFrame([parsed_data]))
-                        if cleaned_data.shape[0] > 0:
-                            games_data.append(cleaned_data.to_dict('records')[0])
-                    else:
-                        print(f"⚠️ Не удалось получить данные из Steam API и Steam Spy API для app_id: {app_id}. Название игры: {game.get('name', 'Неизвестно')}")
-        return games_data
-
-    def analyze_single_game(self, game_identifier):
-        """Анализирует одиночную игру и возвращает рекомендации."""
-        print(f"🚀 Запуск анализа для одиночной игры: {game_identifier}")
+            if game.get('appid'):
+                games_by_id.setdefault(game['appid'], game)
+        app_ids = list(games_by_id)
+        store_app_details = self.api_parser.get_store_app_details_many(app_ids)
+        steamspy_app_details = self.api_parser.get_steamspy_app_details_many(
+            [app_id for app_id in app_ids if not store_app_details.get(app_id)]
+        )
+
+        parsed_records = []
+        for app_id in app_ids:
+            if store_app_details.get(app_id):
+                parsed_records.append(self._parse_store_app_data(app_id, store_app_details[app_id]))
+            elif steamspy_app_details.get(app_id):
+                parsed_records.append(self._parse_steamspy_app_data(app_id, steamspy_app_details[app_id]))
+            else:
+                result["rejected"].append({"appid": app_id, "name": games_by_id[app_id].get('name', 'Неизвестно'), "reason": "нет данных в Steam API и Steam Spy API"})
+
+        if parsed_records:
+            cleaned_df, rejections = self.data_cleaner.clean_data_with_report(pd.DataFrame(parsed_records))
+            for position, step_name in rejections.items():
+                record = parsed_records[position]
+                result["rejected"].append({"appid": record["steam_id"], "name": record["name"], "reason": REJECTION_REASONS.get(step_name, step_name)})
+            games = cleaned_df.to_dict('records')
+            if games:
+                for game, vector in zip(games, self.vectorize_games(games)):
+                    game['vector'] = vector
+                # Игры сохраняются в дельта-каталог, чтобы следующие запросы не обращались к API
+                self.enrichment_store.add_many(games, self.catalog_embeddings.meta.get('model_fingerprint'))
+            result["games"] = games
+
+        for rejected_game in result["rejected"]:
+            logger.info("⚠️ Игра отклонена: %s (app_id: %s): %s", rejected_game['name'], rejected_game['appid'], rejected_game['reason'])
+        return result
+
+    @staticmethod
+    def _parse_store_app_data(app_id, app_data):
+        """Преобразует ответ Steam Store API (appdetails) в запись игры в формате датасета."""
+        categories = app_data.get("categories", [])
+        if not isinstance(categories, list):
+            categories = []
+        parsed_data = {
+            "name": app_data.get("name", "placeholder"),
+            "release_date": app_data.get("release_date", {}).get("date", "placeholder"),
+            "required_age": app_data.get("required_age", "placeholder"),
+            "price": app_data.get("price_overview", {}).get("final_formatted", "placeholder"),
+            "dlc_count": len(app_data.get("dlc", [])) if isinstance(app_data.get("dlc"), list) else 0,
+            "detailed_description": app_data.get("detailed_description", "placeholder"),
+            "about_the_game": app_data.get("about_the_game", "placeholder"),
+            "short_description": app_data.get("short_description", "placeholder"),
+            "reviews": app_data.get("reviews", "placeholder"),
+            "header_image": app_data.get("header_image", "placeholder"),
+            "website": app_data.get("website", "placeholder"),
+            "support_url": app_data.get("support_info", {}).get("url", "placeholder"),
+            "support_email": app_data.get("support_info", {}).get("email", "placeholder"),
+            "windows": app_data.get("platforms", {}).get("windows", "placeholder"),
+            "mac": app_data.get("platforms", {}).get("mac", "placeholder"),
+            "linux": app_data.get("platforms", {}).get("linux", "placeholder"),
+            "metacritic_score": app_data.get("metacritic", {}).get("score", "placeholder"),
+            "metacritic_url": app_data.get("metacritic", {}).get("url", "placeholder"),
+            "achievements": app_data.get("achievements", {}).get("total", "placeholder"),
+            "recommendations": app_data.get("recommendations", {}).get("total", "placeholder"),
+            "notes": "placeholder",
+            "supported_languages": app_data.get("supported_languages", "placeholder"),
+            "full_audio_languages": app_data.get("full_audio_languages", "placeholder"),
+            "packages": app_data.get("packages", "placeholder"),
+            "developers": app_data.get("developers", "placeholder"),
+            "publishers": app_data.get("publishers", "placeholder"),
+            "categories": [cat.get("description", "placeholder") for cat in categories],
+            "genres": [genre.get("description", "placeholder") for genre in app_data.get("genres", [])],
+            "screenshots": [ss.get("path_thumbnail", "placeholder") for ss in app_data.get("screenshots", [])],
+            "movies": [m.get("webm", {}).get("480", "placeholder") for m in app_data.get("movies", [])],
+            "user_score": "placeholder",
+            "score_rank": "placeholder",
+            "positive": "placeholder",
+            "negative": "placeholder",
+            "estimated_owners": app_data.get("estimated_owners", np.nan),
+            "average_playtime_forever": "placeholder",
+            "average_playtime_2weeks": "placeholder",
+            "median_playtime_forever": "placeholder",
+            "median_playtime_2weeks": "placeholder",
+            "peak_ccu": "placeholder",
+            "all_tags": [cat.get("description", "placeholder") for cat in categories],
+            "steam_id": app_id
+        }
+        if pd.isna(parsed_data["estimated_owners"]):
+            parsed_data["estimated_owners"] = 100000
+        return parsed_data
+
+    @staticmethod
+    def _parse_steamspy_app_data(app_id, app_data):
+        """Преобразует ответ SteamSpy API (appdetails) в запись игры в формате датасета."""
+        categories = app_data.get("categories", [])
+        if not isinstance(categories, list):
+            categories = []
+        parsed_data = {
+            "name": app_data.get("name", "placeholder"),
+            "release_date": "placeholder",
+            "required_age": "placeholder",
+            "price": "placeholder",
+            "dlc_count": "placeholder",
+            "detailed_description": "placeholder",
+            "about_the_game": "placeholder",
+            "short_description": "placeholder",
+            "reviews": "placeholder",
+            "header_image": "placeholder",
+            "website": "placeholder",
+            "support_url": "placeholder",
+            "support_email": "placeholder",
+            "windows": "placeholder",
+            "mac": "placeholder",
+            "linux": "placeholder",
+            "metacritic_score": app_data.get("metacritic", "placeholder"),
+            "metacritic_url": "placeholder",
+            "achievements": "placeholder",
+            "recommendations": "placeholder",
+            "notes": "placeholder",
+            "supported_languages": "placeholder",
+            "full_audio_languages": "placeholder",
+            "packages": "placeholder",
+            "developers": "placeholder",
+            "publishers": "placeholder",
+            "categories": "placeholder",
+            "genres": "placeholder",
+            "screenshots": "placeholder",
+            "movies": "placeholder",
+            "user_score": "placeholder",
+            "score_rank": "placeholder",
+            "positive": app_data.get("positive", "placeholder"),
+            "negative": app_data.get("negative", "placeholder"),
+            "estimated_owners": app_data.get("owners", np.nan),
+            "average_playtime_forever": "placeholder",
+            "average_playtime_2weeks": "placeholder",
+            "median_playtime_forever": "placeholder",
+            "median_playtime_2weeks": "placeholder",
+            "peak_ccu": "placeholder",
+            "all_tags": [cat.get("description", "placeholder") for cat in categories],
+            "steam_id": app_id
+        }
+        if pd.isna(parsed_data["estimated_owners"]):
+            parsed_data["estimated_owners"] = 100000
+        return parsed_data
+
+    def analyze_single_game(self, game_identifier, top_k=DEFAULT_TOP_K, min_positive_ratio=DEFAULT_MIN_POSITIVE_RATIO, block_weights=None):
+        """Анализирует одиночную игру и возвращает рекомендации.
+
+        Аргументы:
+            game_identifier (str): App ID, ссылка на игру в Steam Store или название игры.
+            top_k (int, optional): Количество рекомендаций. По умолчанию 10.
+            min_positive_ratio (float, optional): Минимальная доля положительных отзывов рекомендуемой игры. По умолчанию 0.7.
+            block_weights (dict, optional): Веса блоков признаков для взвешенного сходства. По умолчанию None.
+        """
+        logger.info("🚀 Запуск анализа для одиночной игры: %s", game_identifier)
 
         game_data_list = []
         app_id = None
@@ -323,36 +481,36 @@ class LibraryAnalyzer:
             app_id = game_identifier
 
         if app_id:
-            print(f"🆔 Идентифицирован App ID: {app_id}")
+            logger.debug("🆔 Идентифицирован App ID: %s", app_id)
             game_data_from_dataset, not_found_dataset = self.get_games_data_from_dataset([{'appid': app_id}])
             if game_data_from_dataset:
-                game_data_list = [fg.to_dict() for fg in game_data_from_dataset]
+                game_data_list = [fg.to_dict() if isinstance(fg, pd.Series) else fg for fg in game_data_from_dataset]
             else:
                 api_game_data = self.get_games_data_from_api([{'appid': app_id}])
                 if api_game_data:
                     game_data_list = api_game_data
                 else:
-                    print(f"❌ Не удалось получить данные для игры с App ID: {app_id}")
+                    logger.warning("❌ Не удалось получить данные для игры с App ID: %s", app_id)
                     return None
         else:
             # Поиск игры по названию (менее надежно, может быть несколько игр с похожими названиями)
-            print(f"🔍 Поиск игры по названию: '{game_identifier}'")
+            logger.debug("🔍 Поиск игры по названию: '%s'", game_identifier)
             found_games_by_name = self.train_df[self.train_df['name'].str.lower() == game_identifier.lower()]
             if not found_games_by_name.empty:
-                print(f"✅ Игра по названию найдена в датасете.")
+                logger.debug("✅ Игра по названию найдена в датасете.")
                 game_data_list = [found_games_by_name.iloc[0].to_dict()] # Берем первую найденную игру, если их несколько
+                game_data_list[0]['steam_id'] = found_games_by_name.index[0]
                 app_id = game_data_list[0].get('steam_id')
             else:
-                print(f"⚠️ Игра по названию не найдена в датасете. Попытка поиска через API (может быть медленно).")
                 # Тут можно добавить поиск через API по названию, но это сложнее и выходит за рамки текущей задачи.
-                print(f"❌ Поиск по названию через API не реализован. Пожалуйста, используйте App ID или ссылку на игру.")
+                logger.info("⚠️ Игра по названию '%s' не найдена в датасете, поиск по названию через API не реализован.", game_identifier)
                 return None
 
         if not game_data_list:
-            print(f"❌ Не удалось получить данные об игре для анализа: {game_identifier}")
+            logger.warning("❌ Не удалось получить данные об игре для анализа: %s", game_identifier)
             return None
 
-        ranked_game_group = self.calculate_similarity_and_rank(game_data_list, combination_method='average')
+        ranked_game_group = self.calculate_similarity_and_rank(game_data_list, combination_method='average', top_k=top_k, min_positive_ratio=min_positive_ratio, block_weights=block_weights)
         return ranked_game_group
 
 
@@ -378,7 +536,8 @@ class LibraryAnalyzer:
 
     def run_analysis_for_gradio(self, steam_user_url):
         """Запускает анализ библиотеки игр пользователя Steam и возвращает рекомендации в текстовом формате для Gradio."""
-        ranked_games_with_similarity = self.run_analysis_get_results(steam_user_url) # Вызываем новую функцию для получения результатов
+        all_games_with_data = self.collect_library_games(steam_user_url) # Данные об играх живут только в рамках запроса
+        ranked_games_with_similarity = self.rank_library_games(all_games_with_data) if all_games_with_data else None
 
         if not ranked_games_with_similarity:
             return "❌ Не удалось получить рекомендации для библиотеки пользователя."
@@ -388,7 +547,7 @@ class LibraryAnalyzer:
             method_results = ranked_games_with_similarity.get(group_name, {})
             if method_results:
                 output_text += f"\n--- 🏆 Рекомендации для группы '{group_name}' ---\n"
-                output_text += f"Игры в группе: {[game_item['name'] for game_item in self.all_games_with_data.get(group_name, [])]}\n" # Используем сохраненные данные
+                output_text += f"Игры в группе: {[game_item['name'] for game_item in all_games_with_data.get(group_name, [])]}\n"
                 for method, ranked_game_group in method_results.items():
                     recommendations = ranked_game_group.get("recommendations")
                     median_similarity = ranked_game_group.get("median_similarity")
@@ -403,12 +562,25 @@ class LibraryAnalyzer:
         return output_text
 
 
-    def run_analysis_get_results(self, steam_user_url):
+    def run_analysis_get_results(self, steam_user_url, top_k=DEFAULT_TOP_K, min_positive_ratio=DEFAULT_MIN_POSITIVE_RATIO, block_weights=None):
         """
         Запускает анализ библиотеки игр пользователя Steam и возвращает результаты в виде словаря,
         без форматирования вывода для Gradio.
         """
-        print(f"🚀 Запуск анализа библиотеки для пользователя с URL: {steam_user_url}")
+        all_games_with_data = self.collect_library_games(steam_user_url)
+        if all_games_with_data is None:
+            return None
+        return self.rank_library_games(all_games_with_data, top_k=top_k, min_positive_ratio=min_positive_ratio, block_weights=block_weights)
+
+
+    def collect_library_games(self, steam_user_url):
+        """
+        Получает библиотеку пользователя Steam и собирает данные об играх по группам.
+
+        Возвращает словарь {имя группы: список словарей с данными об играх}, принадлежащий
+        текущему запросу, или None, если библиотеку получить не удалось.
+        """
+        logger.info("🚀 Запуск анализа библиотеки для пользователя с URL: %s", steam_user_url)
         # Убираем повторный вызов resolve_vanity_url, предполагаем, что URL уже корректный
         # steam_user_id = self.api_parser.resolve_vanity_url(steam_user_url) # УДАЛЯЕМ ЭТУ СТРОКУ
         steam_user_id_match = re.search(r'/profiles/(\d+)', steam_user_url) # Пытаемся извлечь SteamID64 из URL
@@ -420,79 +592,98 @@ class LibraryAnalyzer:
             vanity_name = steam_user_url.split('/')[-1]
             steam_user_id = self.api_parser.resolve_vanity_url(vanity_name)
         else:
-            print("❌ Не удалось получить Steam ID пользователя из URL.")
+            logger.warning("❌ Не удалось получить Steam ID пользователя из URL.")
             return None
 
 
         if not steam_user_id:
-            print("❌ Не удалось получить Steam ID пользователя.")
+            logger.warning("❌ Не удалось получить Steam ID пользователя.")
             return None
-        print(f"👤 Получен Steam ID пользователя: {steam_user_id}")
+        logger.debug("👤 Получен Steam ID пользователя: %s", steam_user_id)
 
         owned_games = self.api_parser.get_owned_games(steam_user_id)
         if not owned_games:
-            print("⚠️ Не удалось получить список игр пользователя.")
+            logger.warning("⚠️ Не удалось получить список игр пользователя.")
             return None
-        print(f"🎮 Получено {len(owned_games)} игр от пользователя.")
+        logger.debug("🎮 Получено %d игр от пользователя.", len(owned_games))
 
         grouped_games_data = {}
-        grouped_games = group_user_games(owned_games)
-        print(f"📦 Игры сгруппированы: {grouped_games.keys()}")
+        with span('library.group_games', n_games=len(owned_games)):
+            grouped_games = group_user_games(owned_games)
+        logger.debug("📦 Игры сгруппированы: %s", list(grouped_games))
 
-        self.all_games_with_data = {} # Сохраняем данные о играх для использования в Gradio output
+        all_games_with_data = {}
+        dataset_results = {}
 
         for group_name in ["recent_games", "most_played_games"]:
             games = grouped_games.get(group_name, [])
             if not games:
                 grouped_games_data[group_name] = []
                 continue
+            with span('library.dataset_lookup', group=group_name, n_games=len(games)):
+                found_games, not_found_games = self.get_games_data_from_dataset(games)
+            logger.debug("🔍 Группа %s: найдено в датасете %d игр, не найдено %d игр", group_name, len(found_games), len(not_found_games))
+            dataset_results[group_name] = (found_games, not_found_games)
+
+        # Игры, отсутствующие в каталоге, запрашиваются и обрабатываются одним пакетом для всех групп
+        all_not_found_games = [game for _, not_found_games in dataset_results.values() for game in not_found_games]
+        with span('library.enrich_from_api', n_games=len(all_not_found_games)):
+            enrichment = self.enrich_games_from_api(all_not_found_games)
+        api_games_by_id = {game['steam_id']: game for game in enrichment["games"]}
+        logger.debug("✅ Получено из API: %d игр, отклонено: %d", len(enrichment['games']), len(enrichment['rejected']))
+
+        for group_name, (found_games, not_found_games) in dataset_results.items():
+            api_games_data = [api_games_by_id[game.get('appid')] for game in not_found_games if game.get('appid') in api_games_by_id]
+            found_game_dict_list = [fg.to_dict() if isinstance(fg, pd.Series) else fg for fg in found_games]
+            all_games_with_data[group_name] = found_game_dict_list + api_games_data
 
-            all_games_with_data_for_group = []
-
-            print(f"🔍 Обработка группы игр: {group_name}")
-            found_games, not_found_games = self.get_games_data_from_dataset(games)
-            print(f"   ✅ Найдено в датасете: {len(found_games)} игр, ⚠️ не найдено в датасете: {len(not_found_games)} игр")
-            api_games_data = self.get_games_data_from_api(not_found_games)
-            print(f"   ✅ Получено из API: {len(api_games_data)} игр")
+        return all_games_with_data
 
-            found_game_dict_list = [fg.to_dict() if isinstance(fg, pd.Series) else fg for fg in found_games]
-            all_games_with_data_for_group = found_game_dict_list + api_games_data
-            self.all_games_with_data[group_name] = all_games_with_data_for_group # Сохраняем тут
 
+    def rank_library_games(self, all_games_with_data, top_k=DEFAULT_TOP_K, min_positive_ratio=DEFAULT_MIN_POSITIVE_RATIO, block_weights=None):
+        """Рассчитывает рекомендации для каждой группы игр, собранной `collect_library_games`."""
         ranked_games_with_similarity = {}
         combination_methods_to_test = ['average']
 
         for group_name in ["recent_games", "most_played_games"]:
-            games_data = self.all_games_with_data.get(group_name, []) # Используем сохраненные данные
+            games_data = all_games_with_data.get(group_name, [])
             if games_data:
                 ranked_games_with_similarity[group_name] = {}
                 for method in combination_methods_to_test:
-                    print(f"📊 Расчет similarity score для группы '{group_name}' методом '{method}'")
-                    ranked_group_results = self.calculate_similarity_and_rank(games_data, combination_method=method)
+                    logger.debug("📊 Расчет similarity score для группы '%s' методом '%s'", group_name, method)
+                    ranked_group_results = self.calculate_similarity_and_rank(games_data, combination_method=method, top_k=top_k, min_positive_ratio=min_positive_ratio, block_weights=block_weights)
                     ranked_games_with_similarity[group_name][method] = ranked_group_results
             else:
-                print(f"ℹ️ Нет данных об играх для группы '{group_name}'. Пропускаем расчет similarity.")
+                logger.debug("ℹ️ Нет данных об играх для группы '%s'. Пропускаем расчет similarity.", group_name)
 
         return ranked_games_with_similarity
 
 
 def main():
     """Главная функция для запуска анализа библиотеки игр пользователя Steam или одиночной игры."""
+    configure_logging()
     analyzer = LibraryAnalyzer()
     parser = argparse.ArgumentParser(description="Анализ библиотеки игр Steam или одиночной игры для получения рекомендаций.")
     group = parser.add_mutually_exclusive_group(required=True) # Группа для взаимоисключающих аргументов
 
     group.add_argument('--library', action='store_true', help='Запустить анализ библиотеки игр пользователя Steam (использует STEAM_USER_URL из .env по умолчанию).')
     group.add_argument('--game', type=str, help='Запустить анализ для одиночной игры. Укажите steamid, название игры или ссылку на игру.')
+    parser.add_argument('--block-weights', type=str, nargs='*', default=None, metavar='BLOCK=WEIGHT', help="Веса блоков признаков для режима --game, например: owners=0.5 tags=1 description=2.")
 
     args = parser.parse_args()
+    block_weights = None
+    if args.block_weights:
+        try:
+            block_weights = {name: float(weight) for name, weight in (item.split('=', 1) for item in args.block_weights)}
+        except ValueError:
+            parser.error(f"Некорректный формат --block-weights: {args.block_weights}. Ожидается BLOCK=WEIGHT.")
 
     if args.library:
         print("Выбран режим анализа библиотеки.")
         analyzer.run_analysis(STEAM_USER_URL) # Используем STEAM_USER_URL из .env
     elif args.game:
         print(f"Выбран режим анализа одиночной игры для: '{args.game}'.")
-        game_recommendations = analyzer.analyze_single_game(args.game)
+        game_recommendations = analyzer.analyze_single_game(args.game, block_weights=block_weights)
         if game_recommendations:
             print(f"\n--- 🏆 Рекомендации для игры '{args.game}' ---")
             recommendations = game_recommendations.get("recommendations")
@@ -0,0 +1,360 @@
+import os
+import json
+import time
+import numpy as np
+
+INDEX_FORMAT_VERSION = 1
+INDEX_META_FILE = 'meta.json'
+
+
+def normalize_rows(vectors, dtype=np.float32):
+    """Нормализует строки матрицы по L2-норме. Нулевые строки остаются нулевыми."""
+    vectors = np.asarray(vectors, dtype=dtype)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def get_index_dir(catalog_dir, kind):
+    """Возвращает директорию индекса указанного типа внутри директории артефактов каталога."""
+    return os.path.join(catalog_dir, f'index_{kind}')
+
+
+def _save_arrays(directory, arrays, meta):
+    """Атомарно сохраняет массивы `.npy` и метаданные индекса в директорию."""
+    os.makedirs(directory, exist_ok=True)
+    for name, array in arrays.items():
+        tmp_path = os.path.join(directory, name + '.npy.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmp_path, os.path.join(directory, name + '.npy'))
+    tmp_path = os.path.join(directory, INDEX_META_FILE + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(directory, INDEX_META_FILE))
+
+
+def _top_k(scores, k):
+    """Возвращает индексы и значения k наибольших элементов каждой строки, отсортированные по убыванию."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64), np.empty((scores.shape[0], 0), dtype=scores.dtype)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+class ExactIndex:
+    """
+    Точный индекс косинусной схожести.
+
+    Хранит L2-нормализованную float32 матрицу каталога, поэтому косинусная схожесть
+    запроса со всем каталогом вычисляется одним матрично-векторным произведением (BLAS)
+    без повторной нормализации каталога на каждый запрос.
+    """
+    kind = 'exact'
+
+    def __init__(self):
+        self.normalized_vectors = None
+        self.meta = {}
+
+    def __len__(self):
+        return 0 if self.normalized_vectors is None else self.normalized_vectors.shape[0]
+
+    def build(self, vectors, meta=None):
+        """Строит индекс по матрице векторов каталога.
+
+        Аргументы:
+            vectors (np.ndarray): Матрица векторов каталога (количество игр x размерность).
+            meta (dict, optional): Дополнительные метаданные (например, отпечаток модели каталога).
+
+        Возвращает:
+            ExactIndex: Построенный индекс.
+        """
+        self.normalized_vectors = normalize_rows(vectors)
+        self.meta = dict(meta) if meta else {}
+        self.meta.update({'format_version': INDEX_FORMAT_VERSION, 'kind': self.kind, 'n_items': len(self)})
+        return self
+
+    def similarities(self, query_vector, **kwargs):
+        """Вычисляет косинусную схожесть вектора запроса со всеми играми каталога.
+
+        Аргументы:
+            query_vector (np.ndarray): Вектор запроса (размерность каталога).
+
+        Возвращает:
+            np.ndarray: Массив схожести длины каталога.
+        """
+        query = normalize_rows(np.asarray(query_vector).reshape(1, -1))[0]
+        return self.normalized_vectors @ query
+
+    def similarities_many(self, query_vectors, **kwargs):
+        """Вычисляет косинусную схожесть нескольких запросов со всеми играми каталога одним матричным произведением.
+
+        Матрица каталога читается из памяти один раз для всего пакета запросов, а не по разу на запрос.
+
+        Аргументы:
+            query_vectors (np.ndarray): Матрица запросов (количество запросов x размерность).
+
+        Возвращает:
+            np.ndarray: Матрица схожести (количество запросов x длина каталога).
+        """
+        queries = normalize_rows(np.atleast_2d(query_vectors))
+        return queries @ self.normalized_vectors.T
+
+    def search(self, query_vectors, k=10, **kwargs):
+        """Находит k ближайших игр каталога для каждого вектора запроса.
+
+        Аргументы:
+            query_vectors (np.ndarray): Матрица запросов (количество запросов x размерность).
+            k (int, optional): Количество ближайших игр. По умолчанию 10.
+
+        Возвращает:
+            tuple: Кортеж (индексы, схожести), каждый размером (количество запросов x k).
+        """
+        queries = normalize_rows(np.atleast_2d(query_vectors))
+        return _top_k(queries @ self.normalized_vectors.T, k)
+
+    def save(self, directory):
+        """Сохраняет индекс в директорию."""
+        _save_arrays(directory, {'normalized_vectors': self.normalized_vectors}, self.meta)
+
+    @classmethod
+    def load(cls, directory, meta, mmap=True):
+        """Загружает индекс из директории."""
+        index = cls()
+        index.normalized_vectors = np.load(os.path.join(directory, 'normalized_vectors.npy'), mmap_mode='r' if mmap else None)
+        index.meta = meta
+        return index
+
+
+class IVFIndex:
+    """
+    Приближенный индекс косинусной схожести с инвертированными списками (IVF) на numpy.
+
+    При построении каталог разбивается сферическим k-means на `n_lists` кластеров, и векторы
+    хранятся сгруппированными по кластерам. Запрос сравнивается с центроидами и сканирует только
+    `n_probe` ближайших кластеров. `n_probe` - регулятор баланса полноты и задержки:
+    при `n_probe == n_lists` результат совпадает с точным поиском.
+
+    Аргументы:
+        n_lists (int, optional): Количество кластеров. По умолчанию sqrt(количество игр).
+        n_probe (int, optional): Количество сканируемых кластеров на запрос. По умолчанию 8.
+        n_iter (int, optional): Количество итераций k-means. По умолчанию 10.
+        sample_size (int, optional): Размер выборки для обучения центроидов. По умолчанию 50000.
+        random_state (int, optional): Зерно генератора случайных чисел. По умолчанию 42.
+    """
+    kind = 'ivf'
+
+    def __init__(self, n_lists=None, n_probe=8, n_iter=10, sample_size=50000, random_state=42):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.sample_size = sample_size
+        self.random_state = random_state
+        self.centroids = None
+        self.sorted_vectors = None
+        self.order = None
+        self.list_offsets = None
+        self.meta = {}
+
+    def __len__(self):
+        return 0 if self.order is None else self.order.shape[0]
+
+    def _assign(self, vectors, batch_size=16384):
+        """Возвращает номер ближайшего центроида для каждой строки."""
+        assignments = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], batch_size):
+            assignments[start:start + batch_size] = np.argmax(vectors[start:start + batch_size] @ self.centroids.T, axis=1)
+        return assignments
+
+    def _train_centroids(self, vectors, n_lists):
+        """Обучает центроиды сферическим k-means на случайной выборке векторов."""
+        rng = np.random.default_rng(self.random_state)
+        sample_size = min(vectors.shape[0], self.sample_size)
+        sample = vectors[np.sort(rng.choice(vectors.shape[0], sample_size, replace=False))]
+        self.centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(self.n_iter):
+            assignments = self._assign(sample)
+            order = np.argsort(assignments, kind='stable')
+            clusters, starts = np.unique(assignments[order], return_index=True)
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            new_centroids = sample[rng.choice(sample_size, n_lists, replace=True)].copy()
+            new_centroids[clusters] = sums
+            self.centroids = normalize_rows(new_centroids)
+
+    def build(self, vectors, meta=None):
+        """Строит индекс по матрице векторов каталога.
+
+        Аргументы:
+            vectors (np.ndarray): Матрица векторов каталога (количество игр x размерность).
+            meta (dict, optional): Дополнительные метаданные (например, отпечаток модели каталога).
+
+        Возвращает:
+            IVFIndex: Построенный индекс.
+        """
+        normalized = normalize_rows(vectors)
+        n_items = normalized.shape[0]
+        n_lists = self.n_lists if self.n_lists else max(1, int(np.sqrt(n_items)))
+        n_lists = max(1, min(n_lists, n_items, self.sample_size))
+        self._train_centroids(normalized, n_lists)
+
+        assignments = self._assign(normalized)
+        self.order = np.argsort(assignments, kind='stable')
+        self.sorted_vectors = normalized[self.order]
+        self.list_offsets = np.searchsorted(assignments[self.order], np.arange(n_lists + 1))
+        self.n_lists = n_lists
+
+        self.meta = dict(meta) if meta else {}
+        self.meta.update({
+            'format_version': INDEX_FORMAT_VERSION,
+            'kind': self.kind,
+            'n_items': n_items,
+            'n_lists': n_lists,
+            'n_probe': self.n_probe,
+        })
+        return self
+
+    def _probe_lists(self, query, n_probe):
+        """Возвращает номера кластеров, ближайших к нормализованному запросу."""
+        n_probe = max(1, min(n_probe if n_probe else self.n_probe, self.n_lists))
+        centroid_scores = self.centroids @ query
+        if n_probe == self.n_lists:
+            return np.arange(self.n_lists)
+        return np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+
+    def similarities(self, query_vector, n_probe=None):
+        """Вычисляет косинусную схожесть запроса с играми из `n_probe` ближайших кластеров.
+
+        Аргументы:
+            query_vector (np.ndarray): Вектор запроса (размерность каталога).
+            n_probe (int, optional): Количество сканируемых кластеров (None - значение индекса).
+
+        Возвращает:
+            np.ndarray: Массив схожести длины каталога; для непросмотренных игр значение -inf.
+        """
+        query = normalize_rows(np.asarray(query_vector).reshape(1, -1))[0]
+        scores = np.full(len(self), -np.inf, dtype=np.float32)
+        for list_id in self._probe_lists(query, n_probe):
+            start, end = self.list_offsets[list_id], self.list_offsets[list_id + 1]
+            if end > start:
+                scores[self.order[start:end]] = self.sorted_vectors[start:end] @ query
+        return scores
+
+    def similarities_many(self, query_vectors, n_probe=None):
+        """Вычисляет схожесть нескольких запросов (см. `similarities`); запросы просматривают разные кластеры и считаются по одному."""
+        return np.vstack([self.similarities(query, n_probe=n_probe) for query in np.atleast_2d(query_vectors)])
+
+    def search(self, query_vectors, k=10, n_probe=None):
+        """Находит приближенно k ближайших игр каталога для каждого вектора запроса.
+
+        Аргументы:
+            query_vectors (np.ndarray): Матрица запросов (количество запросов x размерность).
+            k (int, optional): Количество ближайших игр. По умолчанию 10.
+            n_probe (int, optional): Количество сканируемых кластеров (None - значение индекса).
+
+        Возвращает:
+            tuple: Кортеж (индексы, схожести), каждый размером (количество запросов x k).
+                   Если найдено меньше k игр, недостающие позиции имеют схожесть -inf.
+        """
+        return _top_k(self.similarities_many(query_vectors, n_probe=n_probe), k)
+
+    def save(self, directory):
+        """Сохраняет индекс в директорию."""
+        _save_arrays(directory, {
+            'centroids': self.centroids,
+            'sorted_vectors': self.sorted_vectors,
+            'order': self.order,
+            'list_offsets': self.list_offsets,
+        }, self.meta)
+
+    @classmethod
+    def load(cls, directory, meta, mmap=True):
+        """Загружает индекс из директории."""
+        index = cls(n_lists=meta['n_lists'], n_probe=meta.get('n_probe', 8))
+        mmap_mode = 'r' if mmap else None
+        index.centroids = np.load(os.path.join(directory, 'centroids.npy'))
+        index.sorted_vectors = np.load(os.path.join(directory, 'sorted_vectors.npy'), mmap_mode=mmap_mode)
+        index.order = np.load(os.path.join(directory, 'order.npy'))
+        index.list_offsets = np.load(os.path.join(directory, 'list_offsets.npy'))
+        index.meta = meta
+        return index
+
+
+INDEX_TYPES = {
+    ExactIndex.kind: ExactIndex,
+    IVFIndex.kind: IVFIndex,
+}
+
+
+def create_index(kind='exact', **params):
+    """Создает пустой индекс указанного типа ('exact' или 'ivf').
+
+    Вызывает ValueError, если тип индекса неизвестен.
+    """
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"❌ Неизвестный тип индекса: {kind}")
+    return INDEX_TYPES[kind](**params)
+
+
+def load_index(directory, mmap=True):
+    """Загружает индекс любого поддерживаемого типа из директории.
+
+    Вызывает:
+        FileNotFoundError: Если файлы индекса отсутствуют.
+        ValueError: Если версия формата или тип индекса не поддерживаются.
+    """
+    with open(os.path.join(directory, INDEX_META_FILE), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('format_version') != INDEX_FORMAT_VERSION:
+        raise ValueError(f"❌ Неподдерживаемая версия формата индекса: {meta.get('format_version')}")
+    if meta.get('kind') not in INDEX_TYPES:
+        raise ValueError(f"❌ Неизвестный тип индекса: {meta.get('kind')}")
+    return INDEX_TYPES[meta['kind']].load(directory, meta, mmap=mmap)
+
+
+def build_vector_index(catalog, kind='exact', **params):
+    """Строит индекс указанного типа по векторам каталога `CatalogEmbeddings`."""
+    print(f"🔄 Построение индекса '{kind}' для {len(catalog)} игр...")
+    start_time = time.time()
+    meta = {
+        'model_fingerprint': catalog.meta.get('model_fingerprint'),
+        'catalog_created_at': catalog.meta.get('created_at'),
+    }
+    index = create_index(kind, **params).build(catalog.vectors, meta=meta)
+    print(f"✅ Индекс '{kind}' построен за {time.time() - start_time:.2f} секунд")
+    return index
+
+
+def load_or_build_vector_index(catalog, catalog_dir, kind='exact', **params):
+    """Загружает индекс рядом с векторами каталога или строит и сохраняет его, если он отсутствует или устарел.
+
+    Аргументы:
+        catalog (CatalogEmbeddings): Векторы каталога, по которым строится индекс.
+        catalog_dir (str): Директория артефактов каталога.
+        kind (str, optional): Тип индекса ('exact' или 'ivf'). По умолчанию 'exact'.
+        **params: Параметры конструктора индекса (например, n_lists и n_probe для 'ivf').
+
+    Возвращает:
+        ExactIndex или IVFIndex: Индекс, согласованный с каталогом.
+    """
+    index_dir = get_index_dir(catalog_dir, kind)
+    try:
+        index = load_index(index_dir)
+        if (index.meta.get('model_fingerprint') == catalog.meta.get('model_fingerprint')
+                and index.meta.get('catalog_created_at') == catalog.meta.get('created_at')
+                and len(index) == len(catalog)):
+            if 'n_probe' in params and params['n_probe']:
+                # Метаданные отражают действующее значение: по ним строится версия кэша рекомендаций (result_version)
+                index.n_probe = params['n_probe']
+                index.meta['n_probe'] = params['n_probe']
+            print(f"✅ Индекс '{kind}' загружен из: {index_dir}")
+            return index
+        print(f"⚠️ Индекс '{kind}' устарел. Выполняется пересчет...")
+    except (FileNotFoundError, ValueError) as e:
+        print(f"⚠️ Индекс '{kind}' недоступен ({e}). Выполняется построение...")
+
+    index = build_vector_index(catalog, kind, **params)
+    index.save(index_dir)
+    return index
@@ -1,9 +1,14 @@
+import os
 import re
+import copy
+import pickle
+import argparse
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 import nltk
 import numpy as np
 import pandas as pd
-import cupy as cp
-import cudf
+import scipy.sparse as sp
 from scipy.sparse import csr_matrix
 from scipy.stats import entropy
 from gensim.corpora.dictionary import Dictionary
@@ -16,10 +21,27 @@ from nltk.stem import WordNetLemmatizer
 
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.decomposition import NMF, LatentDirichletAllocation
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.preprocessing import MultiLabelBinarizer
-from cuml.preprocessing import MinMaxScaler as CumlMinMaxScaler
-from cuml.feature_extraction.text import TfidfVectorizer as CumlTfidfVectorizer
+from sklearn.preprocessing import MinMaxScaler as SklearnMinMaxScaler
+from sklearn.feature_extraction.text import TfidfVectorizer as SklearnTfidfVectorizer
+
+# GPU-бэкенд (RAPIDS) необязателен: без cupy/cudf/cuml или без видеокарты используется sklearn/scipy
+try:
+    import cupy as cp
+    import cudf
+    from cuml.preprocessing import MinMaxScaler as CumlMinMaxScaler
+    from cuml.feature_extraction.text import TfidfVectorizer as CumlTfidfVectorizer
+    GPU_AVAILABLE = cp.cuda.runtime.getDeviceCount() > 0
+except Exception:
+    cp = None
+    cudf = None
+    CumlMinMaxScaler = None
+    CumlTfidfVectorizer = None
+    GPU_AVAILABLE = False
+
+# sklearn по умолчанию отбрасывает однобуквенные токены, а cuml делит текст по пробелам;
+# этот шаблон повторяет токенизацию cuml, чтобы словари GPU- и CPU-моделей совпадали
+CPU_TFIDF_DEFAULTS = {'token_pattern': r'(?u)\S+'}
 
 nltk.download('stopwords', quiet=True)
 nltk.download('wordnet', quiet=True)
@@ -43,6 +65,177 @@ def clean_text(text):
     tokens = [lemmatizer.lemmatize(word) for word in tokens if word not in stop_words]
     return " ".join(tokens)
 
+def resolve_backend(backend='auto'):
+    """Определяет вычислительный бэкенд векторизатора.
+
+    Аргументы:
+        backend (str, optional): 'auto', 'gpu' или 'cpu'. При 'auto' выбирается 'gpu', если доступны RAPIDS и видеокарта. По умолчанию 'auto'.
+
+    Возвращает:
+        str: 'gpu' или 'cpu'.
+
+    Вызывает ValueError, если запрошен недоступный или неизвестный бэкенд.
+    """
+    if backend == 'auto':
+        return 'gpu' if GPU_AVAILABLE else 'cpu'
+    if backend == 'gpu' and not GPU_AVAILABLE:
+        raise ValueError("❌ GPU-бэкенд недоступен: не установлены cupy/cudf/cuml или нет видеокарты.")
+    if backend not in ('gpu', 'cpu'):
+        raise ValueError(f"❌ Неизвестный бэкенд: {backend}")
+    return backend
+
+def make_tfidf_vectorizer(params=None, backend='auto'):
+    """Создает TF-IDF векторизатор выбранного бэкенда (CumlTfidfVectorizer или sklearn TfidfVectorizer)."""
+    params = params if params else {}
+    if resolve_backend(backend) == 'gpu':
+        return CumlTfidfVectorizer(**params)
+    return SklearnTfidfVectorizer(**{**CPU_TFIDF_DEFAULTS, **params})
+
+def make_minmax_scaler(backend='auto'):
+    """Создает MinMaxScaler выбранного бэкенда (cuml или sklearn)."""
+    if resolve_backend(backend) == 'gpu':
+        return CumlMinMaxScaler()
+    return SklearnMinMaxScaler()
+
+def to_numpy(array):
+    """Возвращает массив в памяти хоста (numpy), копируя данные с GPU только если они там находятся."""
+    if cp is not None and isinstance(array, cp.ndarray):
+        return array.get()
+    if cudf is not None and isinstance(array, (cudf.Series, cudf.DataFrame)):
+        return array.to_pandas().to_numpy()
+    return np.asarray(array)
+
+def to_scipy_csr(matrix):
+    """Возвращает разреженную матрицу scipy CSR.
+
+    Разреженная матрица cupyx копируется на хост одним вызовом `.get()`, который уже возвращает
+    scipy CSR; матрицы sklearn возвращаются без копирования.
+    """
+    if hasattr(matrix, 'get') and not isinstance(matrix, csr_matrix):
+        return matrix.get()
+    return matrix
+
+def as_dense_vectors(vectors, dtype=np.float32):
+    """Возвращает плотную матрицу векторов `dtype`; разреженная матрица (`output_format='sparse'`) преобразуется в плотную."""
+    if sp.issparse(vectors):
+        return vectors.toarray().astype(dtype, copy=False)
+    return np.asarray(vectors, dtype=dtype)
+
+def row_norms(vectors):
+    """Возвращает L2-нормы строк плотной или разреженной матрицы (float32)."""
+    if sp.issparse(vectors):
+        return np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1), dtype=np.float64).ravel()).astype(np.float32)
+    return np.linalg.norm(np.asarray(vectors, dtype=np.float32), axis=1)
+
+def cosine_similarity_matrix(query_vectors, vectors, vector_norms=None):
+    """Вычисляет косинусную схожесть строк запросов со строками матрицы, не преобразуя разреженные матрицы в плотные.
+
+    Подходит для плотных и разреженных (scipy) матриц в любом сочетании: схожесть считается
+    как произведение матриц, деленное на нормы строк, а нормы матрицы можно вычислить один раз
+    (`row_norms`) и передавать при каждом запросе. Строки с нулевой нормой имеют нулевую схожесть.
+
+    Аргументы:
+        query_vectors (np.ndarray или scipy.sparse): Векторы запросов (количество запросов x размерность) или один вектор.
+        vectors (np.ndarray или scipy.sparse): Матрица векторов (количество строк x размерность).
+        vector_norms (np.ndarray, optional): Предвычисленные нормы строк `vectors`. По умолчанию None.
+
+    Возвращает:
+        np.ndarray: Матрица схожести float32 (количество запросов x количество строк).
+    """
+    if not sp.issparse(query_vectors):
+        query_vectors = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+    if vector_norms is None:
+        vector_norms = row_norms(vectors)
+    query_norms = row_norms(query_vectors)
+    dots = query_vectors @ vectors.T
+    dots = dots.toarray() if sp.issparse(dots) else np.asarray(dots)
+    denominator = np.outer(query_norms, vector_norms)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        similarities = np.where(denominator > 0, dots / denominator, 0)
+    return similarities.astype(np.float32, copy=False)
+
+def tfidf_vocabulary(tfidf):
+    """Возвращает словарь TF-IDF векторизатора любого бэкенда в виде {слово: индекс}."""
+    vocabulary = tfidf.vocabulary_
+    if hasattr(vocabulary, 'to_pandas'):
+        vocabulary = vocabulary.to_pandas()
+    return {word: int(index) for word, index in dict(vocabulary).items()}
+
+def tfidf_feature_names(tfidf):
+    """Возвращает список признаков (слов) TF-IDF векторизатора любого бэкенда в порядке индексов."""
+    vocabulary = tfidf_vocabulary(tfidf)
+    return [word for word, index in sorted(vocabulary.items(), key=lambda item: item[1])]
+
+def tfidf_to_cpu(tfidf):
+    """Преобразует обученный CumlTfidfVectorizer в эквивалентный sklearn TfidfVectorizer.
+
+    Переносит словарь и веса IDF, а также совпадающие параметры векторизатора,
+    поэтому модель, обученная на GPU, дает на CPU ту же TF-IDF матрицу.
+    Векторизатор sklearn возвращается без изменений.
+    """
+    if isinstance(tfidf, SklearnTfidfVectorizer):
+        return tfidf
+    shared_params = SklearnTfidfVectorizer().get_params().keys()
+    params = {key: value for key, value in tfidf.get_params().items() if key in shared_params}
+    params = {**CPU_TFIDF_DEFAULTS, **{key: value for key, value in params.items() if key not in ('preprocessor', 'analyzer')}}
+    cpu_tfidf = SklearnTfidfVectorizer(**params)
+    cpu_tfidf.vocabulary_ = tfidf_vocabulary(tfidf)
+    if getattr(cpu_tfidf, 'use_idf', True):
+        cpu_tfidf.idf_ = to_numpy(tfidf.idf_).astype(np.float64).ravel()
+    return cpu_tfidf
+
+def scaler_to_cpu(scaler):
+    """Преобразует обученный cuml MinMaxScaler в эквивалентный sklearn MinMaxScaler."""
+    if isinstance(scaler, SklearnMinMaxScaler):
+        return scaler
+    cpu_scaler = SklearnMinMaxScaler(feature_range=tuple(scaler.feature_range), clip=getattr(scaler, 'clip', False))
+    for attribute in ('min_', 'scale_', 'data_min_', 'data_max_', 'data_range_'):
+        setattr(cpu_scaler, attribute, to_numpy(getattr(scaler, attribute)).astype(np.float64).ravel())
+    cpu_scaler.n_samples_seen_ = int(to_numpy(scaler.n_samples_seen_))
+    cpu_scaler.n_features_in_ = cpu_scaler.min_.shape[0]
+    return cpu_scaler
+
+def convert_model_to_cpu(model):
+    """Переводит модель (Pipeline или CombinedVectorizer) на CPU-бэкенд без переобучения.
+
+    Аргументы:
+        model: Обученная модель (Pipeline с шагом CombinedVectorizer или сам CombinedVectorizer).
+
+    Возвращает:
+        Та же модель, все CombinedVectorizer которой используют sklearn-компоненты.
+    """
+    steps = model.named_steps.values() if hasattr(model, 'named_steps') else [model]
+    for step in steps:
+        if isinstance(step, CombinedVectorizer):
+            step.to_cpu()
+    return model
+
+def get_feature_blocks(model):
+    """Возвращает блоки признаков комбинированного вектора модели (см. `CombinedVectorizer.feature_blocks`).
+
+    Блоки определены, только если CombinedVectorizer - последний шаг модели (иначе следующие шаги
+    меняют пространство признаков) и модель обучена; в остальных случаях возвращается None.
+    """
+    steps = list(model.named_steps.values()) if hasattr(model, 'named_steps') else [model]
+    if not steps or not isinstance(steps[-1], CombinedVectorizer):
+        return None
+    try:
+        return steps[-1].feature_blocks()
+    except (AttributeError, TypeError):
+        return None
+
+def disable_debug_vectors(model):
+    """Отключает сохранение отладочных векторов transform (`keep_debug_vectors`) во всех CombinedVectorizer модели."""
+    steps = model.named_steps.values() if hasattr(model, 'named_steps') else [model]
+    for step in steps:
+        if isinstance(step, CombinedVectorizer):
+            step.set_params(keep_debug_vectors=False)
+            step.transformed_owners_vectors = None
+            step.transformed_tags_vectors = None
+            step.transformed_desc_vectors = None
+            step.transformed_combined_vectors = None
+    return model
+
 def reduce_dataset(df, percentage=0.1):
     """Уменьшает размер DataFrame до указанной доли, отсортированной по убыванию 'estimated_owners'.
 
@@ -65,10 +258,54 @@ def reduce_dataset(df, percentage=0.1):
     print(f"✅ Датасет уменьшен до {len(reduced_df)} строк.")
     return reduced_df
 
+@contextmanager
+def torch_threads(n_threads=None):
+    """Временно ограничивает количество потоков PyTorch на CPU (None - без изменений)."""
+    if not n_threads:
+        yield
+        return
+    previous_threads = torch.get_num_threads()
+    torch.set_num_threads(int(n_threads))
+    try:
+        yield
+    finally:
+        torch.set_num_threads(previous_threads)
+
+def to_torch_docs(docs, device, dtype=torch.float32):
+    """Преобразует матрицу документов в тензор PyTorch на устройстве `device`.
+
+    scipy и torch разреженные матрицы преобразуются в разреженный COO тензор без уплотнения,
+    numpy массивы и плотные тензоры - в плотный тензор.
+
+    Аргументы:
+        docs (scipy.sparse, np.ndarray или torch.Tensor): Матрица документов (количество документов x размер словаря).
+        device (torch.device): Устройство для тензора.
+        dtype (torch.dtype, optional): Тип значений. По умолчанию torch.float32.
+
+    Возвращает:
+        torch.Tensor: Плотный или разреженный (COO) тензор.
+    """
+    if sp.issparse(docs):
+        coo = docs.tocoo()
+        indices = torch.from_numpy(np.vstack([coo.row, coo.col]).astype(np.int64))
+        values = torch.from_numpy(np.asarray(coo.data, dtype=np.float32))
+        return torch.sparse_coo_tensor(indices, values, coo.shape, device=device, dtype=dtype, check_invariants=False).coalesce()
+    if isinstance(docs, torch.Tensor):
+        if docs.is_sparse or docs.layout != torch.strided:
+            return docs.to_sparse_coo().to(device=device, dtype=dtype).coalesce()
+        return docs.to(device=device, dtype=dtype)
+    return torch.as_tensor(np.asarray(docs), dtype=dtype, device=device)
+
 class TorchLDA(nn.Module):
     """Реализация модели LDA (Latent Dirichlet Allocation) на PyTorch.
 
     Использует нейронную сеть для моделирования LDA, позволяя использовать GPU для ускорения вычислений.
+    Принимает плотные и разреженные (scipy CSR, torch sparse) матрицы документов: разреженные входы
+    не уплотняются, а произведения считаются через `torch.sparse.mm`. При `batch_size` обучение идет
+    онлайн по мини-батчам (матрица тем по словам обновляется после каждого батча с шагом
+    `(learning_offset + t) ** -learning_decay`, как в онлайн LDA sklearn), иначе - полным EM по всем документам.
+    Правдоподобие для проверки сходимости считается только по ненулевым элементам, раз в `evaluate_every`
+    итераций и, при `likelihood_sample_size`, на фиксированной выборке документов.
 
     Аргументы:
         n_topics (int): Количество тем для моделирования.
@@ -76,10 +313,19 @@ class TorchLDA(nn.Module):
         device (torch.device): Устройство, на котором будет выполняться обучение (CPU или GPU).
         alpha (float, optional): Параметр априорного распределения Дирихле для распределения документов по темам. По умолчанию 0.1.
         beta (float, optional): Параметр априорного распределения Дирихле для распределения тем по словам. По умолчанию 0.01.
-        max_iterations (int, optional): Максимальное количество итераций EM-алгоритма. По умолчанию 100.
+        max_iterations (int, optional): Максимальное количество итераций (проходов по документам). По умолчанию 100.
         tolerance (float, optional): Порог сходимости для EM-алгоритма. По умолчанию 1e-4.
+        batch_size (int, optional): Размер мини-батча для онлайн обучения. None - полный EM. По умолчанию None.
+        learning_decay (float, optional): Скорость затухания шага онлайн обновления (0.5, 1]. По умолчанию 0.7.
+        learning_offset (float, optional): Смещение шага онлайн обновления (> 0), уменьшает вес первых батчей. По умолчанию 10.0.
+        evaluate_every (int, optional): Вычислять правдоподобие раз в указанное количество итераций. По умолчанию 1.
+        likelihood_sample_size (int, optional): Количество документов для оценки правдоподобия. None - все документы. По умолчанию None.
+        n_threads (int, optional): Количество потоков PyTorch на CPU во время обучения и трансформации. None - без изменений. По умолчанию None.
+        random_state (int, optional): Seed для инициализации и выборки документов. По умолчанию None.
     """
-    def __init__(self, n_topics, n_vocab, device, alpha=0.1, beta=0.01, max_iterations=100, tolerance=1e-4):
+    def __init__(self, n_topics, n_vocab, device, alpha=0.1, beta=0.01, max_iterations=100, tolerance=1e-4,
+                 batch_size=None, learning_decay=0.7, learning_offset=10.0, evaluate_every=1,
+                 likelihood_sample_size=None, n_threads=None, random_state=None):
         super().__init__()
         self.n_topics = n_topics
         self.n_vocab = n_vocab
@@ -88,56 +334,131 @@ class TorchLDA(nn.Module):
         self.beta = beta
         self.max_iterations = max_iterations
         self.tolerance = tolerance
-        self.topic_term_matrix = nn.Parameter(torch.randn(n_topics, n_vocab, device=device).abs())
+        self.batch_size = batch_size
+        self.learning_decay = learning_decay
+        self.learning_offset = learning_offset
+        self.evaluate_every = evaluate_every
+        self.likelihood_sample_size = likelihood_sample_size
+        self.n_threads = n_threads
+        self.random_state = random_state
+        self.generator = torch.Generator(device='cpu')
+        if random_state is not None:
+            self.generator.manual_seed(random_state)
+        self.topic_term_matrix = nn.Parameter(torch.randn(n_topics, n_vocab, generator=self.generator).abs().to(device), requires_grad=False)
         self.doc_topic_matrix = None
         self.norm_topic_term_matrix = None
+        self.n_batch_updates = 0
 
     def initialize_parameters(self, docs):
-        """Инициализирует параметры модели LDA случайными значениями.
+        """Инициализирует матрицу тем по словам случайными значениями.
 
         Аргументы:
-            docs (torch.Tensor): Матрица документов (не используется в инициализации, но ожидается для совместимости интерфейса).
+            docs: Матрица документов (не используется в инициализации, но ожидается для совместимости интерфейса).
         """
-        self.doc_topic_matrix = torch.rand(docs.shape[0], self.n_topics, device=self.device).abs()
-        self.topic_term_matrix.data = torch.randn(self.n_topics, self.n_vocab, device=self.device).abs()
+        self.doc_topic_matrix = None
+        self.n_batch_updates = 0
+        self.topic_term_matrix.data = torch.randn(self.n_topics, self.n_vocab, generator=self.generator).abs().to(self.device)
+
+    def _batches(self, docs, batch_size):
+        """Возвращает строки матрицы документов батчами (тензорами на устройстве модели)."""
+        n_docs = docs.shape[0]
+        if not batch_size or batch_size >= n_docs:
+            yield to_torch_docs(docs, self.device)
+            return
+        for start in range(0, n_docs, batch_size):
+            yield to_torch_docs(docs[start:start + batch_size], self.device)
 
     def fit(self, docs, log=False):
-        """Обучает модель LDA на основе предоставленных документов, используя EM-алгоритм.
+        """Обучает модель LDA на основе предоставленных документов, используя EM-алгоритм (полный или по мини-батчам).
 
         Аргументы:
-            docs (torch.Tensor): Матрица документов (размерность: количество документов x размер словаря).
+            docs (scipy.sparse, np.ndarray или torch.Tensor): Матрица документов (размерность: количество документов x размер словаря).
             log (bool, optional): Включает вывод логов во время обучения. По умолчанию False.
 
         Возвращает:
             TorchLDA: Обученная модель LDA.
         """
         if log: print("LDA Fit started")
-        self.initialize_parameters(docs)
-        docs = docs.to(self.device)
-        prev_likelihood = float('-inf')
-        for iteration in range(self.max_iterations):
-            doc_topic_distribution = self.expect(docs)
-            self.topic_term_matrix = self.maximize(docs, doc_topic_distribution)
-            current_likelihood = self.likelihood(docs, doc_topic_distribution)
-            if log: print(f"Iteration {iteration+1}, Likelihood {current_likelihood:.2f}")
-            if abs(current_likelihood - prev_likelihood) < self.tolerance:
-                if log: print("LDA Converged")
-                break
-            prev_likelihood = current_likelihood
-        self.norm_topic_term_matrix = self.normalize(self.topic_term_matrix)
+        if isinstance(docs, torch.Tensor) and docs.layout != torch.strided:
+            docs = docs.coalesce() if docs.is_sparse else docs.to_sparse_coo().coalesce()
+            indices = docs.indices().cpu().numpy()
+            docs = sp.csr_matrix((docs.values().cpu().numpy(), (indices[0], indices[1])), shape=tuple(docs.shape))
+        elif sp.issparse(docs):
+            docs = docs.tocsr()
+        n_docs = docs.shape[0]
+        online = self.batch_size is not None and self.batch_size < n_docs
+
+        sample_docs = docs
+        if self.likelihood_sample_size and self.likelihood_sample_size < n_docs:
+            sample_rows = torch.randperm(n_docs, generator=self.generator)[:self.likelihood_sample_size].sort().values.numpy()
+            sample_docs = docs[sample_rows]
+
+        with torch_threads(self.n_threads), torch.no_grad():
+            self.initialize_parameters(docs)
+            if not online:
+                sample_is_docs = sample_docs is docs
+                docs = to_torch_docs(docs, self.device)
+                sample_docs = docs if sample_is_docs else sample_docs
+            prev_likelihood = float('-inf')
+            for iteration in range(self.max_iterations):
+                if online:
+                    for batch in self._batches(docs, self.batch_size):
+                        self.partial_fit(batch, total_docs=n_docs)
+                else:
+                    doc_topic_distribution = self.expect(docs)
+                    self.topic_term_matrix.data = self.maximize(docs, doc_topic_distribution)
+                if (iteration + 1) % max(int(self.evaluate_every), 1) != 0 and iteration + 1 < self.max_iterations:
+                    continue
+                current_likelihood = sum(
+                    self.likelihood(batch, self.expect(batch)) for batch in self._batches(sample_docs, self.batch_size)
+                )
+                if log: print(f"Iteration {iteration+1}, Likelihood {current_likelihood:.2f}")
+                if abs(current_likelihood - prev_likelihood) < self.tolerance:
+                    if log: print("LDA Converged")
+                    break
+                prev_likelihood = current_likelihood
+            self.norm_topic_term_matrix = self.normalize(self.topic_term_matrix.data)
         if log: print("LDA Fit ended")
         return self
 
+    def partial_fit(self, docs, total_docs=None):
+        """Выполняет одно онлайн обновление матрицы тем по словам на мини-батче документов.
+
+        Оценка матрицы по батчу масштабируется до размера корпуса и смешивается с текущей
+        матрицей с шагом `(learning_offset + t) ** -learning_decay`.
+
+        Аргументы:
+            docs (scipy.sparse, np.ndarray или torch.Tensor): Мини-батч документов.
+            total_docs (int, optional): Количество документов в корпусе. По умолчанию размер батча.
+
+        Возвращает:
+            TorchLDA: Модель с обновленной матрицей тем по словам.
+        """
+        with torch.no_grad():
+            docs = to_torch_docs(docs, self.device)
+            total_docs = total_docs if total_docs else docs.shape[0]
+            doc_topic_distribution = self.expect(docs)
+            batch_estimate = (self.maximize(docs, doc_topic_distribution) - self.beta) * (total_docs / docs.shape[0]) + self.beta
+            rho = (self.learning_offset + self.n_batch_updates) ** -self.learning_decay
+            self.topic_term_matrix.data = (1 - rho) * self.topic_term_matrix.data + rho * batch_estimate
+            self.n_batch_updates += 1
+            self.norm_topic_term_matrix = self.normalize(self.topic_term_matrix.data)
+        return self
+
     def expect(self, docs):
         """Выполняет E-шаг EM-алгоритма для LDA: оценка распределения документов по темам.
 
         Аргументы:
-            docs (torch.Tensor): Матрица документов.
+            docs (torch.Tensor): Матрица документов (плотная или разреженная).
 
         Возвращает:
             torch.Tensor: Матрица распределения документов по темам.
         """
-        doc_topic_distribution = torch.matmul(docs, self.topic_term_matrix.T) + self.alpha
+        topic_term_matrix = self.topic_term_matrix.data
+        if docs.is_sparse:
+            doc_topic_distribution = torch.sparse.mm(docs, topic_term_matrix.T) + self.alpha
+        else:
+            doc_topic_distribution = torch.matmul(docs, topic_term_matrix.T) + self.alpha
         doc_topic_distribution = self.normalize(doc_topic_distribution)
         return doc_topic_distribution
 
@@ -145,27 +466,46 @@ class TorchLDA(nn.Module):
         """Выполняет M-шаг EM-алгоритма для LDA: оценка распределения тем по словам.
 
         Аргументы:
-            docs (torch.Tensor): Матрица документов.
+            docs (torch.Tensor): Матрица документов (плотная или разреженная).
             doc_topic_distribution (torch.Tensor): Матрица распределения документов по темам.
 
         Возвращает:
             torch.Tensor: Матрица распределения тем по словам.
         """
-        topic_term_matrix = torch.matmul(doc_topic_distribution.T, docs) + self.beta
+        if docs.is_sparse:
+            topic_term_matrix = torch.sparse.mm(docs.t(), doc_topic_distribution).T + self.beta
+        else:
+            topic_term_matrix = torch.matmul(doc_topic_distribution.T, docs) + self.beta
         return topic_term_matrix
 
-    def likelihood(self, docs, doc_topic_distribution):
+    def likelihood(self, docs, doc_topic_distribution, chunk_size=1 << 18):
         """Вычисляет логарифмическое правдоподобие для оценки сходимости EM-алгоритма.
 
+        Вероятности слов считаются только для ненулевых элементов матрицы документов (частями по `chunk_size`),
+        без построения плотной матрицы документов x словарь.
+
         Аргументы:
-            docs (torch.Tensor): Матрица документов.
+            docs (torch.Tensor): Матрица документов (плотная или разреженная).
             doc_topic_distribution (torch.Tensor): Матрица распределения документов по темам.
+            chunk_size (int, optional): Количество ненулевых элементов, обрабатываемых за раз. По умолчанию 262144.
 
         Возвращает:
             float: Значение логарифмического правдоподобия.
         """
-        log_likelihood = torch.sum(docs * torch.log(torch.matmul(doc_topic_distribution, self.normalize(self.topic_term_matrix))))
-        return log_likelihood.item()
+        if docs.is_sparse:
+            docs = docs.coalesce()
+            rows, cols = docs.indices()
+            values = docs.values()
+        else:
+            rows, cols = torch.nonzero(docs, as_tuple=True)
+            values = docs[rows, cols]
+        norm_topic_term_matrix = self.normalize(self.topic_term_matrix.data)
+        log_likelihood = 0.0
+        for start in range(0, values.shape[0], chunk_size):
+            chunk_rows, chunk_cols = rows[start:start + chunk_size], cols[start:start + chunk_size]
+            word_probabilities = (doc_topic_distribution[chunk_rows] * norm_topic_term_matrix[:, chunk_cols].T).sum(dim=1)
+            log_likelihood += torch.sum(values[start:start + chunk_size] * torch.log(word_probabilities)).item()
+        return log_likelihood
 
     def normalize(self, matrix):
         """Нормализует матрицу, приводя суммы строк к единице.
@@ -183,7 +523,7 @@ class TorchLDA(nn.Module):
         """Преобразует новые документы в векторное представление в пространстве тем.
 
         Аргументы:
-            docs (torch.Tensor): Матрица новых документов.
+            docs (scipy.sparse, np.ndarray или torch.Tensor): Матрица новых документов.
 
         Возвращает:
             torch.Tensor: Матрица распределения документов по темам для новых документов.
@@ -192,9 +532,13 @@ class TorchLDA(nn.Module):
         """
         if self.norm_topic_term_matrix is None:
             raise ValueError("❌ LDA model has not been fitted yet.")
-        docs = docs.to(self.device)
-        doc_topic_distribution = torch.matmul(docs, self.norm_topic_term_matrix.T) + self.alpha
-        return self.normalize(doc_topic_distribution)
+        with torch_threads(self.n_threads), torch.no_grad():
+            docs = to_torch_docs(docs, self.device)
+            if docs.is_sparse:
+                doc_topic_distribution = torch.sparse.mm(docs, self.norm_topic_term_matrix.T) + self.alpha
+            else:
+                doc_topic_distribution = torch.matmul(docs, self.norm_topic_term_matrix.T) + self.alpha
+            return self.normalize(doc_topic_distribution)
 
 def vectorize_owners(df, method='log_scale', scaler=None):
     """Векторизует данные о владельцах игр, используя логарифмическое масштабирование или стандартное масштабирование.
@@ -225,6 +569,27 @@ def vectorize_owners(df, method='log_scale', scaler=None):
     else:
         raise ValueError("❌ Недопустимый метод векторизации владельцев.")
 
+def transform_tags_sparse(mlb, tags, tag_weight=1.0, dtype=np.float32):
+    """Возвращает взвешенные бинарные векторы тегов в виде scipy CSR матрицы `dtype`.
+
+    Плотная матрица не создается даже для MultiLabelBinarizer, обученного с `sparse_output=False`:
+    трансформация выполняется его копией с разреженным выходом.
+
+    Аргументы:
+        mlb (MultiLabelBinarizer): Обученный MultiLabelBinarizer.
+        tags (iterable): Списки тегов.
+        tag_weight (float, optional): Вес тегов. По умолчанию 1.0.
+        dtype (numpy dtype, optional): Тип значений. По умолчанию np.float32.
+
+    Возвращает:
+        scipy.sparse.csr_matrix: Матрица (количество игр x количество тегов).
+    """
+    sparse_mlb = copy.copy(mlb)
+    sparse_mlb.sparse_output = True
+    tags_vectors = csr_matrix(sparse_mlb.transform(tags), dtype=dtype)
+    tags_vectors.data *= np.asarray(tag_weight, dtype=dtype)
+    return tags_vectors
+
 def vectorize_tags(df, multilabel_params=None):
     """Векторизует теги игр, используя MultiLabelBinarizer для преобразования в бинарные векторы.
 
@@ -251,39 +616,111 @@ def vectorize_descriptions(df, nmf_params=None, lda_params=None, vectorizer_cuml
         df (pd.DataFrame): DataFrame, содержащий столбец 'short_description_clean' с очищенными описаниями.
         nmf_params (dict, optional): Параметры для NMF. Если указаны, используется NMF. По умолчанию None.
         lda_params (dict, optional): Параметры для LDA. Если указаны, используется LDA. По умолчанию None.
-        vectorizer_cuml (CumlTfidfVectorizer, optional): Обученный CumlTfidfVectorizer. По умолчанию None.
+        vectorizer_cuml (CumlTfidfVectorizer или TfidfVectorizer, optional): Обученный TF-IDF векторизатор любого бэкенда. По умолчанию None.
 
     Возвращает:
         tuple: Кортеж, содержащий:
             - np.ndarray: Векторизованные описания (тематические векторы).
             - NMF или LatentDirichletAllocation: Обученная модель NMF или LDA.
 
-    Вызывает ValueError, если не предоставлен обученный CumlTfidfVectorizer или не указаны параметры nmf_params или lda_params.
+    Вызывает ValueError, если не предоставлен обученный TF-IDF векторизатор или не указаны параметры nmf_params или lda_params.
     """
     if vectorizer_cuml is None:
-        raise ValueError("❌ Необходимо предоставить обученный CumlTfidfVectorizer.")
-    desc_vectorized_cuml = vectorizer_cuml.transform(df['short_description_clean'])
-    desc_vectorized_cuml_cpu = desc_vectorized_cuml.get()
-    data = cp.asnumpy(desc_vectorized_cuml_cpu.data)
-    indices = cp.asnumpy(desc_vectorized_cuml_cpu.indices)
-    indptr = cp.asnumpy(desc_vectorized_cuml_cpu.indptr)
-    shape = desc_vectorized_cuml_cpu.shape
-    desc_vectorized_cpu = csr_matrix((data, indices, indptr), shape=shape)
+        raise ValueError("❌ Необходимо предоставить обученный TF-IDF векторизатор.")
+    desc_vectorized_cpu = to_scipy_csr(vectorizer_cuml.transform(df['short_description_clean']))
+    return fit_topic_model(desc_vectorized_cpu, nmf_params=nmf_params, lda_params=lda_params)
+
+def fit_topic_model(tfidf_matrix, nmf_params=None, lda_params=None):
+    """Обучает NMF или LDA на готовой TF-IDF матрице описаний.
+
+    Аргументы:
+        tfidf_matrix (scipy.sparse.csr_matrix): TF-IDF матрица описаний.
+        nmf_params (dict, optional): Параметры для NMF. Если указаны, используется NMF. По умолчанию None.
+        lda_params (dict, optional): Параметры для LDA. Если указаны, используется LDA. По умолчанию None.
 
+    Возвращает:
+        tuple: Кортеж, содержащий:
+            - np.ndarray: Тематические векторы описаний.
+            - NMF или LatentDirichletAllocation: Обученная модель NMF или LDA.
+
+    Вызывает ValueError, если не указаны параметры nmf_params или lda_params.
+    """
     if nmf_params:
         nmf = NMF(**nmf_params)
-        nmf_vectorized = nmf.fit_transform(desc_vectorized_cpu)
+        nmf_vectorized = nmf.fit_transform(tfidf_matrix)
         return nmf_vectorized, nmf
     elif lda_params:
         lda = LatentDirichletAllocation(**lda_params)
-        lda_vectorized = lda.fit_transform(desc_vectorized_cpu)
+        lda_vectorized = lda.fit_transform(tfidf_matrix)
         return lda_vectorized, lda
     else:
         raise ValueError("❌ Необходимо указать nmf_params или lda_params")
 
+def top_word_indices(topic_vectors, num_top_words=10):
+    """Возвращает индексы топ-слов каждой темы по убыванию веса.
+
+    Использует `np.argpartition` и сортирует только отобранные `num_top_words` слов каждой темы,
+    а не всю строку словаря.
+
+    Аргументы:
+        topic_vectors (np.ndarray): Матрица тем по словам (количество тем x размер словаря).
+        num_top_words (int, optional): Количество топ-слов. По умолчанию 10.
+
+    Возвращает:
+        np.ndarray: Матрица индексов (количество тем x min(num_top_words, размер словаря)).
+    """
+    topic_vectors = np.asarray(topic_vectors)
+    num_top_words = min(int(num_top_words), topic_vectors.shape[1])
+    if num_top_words <= 0:
+        return np.empty((topic_vectors.shape[0], 0), dtype=np.int64)
+    if num_top_words < topic_vectors.shape[1]:
+        candidates = np.argpartition(-topic_vectors, num_top_words - 1, axis=1)[:, :num_top_words]
+    else:
+        candidates = np.tile(np.arange(topic_vectors.shape[1]), (topic_vectors.shape[0], 1))
+    order = np.argsort(-np.take_along_axis(topic_vectors, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+def topic_diversity_from_components(topic_vectors):
+    """Вычисляет разнообразие тем (1 - среднее косинусное сходство пар тем) одним матричным произведением.
+
+    Аргументы:
+        topic_vectors (np.ndarray): Матрица тем по словам (количество тем x размер словаря).
+
+    Возвращает:
+        float: Значение разнообразия тем. Возвращает -1, если количество тем меньше 2.
+    """
+    topic_vectors = np.asarray(topic_vectors, dtype=np.float64)
+    num_topics = topic_vectors.shape[0]
+    if num_topics < 2:
+        return -1
+    norms = np.linalg.norm(topic_vectors, axis=1)
+    normalized = topic_vectors / np.where(norms > 0, norms, 1)[:, None]
+    similarities = normalized @ normalized.T
+    pair_similarities = similarities[np.triu_indices(num_topics, k=1)]
+    return 1 - pair_similarities.mean()
+
+def topic_entropies_from_components(topic_vectors, num_top_words=10, top_indices=None):
+    """Вычисляет энтропию распределения топ-слов каждой темы (основание 2).
+
+    Аргументы:
+        topic_vectors (np.ndarray): Матрица тем по словам (количество тем x размер словаря).
+        num_top_words (int, optional): Количество топ-слов для расчета энтропии. По умолчанию 10.
+        top_indices (np.ndarray, optional): Уже вычисленные `top_word_indices`. По умолчанию None.
+
+    Возвращает:
+        np.ndarray: Энтропии тем.
+    """
+    topic_vectors = np.asarray(topic_vectors)
+    top_indices = top_indices if top_indices is not None else top_word_indices(topic_vectors, num_top_words)
+    top_word_probabilities = np.take_along_axis(topic_vectors, top_indices[:, :num_top_words], axis=1)
+    return entropy(top_word_probabilities, base=2, axis=1)
+
 def calculate_topic_coherence(model, vectorizer, texts):
     """Вычисляет когерентность темы модели.
 
+    Для многократной оценки на одном корпусе используйте `TopicModelEvaluator`,
+    который токенизирует тексты и строит словарь gensim один раз.
+
     Аргументы:
         model: Обученная тематическая модель (NMF или LDA).
         vectorizer: Обученный TF-IDF векторизатор.
@@ -293,32 +730,10 @@ def calculate_topic_coherence(model, vectorizer, texts):
         float: Значение когерентности темы. Возвращает -999 в случае ошибки.
     """
     try:
-        feature_names_cuml = vectorizer.get_feature_names()
-
-        if isinstance(feature_names_cuml, cudf.core.series.Series):
-            feature_names = feature_names_cuml.to_pandas().tolist()
-        elif not isinstance(feature_names_cuml, list):
-            return -999
-
+        feature_names = tfidf_feature_names(vectorizer)
         if hasattr(model, 'components_') and feature_names is not None:
-            topic_vectors = model.components_
-            if isinstance(topic_vectors, cp.ndarray):
-                topic_vectors_np = topic_vectors.get()
-            else:
-                topic_vectors_np = topic_vectors
-
-            top_words_idx = topic_vectors_np.argsort()[:, ::-1]
-            top_words = [[feature_names[i] for i in topic_word_idx[:10]] for topic_word_idx in top_words_idx]
-
-            dictionary = Dictionary([text.split() for text in texts])
-            tokenized_texts = [text.split() for text in texts]
-
-            cm = CoherenceModel(topics=top_words, texts=tokenized_texts, dictionary=dictionary, coherence='u_mass')
-
-            coherence_score = cm.get_coherence()
-            return coherence_score
-        else:
-            return -999
+            return TopicModelEvaluator(texts).coherence(model, feature_names)
+        return -999
     except Exception:
         return -999
 
@@ -335,32 +750,13 @@ def calculate_topic_diversity(model):
         print("⚠️ Модель не имеет атрибута components_.")
         return -1
 
-    topic_vectors = model.components_
-    if isinstance(topic_vectors, cp.ndarray):
-        topic_vectors_np = topic_vectors.get()
-    else:
-        topic_vectors_np = topic_vectors
+    topic_vectors_np = to_numpy(model.components_)
 
     if topic_vectors_np.shape[0] < 2:
         print("⚠️ Менее двух тем. Невозможно вычислить разнообразие.")
         return -1
 
-    num_topics = topic_vectors_np.shape[0]
-    total_similarity = 0
-    num_pairs = 0
-
-    for i in range(num_topics):
-      for j in range(i+1, num_topics):
-         similarity = cosine_similarity(topic_vectors_np[i].reshape(1, -1), topic_vectors_np[j].reshape(1, -1))[0][0]
-         total_similarity += similarity
-         num_pairs += 1
-
-    if num_pairs == 0:
-      return -1
-
-    average_similarity = total_similarity / num_pairs
-    average_distance = 1 - average_similarity
-    return average_distance
+    return topic_diversity_from_components(topic_vectors_np)
 
 def calculate_intra_topic_diversity(model, feature_names, num_top_words=10):
     """Вычисляет разнообразие слов внутри каждой темы, используя энтропию распределения слов.
@@ -377,26 +773,14 @@ def calculate_intra_topic_diversity(model, feature_names, num_top_words=10):
         print("⚠️ Модель не имеет атрибута components_.")
         return -1
 
-    topic_vectors = model.components_
-    if isinstance(topic_vectors, cp.ndarray):
-        topic_vectors_np = topic_vectors.get()
-    else:
-        topic_vectors_np = topic_vectors
+    topic_vectors_np = to_numpy(model.components_)
     num_topics = topic_vectors_np.shape[0]
 
     if num_topics == 0:
         print("⚠️ Нет тем для расчета разнообразия.")
         return -1
 
-    topic_entropies = []
-    for topic in topic_vectors_np:
-        top_word_indices = np.argsort(topic)[::-1][:num_top_words]
-        top_word_probabilities = topic[top_word_indices]
-        normalized_probabilities = top_word_probabilities / np.sum(top_word_probabilities)
-        topic_entropy = entropy(normalized_probabilities, base=2)
-        topic_entropies.append(topic_entropy)
-
-    return np.mean(topic_entropies) if topic_entropies else -1
+    return np.mean(topic_entropies_from_components(topic_vectors_np, num_top_words))
 
 def display_topics(model, feature_names, num_top_words=10):
     """Выводит наиболее значимые слова для каждой темы.
@@ -406,10 +790,9 @@ def display_topics(model, feature_names, num_top_words=10):
         feature_names (list): Список названий признаков (слов) из TF-IDF векторизатора.
         num_top_words (int, optional): Количество топ-слов для отображения для каждой темы. По умолчанию 10.
     """
-    for topic_idx, topic in enumerate(model.components_):
+    for topic_idx, top_indices in enumerate(top_word_indices(to_numpy(model.components_), num_top_words)):
         print(f"   Тема #{topic_idx}:", end=' ')
-        top_word_indices = topic.argsort()[::-1][:num_top_words]
-        top_words = [feature_names[i] for i in top_word_indices]
+        top_words = [feature_names[i] for i in top_indices]
         print(" ".join(top_words))
     print()
 
@@ -426,22 +809,126 @@ def display_topics_with_diversity(model, feature_names, num_top_words=25, num_di
         print("⚠️ Модель не имеет атрибута components_.")
         return
 
-    topic_vectors = model.components_
-    if isinstance(topic_vectors, cp.ndarray):
-        topic_vectors_np = topic_vectors.get()
-    else:
-        topic_vectors_np = topic_vectors
+    topic_vectors_np = to_numpy(model.components_)
+    top_indices = top_word_indices(topic_vectors_np, num_top_words)
+    topic_entropies = topic_entropies_from_components(topic_vectors_np, num_top_words, top_indices)
 
-    for topic_idx, topic in enumerate(topic_vectors_np):
+    for topic_idx, topic_word_indices in enumerate(top_indices):
         print(f"   Тема #{topic_idx}. ", end=' ')
-        top_word_indices = np.argsort(topic)[::-1][:num_top_words]
-        top_words = [feature_names[i] for i in top_word_indices]
+        top_words = [feature_names[i] for i in topic_word_indices]
         print(f"Топ-{num_display_words} слов: {' '.join(top_words[:num_display_words])}")
-        normalized_probabilities = topic[top_word_indices] / np.sum(topic[top_word_indices])
-        topic_entropy = entropy(normalized_probabilities, base=2)
-        print(f"   Энтропия темы: {topic_entropy:.4f}")
+        print(f"   Энтропия темы: {topic_entropies[topic_idx]:.4f}")
     print()
 
+class TopicModelEvaluator:
+    """
+    Оценка тематических моделей на одном корпусе текстов.
+
+    Токенизирует тексты, строит словарь и bag-of-words корпус gensim один раз при создании,
+    поэтому повторная оценка моделей при поиске параметров не пересчитывает их. Топ-слова выбираются
+    через `np.argpartition`, разнообразие тем считается одним матричным произведением.
+    `evaluate_many` оценивает несколько моделей в пуле процессов, корпус передается в каждый процесс один раз.
+
+    Аргументы:
+        texts (list): Тексты, на которых обучались модели (слова разделены пробелами).
+        num_top_words (int, optional): Количество топ-слов темы для когерентности и энтропии. По умолчанию 10.
+        coherence (str, optional): Мера когерентности gensim ('u_mass', 'c_v', ...). По умолчанию 'u_mass'.
+    """
+    def __init__(self, texts, num_top_words=10, coherence='u_mass'):
+        self.num_top_words = num_top_words
+        self.coherence_measure = coherence
+        self.tokenized_texts = [text.split() for text in texts]
+        self.dictionary = Dictionary(self.tokenized_texts)
+        self.corpus = [self.dictionary.doc2bow(tokens) for tokens in self.tokenized_texts]
+
+    def top_words(self, topic_vectors, feature_names, num_top_words=None):
+        """Возвращает списки топ-слов каждой темы по убыванию веса."""
+        num_top_words = num_top_words if num_top_words else self.num_top_words
+        return [[feature_names[i] for i in row] for row in top_word_indices(topic_vectors, num_top_words)]
+
+    def coherence(self, model, feature_names):
+        """Вычисляет когерентность тем модели (или матрицы тем по словам) на кэшированном корпусе.
+
+        Вызывает:
+            ValueError: Если модель не имеет атрибута components_.
+        """
+        topic_vectors = self._topic_vectors(model)
+        topics = self.top_words(topic_vectors, feature_names)
+        corpus_params = {'corpus': self.corpus} if self.coherence_measure == 'u_mass' else {'texts': self.tokenized_texts}
+        cm = CoherenceModel(topics=topics, dictionary=self.dictionary, coherence=self.coherence_measure, **corpus_params)
+        return cm.get_coherence()
+
+    def evaluate(self, model, feature_names):
+        """Вычисляет метрики модели.
+
+        Аргументы:
+            model: Обученная тематическая модель (NMF или LDA) или матрица тем по словам.
+            feature_names (list): Список названий признаков (слов) из TF-IDF векторизатора.
+
+        Возвращает:
+            dict: 'coherence' (-999 при ошибке), 'diversity' (-1 при менее чем двух темах) и 'intra_topic_diversity'.
+        """
+        topic_vectors = self._topic_vectors(model)
+        try:
+            coherence_score = self.coherence(topic_vectors, feature_names)
+        except Exception:
+            coherence_score = -999
+        intra_topic_diversity = np.mean(topic_entropies_from_components(topic_vectors, self.num_top_words)) if topic_vectors.shape[0] else -1
+        return {
+            'coherence': coherence_score,
+            'diversity': topic_diversity_from_components(topic_vectors),
+            'intra_topic_diversity': intra_topic_diversity,
+        }
+
+    def evaluate_many(self, models, feature_names, n_workers=None):
+        """Оценивает несколько моделей, при `n_workers > 1` - в пуле процессов.
+
+        В процессы передаются только матрицы тем по словам, корпус и словарь копируются в каждый процесс один раз.
+
+        Аргументы:
+            models (list): Обученные модели или матрицы тем по словам.
+            feature_names (list): Названия признаков, общие для всех моделей, или список названий для каждой модели.
+            n_workers (int, optional): Количество процессов. По умолчанию None (число ядер процессора, но не больше числа моделей).
+
+        Возвращает:
+            list: Словари метрик (см. `evaluate`) в порядке моделей.
+        """
+        topic_vectors_list = [self._topic_vectors(model) for model in models]
+        per_model_names = len(feature_names) == len(models) and all(isinstance(names, (list, tuple, np.ndarray, pd.Index)) for names in feature_names)
+        names_list = list(feature_names) if per_model_names else [None] * len(models)
+        shared_names = None if per_model_names else feature_names
+        n_workers = n_workers if n_workers else os.cpu_count()
+        n_workers = max(1, min(n_workers, len(models)))
+        if n_workers == 1:
+            return [self.evaluate(topic_vectors, names if names is not None else shared_names) for topic_vectors, names in zip(topic_vectors_list, names_list)]
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker_evaluator, initargs=(self, shared_names)) as executor:
+            return list(executor.map(_evaluate_in_worker, topic_vectors_list, names_list))
+
+    @staticmethod
+    def _topic_vectors(model):
+        """Возвращает матрицу тем по словам модели в виде numpy массива."""
+        if isinstance(model, np.ndarray):
+            return model
+        if not hasattr(model, 'components_'):
+            raise ValueError("❌ Модель не имеет атрибута components_.")
+        return to_numpy(model.components_)
+
+
+_worker_evaluator = None
+_worker_feature_names = None
+
+
+def _init_worker_evaluator(evaluator, feature_names):
+    """Сохраняет TopicModelEvaluator и общие названия признаков процесса пула evaluate_many."""
+    global _worker_evaluator, _worker_feature_names
+    _worker_evaluator = evaluator
+    _worker_feature_names = feature_names
+
+
+def _evaluate_in_worker(topic_vectors, feature_names):
+    """Оценивает матрицу тем по словам TopicModelEvaluator-ом текущего процесса пула."""
+    return _worker_evaluator.evaluate(topic_vectors, feature_names if feature_names is not None else _worker_feature_names)
+
 class CombinedVectorizer(BaseEstimator, TransformerMixin):
     """Комбинированный векторизатор для обработки различных типов признаков.
 
@@ -453,25 +940,67 @@ class CombinedVectorizer(BaseEstimator, TransformerMixin):
         nmf_params (dict, optional): Параметры для NMF. Если указаны, используется NMF для векторизации описаний. По умолчанию None.
         lda_params (dict, optional): Параметры для LDA. Если указаны, используется LDA для векторизации описаний. По умолчанию None.
         tag_weight (float, optional): Вес, применяемый к векторизованным тегам. По умолчанию 1.0.
-        tfidf_cuml_params (dict, optional): Параметры для CumlTfidfVectorizer. По умолчанию None.
+        tfidf_cuml_params (dict, optional): Параметры для TF-IDF векторизатора (CumlTfidfVectorizer или sklearn TfidfVectorizer). По умолчанию None.
+        backend (str, optional): Вычислительный бэкенд: 'auto', 'gpu' (cupy/cuml) или 'cpu' (sklearn/scipy). По умолчанию 'auto'.
+        output_format (str, optional): Формат результата `transform`: 'dense' (np.ndarray) или 'sparse'
+                                       (scipy CSR, теги хранятся без нулей). По умолчанию 'dense'.
+        dtype (str, optional): Тип значений результата `transform`. По умолчанию 'float32'.
+        keep_debug_vectors (bool, optional): Сохранять ли векторы последнего `transform` по частям
+                                             (`transformed_*_vectors`) для отладки. По умолчанию False.
+
+    Модели, сохраненные до появления `output_format`, `dtype` и `keep_debug_vectors`, продолжают
+    возвращать плотную float64 матрицу и сохранять отладочные векторы (см. `_transform_option`).
+
+    Атрибут `tfidf_cuml` сохраняет историческое имя для совместимости с сохраненными моделями
+    и содержит TF-IDF векторизатор выбранного бэкенда.
     """
-    def __init__(self, owners_method='log_scale', multilabel_params=None, nmf_params=None, lda_params=None, tag_weight=1.0, tfidf_cuml_params=None):
+    # Значения параметров transform для моделей, сохраненных до их появления (прежнее поведение)
+    LEGACY_TRANSFORM_OPTIONS = {'output_format': 'dense', 'dtype': 'float64', 'keep_debug_vectors': True}
+
+    def __init__(self, owners_method='log_scale', multilabel_params=None, nmf_params=None, lda_params=None, tag_weight=1.0, tfidf_cuml_params=None, backend='auto',
+                 output_format='dense', dtype='float32', keep_debug_vectors=False):
         self.owners_method = owners_method
         self.multilabel_params = multilabel_params
         self.nmf_params = nmf_params
         self.lda_params = lda_params
         self.tag_weight = tag_weight
         self.tfidf_cuml_params = tfidf_cuml_params if tfidf_cuml_params else {}
+        self.backend = resolve_backend(backend)
+        self.tfidf_cuml = make_tfidf_vectorizer(self.tfidf_cuml_params, self.backend)
         self.mlb = None
         self.nmf = None
         self.lda = None
         self.tfidf_feature_names_out_ = None
-        self.scaler = CumlMinMaxScaler()
+        self.scaler = make_minmax_scaler(self.backend)
+        if output_format not in ('dense', 'sparse'):
+            raise ValueError(f"❌ Недопустимый формат результата: {output_format}")
+        self.output_format = output_format
+        self.dtype = dtype
+        self.keep_debug_vectors = keep_debug_vectors
         self.transformed_owners_vectors = None
         self.transformed_tags_vectors = None
         self.transformed_desc_vectors = None
         self.transformed_combined_vectors = None
 
+    def feature_blocks(self):
+        """Возвращает границы блоков признаков в результате `transform`.
+
+        Возвращает:
+            list: Список [имя блока, начало, конец] для блоков 'owners' (владельцы), 'tags' (теги, уже умноженные на `tag_weight`)
+                  и 'description' (тематический вектор описания) в порядке следования столбцов.
+        """
+        topic_model = self.nmf if self.nmf is not None else self.lda
+        sizes = [('owners', 1), ('tags', len(self.mlb.classes_)), ('description', topic_model.components_.shape[0])]
+        blocks, start = [], 0
+        for name, size in sizes:
+            blocks.append([name, start, start + size])
+            start += size
+        return blocks
+
+    def _transform_option(self, name):
+        """Возвращает параметр transform, для старых сохраненных моделей - значение из `LEGACY_TRANSFORM_OPTIONS`."""
+        return getattr(self, name, self.LEGACY_TRANSFORM_OPTIONS[name])
+
     def fit(self, X, y=None):
         """Обучает векторизатор на предоставленных данных.
 
@@ -486,7 +1015,7 @@ class CombinedVectorizer(BaseEstimator, TransformerMixin):
         """
         self.owners_vectors = vectorize_owners(X, method=self.owners_method)
         self.tags_vectors, self.mlb = vectorize_tags(X, multilabel_params=self.multilabel_params)
-        if isinstance(self.tags_vectors, cp.sparse.csr_matrix):
+        if cp is not None and isinstance(self.tags_vectors, cp.sparse.csr_matrix):
             print("ℹ️ Векторы тегов - cupy sparse matrix, преобразование в numpy...")
             self.tags_vectors = np.array(cp.asnumpy(self.tags_vectors.todense()), dtype=np.float64)
         if self.tags_vectors.ndim == 1:
@@ -494,7 +1023,7 @@ class CombinedVectorizer(BaseEstimator, TransformerMixin):
 
         cleaned_descriptions = X['short_description_clean'].str.lower()
         self.tfidf_cuml.fit(cleaned_descriptions)
-        self.tfidf_feature_names_out_ = [word for word, index in sorted(self.tfidf_cuml.vocabulary_.to_pandas().items(), key=lambda item: item[1])]
+        self.tfidf_feature_names_out_ = tfidf_feature_names(self.tfidf_cuml)
 
         if self.nmf_params and self.lda_params is None:
             self.desc_vectors, self.nmf = vectorize_descriptions(X, nmf_params=self.nmf_params, vectorizer_cuml=self.tfidf_cuml)
@@ -521,29 +1050,22 @@ class CombinedVectorizer(BaseEstimator, TransformerMixin):
         """Трансформирует входные данные в комбинированные векторы признаков.
 
         Использует обученные векторизаторы и скалеры для преобразования данных о владельцах, тегов и описаний в единое векторное представление.
+        Теги трансформируются сразу в разреженную матрицу, а плотная матрица (`output_format='dense'`) заполняется
+        по частям без промежуточных копий.
 
         Аргументы:
             X (pd.DataFrame): DataFrame, содержащий данные для трансформации.
             y (None): Не используется, нужен для совместимости API scikit-learn.
 
         Возвращает:
-            np.ndarray: Матрица комбинированных векторов признаков.
+            np.ndarray или scipy.sparse.csr_matrix: Матрица комбинированных векторов признаков (см. `output_format` и `dtype`).
         """
+        dtype = np.dtype(self._transform_option('dtype'))
         owners_vectors = vectorize_owners(X, method=self.owners_method, scaler=self.scaler)
-        owners_vectors = owners_vectors.reshape(owners_vectors.shape[0], -1)
-        tags_vectors = self.mlb.transform(X['all_tags'])
+        owners_vectors = to_numpy(owners_vectors).reshape(owners_vectors.shape[0], -1).astype(dtype, copy=False)
+        tags_vectors = transform_tags_sparse(self.mlb, X['all_tags'], self.tag_weight, dtype)
 
-        tag_weight = self.tag_weight
-        tags_vectors_weighted = tags_vectors * tag_weight
-        tags_vectors = tags_vectors_weighted
-
-        tfidf_transformed_cuml = self.tfidf_cuml.transform(X['short_description_clean'])
-        tfidf_transformed_cpu = tfidf_transformed_cuml.get()
-        data = cp.asnumpy(tfidf_transformed_cpu.data)
-        indices = cp.asnumpy(tfidf_transformed_cpu.indices)
-        indptr = cp.asnumpy(tfidf_transformed_cpu.indptr)
-        shape = tfidf_transformed_cpu.shape
-        tfidf_transformed = csr_matrix((data, indices, indptr), shape=shape)
+        tfidf_transformed = to_scipy_csr(self.tfidf_cuml.transform(X['short_description_clean']))
 
         desc_vectors = None
         if self.nmf_params:
@@ -553,13 +1075,23 @@ class CombinedVectorizer(BaseEstimator, TransformerMixin):
 
         if desc_vectors is not None and desc_vectors.shape[0] != owners_vectors.shape[0]:
             raise ValueError(f"❌ Несовпадение количества образцов между векторами владельцев и описаний: {owners_vectors.shape[0]} vs {desc_vectors.shape[0]}")
+        desc_vectors = np.asarray(desc_vectors, dtype=dtype)
 
-        self.transformed_owners_vectors = owners_vectors
-        self.transformed_tags_vectors = tags_vectors
-        self.transformed_desc_vectors = desc_vectors
-
-        combined_vectors = np.hstack([owners_vectors, tags_vectors.toarray() if hasattr(tags_vectors, 'toarray') else tags_vectors, desc_vectors])
-        self.transformed_combined_vectors = combined_vectors
+        if self._transform_option('output_format') == 'sparse':
+            combined_vectors = sp.hstack([csr_matrix(owners_vectors), tags_vectors, csr_matrix(desc_vectors)], format='csr', dtype=dtype)
+        else:
+            blocks = [owners_vectors, tags_vectors, desc_vectors]
+            combined_vectors = np.empty((owners_vectors.shape[0], sum(block.shape[1] for block in blocks)), dtype=dtype)
+            offset = 0
+            for block in blocks:
+                combined_vectors[:, offset:offset + block.shape[1]] = block.toarray() if sp.issparse(block) else block
+                offset += block.shape[1]
+
+        if self._transform_option('keep_debug_vectors'):
+            self.transformed_owners_vectors = owners_vectors
+            self.transformed_tags_vectors = tags_vectors
+            self.transformed_desc_vectors = desc_vectors
+            self.transformed_combined_vectors = combined_vectors
 
         return combined_vectors
 
@@ -580,7 +1112,11 @@ class CombinedVectorizer(BaseEstimator, TransformerMixin):
              'nmf_params': self.nmf_params,
             'lda_params': self.lda_params,
             'tag_weight': self.tag_weight,
-            'tfidf_cuml_params': self.tfidf_cuml_params
+            'tfidf_cuml_params': self.tfidf_cuml_params,
+            'backend': getattr(self, 'backend', 'gpu'),
+            'output_format': self._transform_option('output_format'),
+            'dtype': self._transform_option('dtype'),
+            'keep_debug_vectors': self._transform_option('keep_debug_vectors'),
         }
 
     def set_params(self, **params):
@@ -604,7 +1140,52 @@ class CombinedVectorizer(BaseEstimator, TransformerMixin):
              self.lda_params = params['lda_params']
         if 'tag_weight' in params:
             self.tag_weight = params['tag_weight']
+        if 'output_format' in params:
+            if params['output_format'] not in ('dense', 'sparse'):
+                raise ValueError(f"❌ Недопустимый формат результата: {params['output_format']}")
+            self.output_format = params['output_format']
+        if 'dtype' in params:
+            self.dtype = params['dtype']
+        if 'keep_debug_vectors' in params:
+            self.keep_debug_vectors = params['keep_debug_vectors']
+        if 'backend' in params:
+            self.backend = resolve_backend(params['backend'])
+            self.tfidf_cuml = make_tfidf_vectorizer(self.tfidf_cuml_params, self.backend)
+            self.scaler = make_minmax_scaler(self.backend)
         if 'tfidf_cuml_params' in params:
             self.tfidf_cuml_params = params['tfidf_cuml_params']
             self.tfidf_cuml.set_params(**params['tfidf_cuml_params'])
-        return self
\ No newline at end of file
+        return self
+
+    def to_cpu(self):
+        """Переводит обученный векторизатор на CPU-бэкенд без переобучения.
+
+        Заменяет CumlTfidfVectorizer и cuml MinMaxScaler на эквивалентные компоненты sklearn
+        с теми же обученными параметрами (словарь, IDF, параметры масштабирования).
+
+        Возвращает:
+            CombinedVectorizer: Этот же векторизатор на CPU-бэкенде.
+        """
+        self.tfidf_cuml = tfidf_to_cpu(self.tfidf_cuml)
+        self.scaler = scaler_to_cpu(self.scaler)
+        self.backend = 'cpu'
+        return self
+
+
+def main():
+    """Конвертирует сохраненную модель, обученную на GPU, в модель для CPU-серверов."""
+    parser = argparse.ArgumentParser(description="Конвертация модели CombinedVectorizer с GPU-бэкенда (cuml) на CPU (sklearn).")
+    parser.add_argument('input', type=str, help='Путь к исходной модели (.pkl), обученной на GPU.')
+    parser.add_argument('output', type=str, help='Путь для сохранения CPU-модели (.pkl).')
+    args = parser.parse_args()
+
+    with open(args.input, 'rb') as f:
+        model = pickle.load(f)
+    convert_model_to_cpu(model)
+    with open(args.output, 'wb') as f:
+        pickle.dump(model, f)
+    print(f"💾 CPU-модель сохранена по пути: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,17 +1,22 @@
 import sys
 import os
-import re
+import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from steam_api_parser import ApiParser
-from steam_library_grouper import group_user_games
-from steam_constants import all_api_requests
-from vectorizer import CombinedVectorizer, clean_text
-from dataset_cleaner import DataCleaner
-from steam_library_analyzer import LibraryAnalyzer
+from steam_library_analyzer import get_shared_analyzer
+from instrumentation import get_logger, request_context
+from metrics import REQUESTS, REQUEST_LATENCY, CONTENT_TYPE, render_metrics
 import gradio as gr
 
+ANALYZE_CONCURRENCY_LIMIT = int(os.getenv("GRADIO_CONCURRENCY_LIMIT", "4")) # Количество одновременных запросов к общему анализатору
+SERVER_NAME = os.getenv("GRADIO_SERVER_NAME", "127.0.0.1")
+SERVER_PORT = int(os.getenv("GRADIO_SERVER_PORT", "7860"))
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0" # "0" запускает только интерфейс Gradio, без /metrics
+METRICS_PATH = "/metrics"
+
+logger = get_logger('gradio_demo')
+
 
 def is_steam_profile_url(input_string):
     """Проверяет, является ли строка ссылкой на профиль Steam (id или profiles)."""
@@ -30,45 +35,73 @@ def analyze_input(user_input):
     Функция для анализа пользовательского ввода и получения рекомендаций.
     Определяет тип ввода (URL профиля, vanity URL, SteamID64, название игры, URL игры)
     и вызывает соответствующую функцию анализатора.
+    Использует общий для процесса LibraryAnalyzer, созданный при запуске сервиса.
+    Каждый запрос выполняется в `request_context` со своим идентификатором трассировки, а его тип, результат
+    и время учитываются в метриках `steam_recommender_requests_total` и `steam_recommender_request_duration_seconds`.
+    """
+    request_info = {'type': 'unknown', 'status': 'error'}
+    start_time = time.perf_counter()
+    try:
+        with request_context('analyze'):
+            output = _route_input(user_input, request_info)
+        request_info['status'] = 'not_found' if output.startswith("❌") else 'ok'
+        return output
+    finally:
+        REQUESTS.inc(type=request_info['type'], status=request_info['status'])
+        REQUEST_LATENCY.observe(time.perf_counter() - start_time, type=request_info['type'])
+
+
+def _route_input(user_input, request_info):
+    """Определяет тип ввода и вызывает соответствующую функцию анализатора (см. `analyze_input`).
+
+    Тип ввода ('empty', 'profile_url', 'app_url', 'steamid64', 'title', 'vanity', 'unresolved')
+    записывается в `request_info['type']` до обращения к анализатору.
     """
-    analyzer = LibraryAnalyzer()
+    analyzer = get_shared_analyzer()
     user_input = user_input.strip()
 
     if not user_input:
+        request_info['type'] = 'empty'
         return "❌ Ввод не может быть пустым. Пожалуйста, введите корректные данные."
 
     if is_steam_profile_url(user_input):
-        print("⚙️ Обнаружен запрос библиотеки пользователя (URL профиля).")
+        request_info['type'] = 'profile_url'
+        logger.info("⚙️ Обнаружен запрос библиотеки пользователя (URL профиля).")
         steam_user_url = user_input
         return analyzer.run_analysis_for_gradio(steam_user_url)
 
     if is_steam_app_url(user_input):
-        print("⚙️ Обнаружен запрос одиночной игры (URL игры).")
+        request_info['type'] = 'app_url'
+        logger.info("⚙️ Обнаружен запрос одиночной игры (URL игры).")
         return analyzer.analyze_single_game_for_gradio(user_input)
 
     if is_steamid64(user_input):
-        print("⚙️ Обнаружен запрос библиотеки пользователя (SteamID64).")
+        request_info['type'] = 'steamid64'
+        logger.info("⚙️ Обнаружен запрос библиотеки пользователя (SteamID64).")
         steam_user_url = f"https://steamcommunity.com/profiles/{user_input}"
         return analyzer.run_analysis_for_gradio(steam_user_url)
 
-    print("⚙️ Попытка обработки как названия игры.")
+    request_info['type'] = 'title'
+    logger.info("⚙️ Попытка обработки как названия игры.")
     game_identifier = user_input
     recommendations_output = analyzer.analyze_single_game_for_gradio(game_identifier)
     if recommendations_output != "❌ Не удалось получить рекомендации для указанной игры.":
-        print("✅ Распознано как запрос одиночной игры по названию.")
+        logger.debug("✅ Распознано как запрос одиночной игры по названию.")
         return recommendations_output
 
+    request_info['type'] = 'vanity'
     vanity_resolution_result = validate_vanity_url(user_input, analyzer.api_parser)
     if vanity_resolution_result:
         if isinstance(vanity_resolution_result, str):
             steam_user_url = vanity_resolution_result
-            print("⚙️ Обнаружен запрос библиотеки пользователя (vanity URL), подтвержден через API.")
+            logger.info("⚙️ Обнаружен запрос библиотеки пользователя (vanity URL), подтвержден через API.")
             return analyzer.run_analysis_for_gradio(steam_user_url)
         elif vanity_resolution_result is False:
             pass
         else:
             return "❌ Ошибка при проверке vanity URL через API. Пожалуйста, попробуйте позже."
 
+    request_info['type'] = 'unresolved'
     return "❌ Не удалось найти пользователя или игру по введенному запросу. Пожалуйста, введите корректную ссылку на профиль Steam, ссылку на игру, Steam ID игры или название игры."
 
 
@@ -78,17 +111,17 @@ def validate_vanity_url(vanity_url_input, api_parser):
     через Steam Web API.
     Возвращает URL профиля, False если vanity URL не найден, или None в случае ошибки API.
     """
-    print(f"🔍 Проверка vanity URL: '{vanity_url_input}' через API...")
+    logger.debug("🔍 Проверка vanity URL: '%s' через API...", vanity_url_input)
     try:
         user_id_response = api_parser.resolve_vanity_url(vanity_url_input)
         if user_id_response:
-            print(f"✅ Vanity URL '{vanity_url_input}' успешно разрешен в SteamID64: {user_id_response}")
+            logger.debug("✅ Vanity URL '%s' успешно разрешен в SteamID64: %s", vanity_url_input, user_id_response)
             return f"https://steamcommunity.com/profiles/{user_id_response}"
         else:
-            print(f"❌ Vanity URL '{vanity_url_input}' не найден через API.")
+            logger.info("❌ Vanity URL '%s' не найден через API.", vanity_url_input)
             return False
     except Exception as e:
-        print(f"⚠️ Ошибка при проверке vanity URL через API: {e}")
+        logger.warning("⚠️ Ошибка при проверке vanity URL через API: %s", e)
         return None
 
 
@@ -155,9 +188,37 @@ with gr.Blocks(theme=gr.themes.Soft(), title="🎮 Steam Game Recommender") as i
         fn=analyze_input,
         inputs=input_box,
         outputs=output_box,
-        api_name="analyze"
+        api_name="analyze",
+        concurrency_limit=ANALYZE_CONCURRENCY_LIMIT
     )
 
 
+def create_app():
+    """Создает FastAPI приложение с интерфейсом Gradio ('/') и метриками в формате Prometheus (`METRICS_PATH`).
+
+    Метрики отдаются тем же сервером и портом, что и интерфейс, поэтому их можно собирать без отдельного процесса.
+
+    Возвращает:
+        fastapi.FastAPI: Приложение для запуска через uvicorn.
+    """
+    from fastapi import FastAPI
+    from fastapi.responses import PlainTextResponse
+
+    app = FastAPI()
+
+    @app.get(METRICS_PATH, response_class=PlainTextResponse)
+    def metrics_endpoint():
+        return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+    iface.queue(default_concurrency_limit=ANALYZE_CONCURRENCY_LIMIT)
+    return gr.mount_gradio_app(app, iface, path="/")
+
+
 if __name__ == "__main__":
-    iface.launch()
\ No newline at end of file
+    get_shared_analyzer() # Модель и каталог загружаются один раз до приема запросов
+    if METRICS_ENABLED:
+        import uvicorn
+        uvicorn.run(create_app(), host=SERVER_NAME, port=SERVER_PORT)
+    else:
+        iface.queue(default_concurrency_limit=ANALYZE_CONCURRENCY_LIMIT)
+        iface.launch(server_name=SERVER_NAME, server_port=SERVER_PORT)
\ No newline at end of file
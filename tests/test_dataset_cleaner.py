@@ -0,0 +1,59 @@
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'benchmarks'))
+
+from dataset_cleaner import DataCleaner
+from synthetic_catalog import generate_raw_games
+
+
+@pytest.fixture(scope='module')
+def data_cleaner():
+    # Без кэша лемм на диске тесты не зависят от предыдущих запусков
+    return DataCleaner(lemma_cache_path=None)
+
+
+def test_release_date_does_not_depend_on_chunk_first_row(data_cleaner):
+    """Даты разбираются одинаково, даже если пакет начинается со строки в другом формате."""
+    dates = pd.Series(['Oct 21, 2008', 'Jan 05, 2015', '2019-05-01', '21 Oct, 2008', 'Oct 2008', 'Coming soon', None, 'Mar 15, 2020'])
+    whole = data_cleaner._convert_release_date(pd.DataFrame({'release_date': dates}))
+    chunks = pd.concat([
+        data_cleaner._convert_release_date(pd.DataFrame({'release_date': dates.iloc[start:start + 2]}))
+        for start in range(0, len(dates), 2)
+    ])
+
+    pd.testing.assert_frame_equal(chunks, whole)
+    assert whole['release_date'].iloc[0] == pd.Timestamp('2008-10-21')
+    assert whole['release_date'].iloc[2] == pd.Timestamp('2019-05-01')
+    assert whole['release_date'].iloc[3] == pd.Timestamp('2008-10-21')
+    assert whole['release_date'].iloc[5:7].isna().all()
+
+
+def test_clean_data_parallel_matches_sequential_on_chunk_boundary(data_cleaner):
+    """Параллельная очистка совпадает с последовательной, когда граница пакетов приходится на дату в другом формате."""
+    raw = generate_raw_games(120, seed=7)
+    chunk_size = 40
+    # Второй пакет целиком в формате ISO: при выводе формата по первой строке пакеты разбирали бы даты по-разному
+    boundary = raw.index[chunk_size:2 * chunk_size]
+    raw.loc[boundary, 'release_date'] = pd.to_datetime(raw.loc[boundary, 'release_date'], format='%b %d, %Y').dt.strftime('%Y-%m-%d')
+
+    sequential = data_cleaner.clean_data(raw.copy())
+    parallel = data_cleaner.clean_data_parallel(raw.copy(), chunk_size=chunk_size, n_workers=2)
+
+    pd.testing.assert_frame_equal(parallel, sequential)
+    assert sequential['release_date'].notna().all()
+
+
+def test_all_tags_survive_dropping_tag_source_columns(data_cleaner):
+    """Столбцы 'tags', 'categories' и 'genres' можно удалять: 'all_tags' собирается до удаления столбцов."""
+    raw = generate_raw_games(60, seed=5)
+    expected = data_cleaner.clean_data(raw.copy())
+    dropping_cleaner = DataCleaner(columns_to_drop=data_cleaner.columns_to_drop + ['tags', 'categories', 'genres'], lemma_cache_path=None)
+
+    cleaned = dropping_cleaner.clean_data(raw.copy())
+
+    assert not {'tags', 'categories', 'genres'} & set(cleaned.columns)
+    pd.testing.assert_series_equal(cleaned['all_tags'], expected['all_tags'])
@@ -0,0 +1,109 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'benchmarks'))
+
+from dataset_cleaner import DataCleaner, VECTORIZED_STEPS, check_vectorized_equivalence
+from synthetic_catalog import generate_raw_games
+
+
+@pytest.fixture(scope='module')
+def data_cleaner():
+    return DataCleaner(lemma_cache_path=None)
+
+
+def run_both(data_cleaner, step_name, df):
+    """Выполняет построчную и векторизованную реализации шага на копиях `df` и возвращает оба результата."""
+    results = {}
+    for mode in (False, True):
+        data_cleaner.vectorized = mode
+        try:
+            results[mode] = getattr(data_cleaner, step_name)(df.copy())
+        finally:
+            data_cleaner.vectorized = True
+    return results[False], results[True]
+
+
+# Крайние случаи для каждого векторизованного шага: пропуски (None/NaN), значения не того типа,
+# оба формата диапазонов владельцев, строковые и булевы флаги платформ, пустые списки и нелатинские имена
+EDGE_CASES = {
+    '_filter_name_chars': [
+        pd.DataFrame({'name': ['Game 1', 'Half-Life 2™', 'Тестовая игра', '日本語のゲーム', 'Ёжик in Fog', None, np.nan, '', '!!!', 123]}),
+        pd.DataFrame({'name': ['Тестовая игра', None, 'Ω']}),
+        pd.DataFrame({'name': ['Game   Tabs\tand\nspaces', 'Game 2']}, index=['10', '20']),
+    ],
+    '_convert_bool_columns': [
+        pd.DataFrame({
+            'windows': ['true', 'false', 'True', 'FALSE', None, np.nan, 'yes', '', 1, True],
+            'mac': [True, False, True, False, True, False, True, False, True, False],
+            'linux': [False, 'true', None, 'nan', True, np.nan, 'false', 0, 'True', 'TRUE'],
+        }),
+        pd.DataFrame({'windows': [None, None], 'mac': [np.nan, np.nan]}),
+    ],
+    '_extract_owners': [
+        pd.DataFrame({'estimated_owners': ['20,000 - 50,000', '20000 - 50000', '0 - 20000', '0-20000', '1,000,000 - 2,000,000']}),
+        pd.DataFrame({'estimated_owners': ['20,000 - 50,000', None, np.nan, '20000 - 50000', 'unknown', '']}),
+        pd.DataFrame({'estimated_owners': [None, 'unknown']}),
+    ],
+    '_combine_tags': [
+        pd.DataFrame({
+            'categories': [['Single-player', 'Co-op'], [], None, np.nan, 'Single-player', ['Кооператив']],
+            'genres': [['Action'], ['Action', 'RPG'], [], None, ('Indie',), ['Экшен', 'Action']],
+            'tags': [{'Action': 10, 'Indie': 5}, {}, None, np.nan, ['Puzzle'], {'Ролевая игра': 3, 'RPG': 2}],
+        }),
+        pd.DataFrame({'categories': [['Single-player'], None], 'genres': [[], ['Action']]}),
+    ],
+    '_replace_empty_values': [
+        pd.DataFrame({
+            'developers': [[], [''], '', None, np.nan, ['Dev'], 'Dev', ['Студия'], ['', 'Dev'], ' '],
+            'publishers': [['Pub'], [], None, '', [''], np.nan, ['Издатель'], 'Pub', [], ['']],
+        }),
+        pd.DataFrame({'developers': [['Dev'], None], 'publishers': [['Pub'], 'Pub']}),
+        pd.DataFrame({'developers': [[], ''], 'publishers': [[''], []]}),
+    ],
+    '_clean_and_lowercase_tags': [
+        pd.DataFrame({'all_tags': [
+            ['Sci-fi', 'Action', ' Co-op '], [], None, np.nan, 'Action', ['Ролевая игра', 'RPG'], ['Point & Click', 'Point & Click'],
+        ]}),
+        pd.DataFrame({'all_tags': [None, 'Action', np.nan]}),
+        pd.DataFrame({'all_tags': [[], []]}),
+    ],
+}
+
+
+def test_edge_cases_cover_all_vectorized_steps():
+    assert sorted(EDGE_CASES) == sorted(VECTORIZED_STEPS)
+
+
+@pytest.mark.parametrize('step_name, case', [
+    (step_name, case) for step_name, cases in EDGE_CASES.items() for case in range(len(cases))
+])
+def test_vectorized_step_matches_row_wise(data_cleaner, step_name, case):
+    """Векторизованная реализация шага дает тот же DataFrame (значения, типы столбцов и индекс), что и построчная."""
+    row_wise, vectorized = run_both(data_cleaner, step_name, EDGE_CASES[step_name][case])
+    pd.testing.assert_frame_equal(vectorized, row_wise)
+
+
+def test_extract_owners_parses_both_range_formats(data_cleaner):
+    df = pd.DataFrame({'estimated_owners': ['20,000 - 50,000', '20000 - 50000']})
+    row_wise, vectorized = run_both(data_cleaner, '_extract_owners', df)
+    assert vectorized['estimated_owners'].tolist() == row_wise['estimated_owners'].tolist() == [20000, 20000]
+
+
+def test_filter_name_chars_strips_non_latin_chars(data_cleaner):
+    """Нелатинские символы удаляются, а строки без латиницы, цифр и пробелов отбрасываются."""
+    df = pd.DataFrame({'name': ['Game 1', '日本語のゲーム', 'Тестовая игра', 'Ёжик in Fog']})
+    _, vectorized = run_both(data_cleaner, '_filter_name_chars', df)
+    assert vectorized['name'].tolist() == ['Game 1', ' ', ' in Fog']
+    assert vectorized.index.tolist() == [0, 2, 3]
+
+
+def test_check_vectorized_equivalence_on_synthetic_catalog(data_cleaner):
+    """Полная цепочка шагов на синтетическом каталоге (с некорректными записями) не расходится ни на одном шаге."""
+    timings = check_vectorized_equivalence(data_cleaner, generate_raw_games(300, seed=3))
+    assert sorted(timings) == sorted(VECTORIZED_STEPS)
+    assert data_cleaner.vectorized